@@ -2,17 +2,44 @@
 
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
 import dataclasses
+import functools
 import logging
-import shutil
+import os
+import pathlib
+import threading
 from typing import TYPE_CHECKING, TypedDict
 
 from typing_extensions import Unpack
 
-from screenshot_ocr import app_paths, google_sheets, ocr, trivia, utils
+from screenshot_ocr import (
+    app_paths,
+    directory_index,
+    duplicates,
+    google_sheets,
+    journal,
+    manifest,
+    metrics,
+    ocr,
+    ocr_cache,
+    ocr_layout,
+    pipeline,
+    preprocess,
+    question_parser,
+    rate_limit,
+    routing,
+    sheet_sinks,
+    trivia,
+    utils,
+    watch,
+)
 
 if TYPE_CHECKING:
-    import pathlib
+    import typing
+
+    from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -45,10 +72,149 @@ class AppArgs:
     google_token: pathlib.Path
     """the path to the file containing the current authorisation token data"""
 
+    workers: int = 1
+    """the number of images to run OCR over at the same time"""
+
+    persist_workers: int = 1
+    """the number of images to move and save text files for at the same time"""
+
+    queue_size: int = 8
+    """the maximum number of images waiting between each processing stage"""
+
+    ocr_backend: str = ocr.OCR_BACKEND_SUBPROCESS
+    """the name of the OCR backend"""
+
+    ocr_output: str = ocr.OCR_OUTPUT_TEXT
+    """the OCR output format, text or TSV with the position and confidence of words"""
+
+    min_confidence: float = ocr_layout.DEFAULT_MIN_CONFIDENCE
+    """the lowest confidence of the words to keep when using the TSV output"""
+
+    ocr_options: ocr.TesseractOptions | None = None
+    """the tesseract settings for the full OCR pass, or None for the defaults"""
+
+    fast_ocr_options: ocr.TesseractOptions | None = None
+    """the tesseract settings for a fast OCR pass before the full pass, or None"""
+
+    cache_dir: pathlib.Path | None = None
+    """the path to the directory to cache OCR text"""
+
+    use_cache: bool = True
+    """whether to use cached OCR text for images that have been processed before"""
+
+    clear_cache: bool = False
+    """whether to remove all cached OCR text before processing images"""
+
+    batch_size: int = 100
+    """the number of spreadsheet cell updates to send in one request"""
+
+    batch_interval: float = 30.0
+    """the maximum number of seconds to wait before sending cell updates"""
+
+    check_sheets: bool = True
+    """whether to check that the dated sheets exist before sending cell updates"""
+
+    create_sheets: bool = False
+    """whether to add the dated sheets that do not exist"""
+
+    sheet_template: str | None = None
+    """the title of the sheet to copy when adding a dated sheet"""
+
+    skip_unchanged: bool = False
+    """whether to read the current cell values and skip updates that change nothing"""
+
+    sink: str = sheet_sinks.SINK_GOOGLE
+    """where to send the spreadsheet cell updates"""
+
+    sink_file: pathlib.Path | None = None
+    """the path to the local spreadsheet file used by the sqlite sink"""
+
+    routes_file: pathlib.Path | None = None
+    """the path to the file of rules that choose the spreadsheet for each screenshot"""
+
+    routes: list[routing.Route] = dataclasses.field(default_factory=list)
+    """the rules that send matching screenshots to other spreadsheets"""
+
+    sheets_requests_per_minute: float = rate_limit.DEFAULT_REQUESTS_PER_MINUTE
+    """the number of Google Sheets requests to send each minute, 0 for no limit"""
+
+    sheets_max_retries: int = rate_limit.DEFAULT_MAX_RETRIES
+    """the number of times to retry a Google Sheets request that failed"""
+
+    manifest_file: pathlib.Path | None = None
+    """the path to the file that records the processed images"""
+
+    use_manifest: bool = True
+    """whether to skip images that have been processed before"""
+
+    journal_file: pathlib.Path | None = None
+    """the path to the file that records each image before its files are changed"""
+
+    use_journal: bool = True
+    """whether to finish the images that were started by a run that stopped part way"""
+
+    watch: bool = False
+    """whether to keep running and process new images as they are saved"""
+
+    dir_index_file: pathlib.Path | None = None
+    """the path to the file that records the screenshot files in the input directory"""
+
+    use_dir_index: bool = True
+    """whether to skip reading the input directory if it has not changed"""
+
+    input_dirs: list[pathlib.Path] = dataclasses.field(default_factory=list)
+    """the paths to all the input directories, when there is more than one"""
+
+    recursive: bool = False
+    """whether to also look for images in the subdirectories of the input directories"""
+
+    metrics_file: pathlib.Path | None = None
+    """the path to the file to write the run metrics to"""
+
+    metrics_format: str = metrics.METRICS_FORMAT_JSON
+    """the format of the metrics file"""
+
+    preprocess_options: preprocess.PreprocessOptions | None = None
+    """the settings for preparing images before OCR, or None to use the images"""
+
+
+@dataclasses.dataclass
+class _RunContext:
+    """The helpers and totals for one run of the application."""
+
+    app_args: AppArgs
+    sheets_writer: google_sheets.SheetsBatchWriter
+    trivia_helper: trivia.TriviaHelper
+    ocr_helper: ocr.OcrHelper | ocr.TesseractLibraryHelper
+    executor: concurrent.futures.ThreadPoolExecutor
+    run_metrics: metrics.RunMetrics
+    router: routing.SpreadsheetRouter
+    engine_id: str = ""
+    preprocessor: preprocess.ImagePreprocessor | None = None
+    cache: ocr_cache.OcrCache | None = None
+    manifest_db: manifest.Manifest | None = None
+    run_journal: journal.Journal | None = None
+    dir_index: directory_index.DirectoryIndex | None = None
+    duplicate_finder: duplicates.DuplicateFinder | None = None
+    count: int = 0
+    skipped: int = 0
+    retried: int = 0
+    resumed: int = 0
+    duplicate_count: int = 0
+    output_names: dict[str, pathlib.Path] = dataclasses.field(default_factory=dict)
+
 
 class App:
     """The main application."""
 
+    def __init__(self) -> None:
+        """Create a new instance."""
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        """Stop watching for new screenshot images."""
+        self._stop_event.set()
+
     def run(self, app_args: AppArgs) -> bool:
         """Run the application.
 
@@ -61,76 +227,144 @@ class App:
         logger.info("Starting Screenshot OCR.")
 
         try:
-            sheets_helper = google_sheets.GoogleSheetsHelper(
-                app_args.google_credentials,
-                app_args.google_token,
-            )
-            trivia_helper = trivia.TriviaHelper(sheets_helper, app_args.spreadsheet_id)
-            ocr_helper = ocr.OcrHelper(
-                app_args.tesseract_exe,
-                app_args.tesseract_data,
-            )
+            context = self._start(app_args)
+            input_dirs = self._input_dirs(app_args)
+            watchers = []
+            try:
+                # finish the images from a run that stopped part way
+                self._resume(context)
 
-            input_dir = app_args.input_dir
-            output_dir = app_args.output_dir
-            move_images = app_args.move_images
+                if app_args.watch:
+                    # start watching before looking for images,
+                    # so that images saved in the meantime are not missed
+                    watchers = [
+                        watch.DirectoryWatcher(i, recursive=app_args.recursive)
+                        for i in input_dirs
+                    ]
 
-            if not output_dir.exists():
-                output_dir.mkdir(parents=True, exist_ok=True)
+                # find the image files and extract the text from each
+                images = context.trivia_helper.find_screenshot_images_in_dirs(
+                    input_dirs,
+                    context.dir_index,
+                    recursive=app_args.recursive,
+                )
+                self._process_images(context, images, retry=True)
 
-            count = 0
+                if watchers:
+                    self._watch(context, watchers)
+            finally:
+                for watcher in watchers:
+                    watcher.close()
+                self._finish(context)
+                self._write_metrics(app_args, context.run_metrics)
 
-            # find the image files and extract the text from each
-            for image_file, found_date in trivia_helper.find_screenshot_images(
-                input_dir,
-            ):
-                output_text = ocr_helper.run(image_file) or ""
-                if move_images:
-                    # move the image file to the output dir
-                    shutil.move(image_file, output_dir / image_file.name)
-
-                # create a text file with the same name as the image file
-                # that contains the extracted text
-                output_text_file = (output_dir / image_file.stem).with_suffix(".txt")
-                output_text_file.write_text(output_text)
-                count += 1
-
-                # extract the question number
-                (
-                    question_number,
-                    question_points,
-                    question_text,
-                ) = trivia_helper.get_text_details(
-                    output_text,
+            if context.cache:
+                logger.info(
+                    "Used cached OCR text for %s of %s image file(s).",
+                    context.cache.hits,
+                    context.cache.hits + context.cache.misses,
+                )
+                context.cache.prune()
+
+            if context.duplicate_finder:
+                logger.info(
+                    "Skipped %s image file(s) with the same content as another image.",
+                    context.duplicate_count,
                 )
 
-                if not question_points:
-                    question_points = 1
+            if context.resumed:
+                logger.info(
+                    "Resumed %s image file(s) that a previous run did not finish.",
+                    context.resumed,
+                )
 
-                # print the image file name and extracted question number
-                # and text to stdout
+            if context.manifest_db:
                 logger.info(
-                    '"%s": Q%s) (%s points) "%s"',
-                    image_file.name,
-                    question_number,
-                    question_points,
-                    question_text,
+                    "Skipped %s image file(s) that were processed previously, "
+                    "retried %s spreadsheet update(s).",
+                    context.skipped,
+                    context.retried,
                 )
 
-                # update the spreadsheet cell with the text
-                update_result = None
-                if question_number:
-                    update_result = trivia_helper.update_trivia_cell(
+            self._log_sheets_writer(context.sheets_writer, context.run_metrics)
+            self._log_routes(context.router)
+            self._log_ocr_passes(app_args, context.run_metrics)
+            logger.info("Run metrics:\n%s", context.run_metrics.summary_table())
+            logger.info(
+                "Finished. Found and processed %s image file(s).",
+                context.count,
+            )
+            return True
+
+        except Exception as error:  # noqa: BLE001
+            # Catch broad exception to log error.
+            utils.log_exception(error)
+            return False
+
+    def resync(self, app_args: AppArgs) -> bool:
+        """Update the spreadsheet using the text files saved by previous runs.
+
+        The text files in the output directory are parsed again
+        and the cell updates are sent in batches.
+        The images and Tesseract are not used,
+        so this is much faster than processing the images again.
+
+        Args:
+            app_args: The application arguments.
+
+        Returns:
+            bool: True if the resync succeeded, otherwise false.
+        """
+        logger.info("Starting Screenshot OCR resync.")
+
+        try:
+            run_metrics = metrics.RunMetrics()
+            sheets_writer = self._build_sheets_writer(app_args, run_metrics)
+            trivia_helper = trivia.TriviaHelper(sheets_writer, app_args.spreadsheet_id)
+            router = self._build_router(app_args)
+
+            count = 0
+            not_found = 0
+            try:
+                for text_file, found_date, details in self._parse_text_files(
+                    trivia_helper,
+                    run_metrics,
+                    app_args.output_dir,
+                ):
+                    count += 1
+                    question_number, question_points, question_text = details
+                    logger.info(
+                        '"%s": Q%s) (%s points) "%s"',
+                        text_file.name,
                         question_number,
                         question_points,
                         question_text,
-                        sheet_date=found_date,
                     )
+                    if not question_number:
+                        not_found += 1
+                    with run_metrics.time(metrics.STAGE_SHEET, text_file.name):
+                        self._update_sheet(
+                            trivia_helper,
+                            question_number,
+                            question_points,
+                            question_text,
+                            found_date,
+                            router.spreadsheet_id(text_file.name, count=True),
+                        )
+            finally:
+                sheets_writer.flush()
+                sheets_writer.close()
+                self._write_metrics(app_args, run_metrics)
 
-                if not update_result:
-                    logger.warning("Could not update spreadsheet.")
-
-            logger.info("Finished. Found and processed %s image file(s).", count)
+            self._log_sheets_writer(sheets_writer, run_metrics)
+            self._log_routes(router)
+            logger.info("Run metrics:\n%s", run_metrics.summary_table())
+            logger.info(
+                "Finished. Resynced %s text file(s), "
+                "%s did not have a question number.",
+                count,
+                not_found,
+            )
             return True
 
         except Exception as error:  # noqa: BLE001
@@ -138,12 +372,1176 @@ class App:
             utils.log_exception(error)
             return False
 
+    def _resume(self, context: _RunContext) -> None:
+        """Finish the images that were started by a run that stopped part way.
+
+        Each image continues from the last stage recorded in the journal.
+        The text recorded in the journal is used, so OCR is not run again.
+
+        Args:
+            context: The run context.
+        """
+        run_journal = context.run_journal
+        entries = run_journal.unfinished() if run_journal else []
+        if not run_journal or not entries:
+            return
+
+        logger.info("Resuming %s image file(s) from the journal.", len(entries))
+        sheet_ranges: dict[pathlib.Path, list[str]] = {}
+        try:
+            for journal_entry in entries:
+                entry = journal_entry.entry
+                image_file = pathlib.Path(entry.path)
+                if journal_entry.stage == journal.JOURNAL_STAGE_PERSIST:
+                    self._resume_persist(journal_entry)
+                    run_journal.advance(entry.path, journal.JOURNAL_STAGE_SHEET)
+
+                ranges = self._update_sheet(
+                    context.trivia_helper,
+                    entry.question_number,
+                    entry.question_points,
+                    entry.question_text,
+                    entry.sheet_date,
+                    context.router.spreadsheet_id(image_file.name, count=True),
+                )
+                sheet_ranges[image_file] = ranges
+                if context.manifest_db:
+                    if not ranges:
+                        entry.sheet_status = manifest.SHEET_STATUS_SKIPPED
+                    context.manifest_db.put(entry)
+        finally:
+            context.sheets_writer.flush()
+
+        if context.manifest_db:
+            self._record_sheet_status(
+                context.manifest_db,
+                context.sheets_writer,
+                context.router,
+                sheet_ranges,
+            )
+        run_journal.advance_many(
+            [str(i) for i in sheet_ranges],
+            journal.JOURNAL_STAGE_DONE,
+        )
+        context.resumed += len(entries)
+        context.run_metrics.add(metrics.COUNTER_RESUMED, len(entries))
+
+    def _resume_persist(self, journal_entry: journal.JournalEntry) -> None:
+        """Move the image file and store the text, if that was not finished.
+
+        Args:
+            journal_entry: The journal entry.
+        """
+        image_file = pathlib.Path(journal_entry.entry.path)
+        moved_path = journal_entry.moved_path
+        if moved_path and image_file.exists():
+            utils.move_file(image_file, pathlib.Path(moved_path))
+        elif moved_path and not pathlib.Path(moved_path).exists():
+            logger.warning('Could not find the image file "%s" to move.', image_file)
+
+        utils.write_text_atomic(
+            pathlib.Path(journal_entry.text_path),
+            journal_entry.entry.ocr_text,
+        )
+
+    def _parse_text_files(
+        self,
+        trivia_helper: trivia.TriviaHelper,
+        run_metrics: metrics.RunMetrics,
+        text_dir: pathlib.Path,
+    ) -> typing.Iterator[
+        tuple[pathlib.Path, datetime | None, tuple[int | None, int, str]]
+    ]:
+        """Read and parse the screenshot text files one at a time.
+
+        Args:
+            trivia_helper: The trivia helper.
+            run_metrics: Records the time taken to read and parse each file.
+            text_dir: The directory containing the text files.
+
+        Returns:
+            An iterator of the text file path, date, and question details.
+        """
+        if not text_dir.is_dir():
+            msg = f"Output directory is missing '{text_dir}'."
+            raise FileNotFoundError(msg)
+
+        for text_file, found_date in trivia_helper.find_screenshot_text_files(
+            text_dir,
+        ):
+            with run_metrics.time(metrics.STAGE_PARSE, text_file.name):
+                parsed = next(question_parser.parse_text_files([text_file]), None)
+            if parsed is None:
+                continue
+            run_metrics.add(metrics.COUNTER_TEXT_FILES)
+            yield text_file, found_date, parsed[1]
+
+    def _start(self, app_args: AppArgs) -> _RunContext:
+        """Create the helpers used to process images.
+
+        Args:
+            app_args: The application arguments.
+
+        Returns:
+            The run context.
+        """
+        run_metrics = metrics.RunMetrics()
+        sheets_writer = self._build_sheets_writer(app_args, run_metrics)
+        trivia_helper = trivia.TriviaHelper(sheets_writer, app_args.spreadsheet_id)
+        router = self._build_router(app_args)
+        ocr_helper = ocr.build_ocr_helper(
+            app_args.ocr_backend,
+            app_args.tesseract_exe,
+            app_args.tesseract_data,
+            app_args.ocr_output,
+            app_args.ocr_options,
+        )
+
+        output_dir = app_args.output_dir
+        if not output_dir.exists():
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+        cache = self._build_ocr_cache(app_args)
+
+        preprocessor = None
+        engine_id = ocr_helper.engine_id if cache else ""
+        if app_args.preprocess_options:
+            preprocessor = preprocess.build_preprocessor(app_args.preprocess_options)
+        if preprocessor and cache:
+            engine_id = f"{engine_id}|{preprocessor.options.options_id}"
+
+        manifest_db = None
+        if app_args.use_manifest and app_args.manifest_file:
+            manifest_db = manifest.Manifest(app_args.manifest_file)
+
+        run_journal = None
+        if app_args.use_journal and app_args.journal_file:
+            run_journal = journal.Journal(app_args.journal_file)
+
+        dir_index = None
+        if app_args.use_dir_index and app_args.dir_index_file:
+            dir_index = directory_index.DirectoryIndex(app_args.dir_index_file)
+
+        # the same image can only be found more than once in more than one directory
+        duplicate_finder = None
+        if len(self._input_dirs(app_args)) > 1 or app_args.recursive:
+            duplicate_finder = duplicates.DuplicateFinder()
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=app_args.workers,
+            thread_name_prefix="ocr",
+        )
+
+        return _RunContext(
+            app_args=app_args,
+            sheets_writer=sheets_writer,
+            trivia_helper=trivia_helper,
+            ocr_helper=ocr_helper,
+            executor=executor,
+            run_metrics=run_metrics,
+            router=router,
+            engine_id=engine_id,
+            preprocessor=preprocessor,
+            cache=cache,
+            manifest_db=manifest_db,
+            run_journal=run_journal,
+            dir_index=dir_index,
+            duplicate_finder=duplicate_finder,
+        )
+
+    def _build_router(self, app_args: AppArgs) -> routing.SpreadsheetRouter:
+        """Create the router that chooses the spreadsheet for each screenshot.
+
+        All the spreadsheets share the same sheet sink and batch writer,
+        so one authorised client sends the updates for every spreadsheet.
+
+        Args:
+            app_args: The application arguments.
+
+        Returns:
+            The spreadsheet router.
+        """
+        return routing.SpreadsheetRouter(app_args.routes, app_args.spreadsheet_id)
+
+    def _build_sheets_writer(
+        self,
+        app_args: AppArgs,
+        run_metrics: metrics.RunMetrics,
+    ) -> google_sheets.SheetsBatchWriter:
+        """Create the sheet sink and the batch writer that uses it.
+
+        Args:
+            app_args: The application arguments.
+            run_metrics: The run metrics.
+
+        Returns:
+            The spreadsheet batch writer.
+        """
+        return google_sheets.SheetsBatchWriter(
+            self._build_sheet_sink(app_args, run_metrics),
+            flush_size=app_args.batch_size,
+            flush_interval=app_args.batch_interval,
+            run_metrics=run_metrics,
+            check_sheets=app_args.check_sheets,
+            create_sheets=app_args.create_sheets,
+            sheet_template=app_args.sheet_template,
+            skip_unchanged=app_args.skip_unchanged,
+        )
+
+    def _build_sheet_sink(
+        self,
+        app_args: AppArgs,
+        run_metrics: metrics.RunMetrics,
+    ) -> sheet_sinks.SheetSink:
+        """Create the destination for the spreadsheet cell updates.
+
+        Args:
+            app_args: The application arguments.
+            run_metrics: The run metrics.
+
+        Returns:
+            The sheet sink.
+        """
+        if app_args.sink == sheet_sinks.SINK_GOOGLE:
+            return google_sheets.GoogleSheetsHelper(
+                app_args.google_credentials,
+                app_args.google_token,
+                requests_per_minute=app_args.sheets_requests_per_minute,
+                max_retries=app_args.sheets_max_retries,
+                run_metrics=run_metrics,
+            )
+
+        if app_args.sink == sheet_sinks.SINK_SQLITE and app_args.sink_file:
+            return sheet_sinks.SqliteSheetSink(app_args.sink_file)
+
+        if app_args.sink == sheet_sinks.SINK_MEMORY:
+            return sheet_sinks.MemorySheetSink()
+
+        msg = f"Unknown sheet sink '{app_args.sink}'."
+        raise ValueError(msg)
+
+    def _log_sheets_writer(
+        self,
+        sheets_writer: google_sheets.SheetsBatchWriter,
+        run_metrics: metrics.RunMetrics,
+    ) -> None:
+        """Log the number of spreadsheet cells updated and requests retried.
+
+        Args:
+            sheets_writer: The spreadsheet batch writer.
+            run_metrics: The run metrics.
+        """
+        if sheets_writer.missing_sheets:
+            logger.warning(
+                "These sheets do not exist, so their cells were not updated: %s.",
+                ", ".join(f'"{i}"' for i in sorted(sheets_writer.missing_sheets)),
+            )
+        logger.info(
+            "Updated %s spreadsheet cell(s), %s could not be updated.",
+            sheets_writer.updated_count,
+            len(sheets_writer.failed_ranges),
+        )
+        if sheets_writer.unchanged_count:
+            logger.info(
+                "Skipped %s spreadsheet cell(s) that already had the value.",
+                sheets_writer.unchanged_count,
+            )
+        retries = run_metrics.counters.get(metrics.COUNTER_SHEETS_RETRIES, 0)
+        if retries:
+            logger.info(
+                "Retried %s Google Sheets request(s), %s still failed.",
+                retries,
+                run_metrics.counters.get(metrics.COUNTER_SHEETS_FAILURES, 0),
+            )
+
+    def _log_routes(self, router: routing.SpreadsheetRouter) -> None:
+        """Log the number of screenshots sent using each route.
+
+        Args:
+            router: The spreadsheet router.
+        """
+        if not router.routes:
+            return
+        counts = router.counts
+        for name in [*(i.name for i in router.routes), routing.DEFAULT_ROUTE_NAME]:
+            logger.info(
+                'Sent %s screenshot(s) using route "%s".',
+                counts.get(name, 0),
+                name,
+            )
+
+    def _log_ocr_passes(
+        self,
+        app_args: AppArgs,
+        run_metrics: metrics.RunMetrics,
+    ) -> None:
+        """Log how often each OCR pass found the question number.
+
+        Args:
+            app_args: The application arguments.
+            run_metrics: The run metrics.
+        """
+        if not app_args.fast_ocr_options:
+            return
+        counters = run_metrics.to_dict()["counters"]
+        for name, passes, hits in [
+            ("fast", metrics.COUNTER_OCR_FAST, metrics.COUNTER_OCR_FAST_HITS),
+            ("full", metrics.COUNTER_OCR_FULL, metrics.COUNTER_OCR_FULL_HITS),
+        ]:
+            count = counters.get(passes, 0)
+            logger.info(
+                "The %s OCR pass found the question number "
+                "for %s of %s image file(s) (%.0f%%).",
+                name,
+                counters.get(hits, 0),
+                count,
+                counters.get(hits, 0) / count * 100 if count else 0,
+            )
+
+    def _input_dirs(self, app_args: AppArgs) -> list[pathlib.Path]:
+        """Get the input directories.
+
+        Args:
+            app_args: The application arguments.
+
+        Returns:
+            The paths to the input directories.
+        """
+        return app_args.input_dirs or [app_args.input_dir]
+
+    def _finish(self, context: _RunContext) -> None:
+        """Stop the OCR workers and release the helpers.
+
+        Args:
+            context: The run context.
+        """
+        context.executor.shutdown(wait=True, cancel_futures=True)
+        context.ocr_helper.close()
+        context.sheets_writer.close()
+        if context.manifest_db:
+            context.manifest_db.close()
+        if context.run_journal:
+            context.run_journal.close()
+        if context.dir_index:
+            context.dir_index.save()
+
+    def _write_metrics(
+        self,
+        app_args: AppArgs,
+        run_metrics: metrics.RunMetrics,
+    ) -> None:
+        """Write the run metrics to the metrics file, if there is one.
+
+        Args:
+            app_args: The application arguments.
+            run_metrics: The run metrics.
+        """
+        if not app_args.metrics_file:
+            return
+        run_metrics.write(app_args.metrics_file, app_args.metrics_format)
+        logger.info("Wrote run metrics to '%s'.", app_args.metrics_file)
+
+    def _watch(
+        self,
+        context: _RunContext,
+        watchers: list[watch.DirectoryWatcher],
+    ) -> None:
+        """Process new screenshot images as they are saved, until stopped.
+
+        Args:
+            context: The run context.
+            watchers: The input directory watchers.
+        """
+        for watcher in watchers:
+            logger.info(
+                "Watching for screenshot images in '%s' using %s.",
+                watcher.directory,
+                "inotify" if watcher.uses_inotify else "polling",
+            )
+        # share the wait time between the input directories
+        timeout = 1.0 / len(watchers)
+        try:
+            while not self._stop_event.is_set():
+                images = []
+                for watcher in watchers:
+                    for file_path in watcher.wait(timeout=timeout):
+                        is_screenshot, found_date = (
+                            context.trivia_helper.get_screenshot_image_details(
+                                file_path
+                            )
+                        )
+                        if is_screenshot:
+                            images.append((file_path, found_date))
+
+                if images:
+                    self._process_images(context, images)
+                    self._write_metrics(context.app_args, context.run_metrics)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching for screenshot images.")
+
+    def _process_images(
+        self,
+        context: _RunContext,
+        images: typing.Iterable[tuple[pathlib.Path, datetime | None]],
+        *,
+        retry: bool = False,
+    ) -> None:
+        """Extract the text from images and update the spreadsheet.
+
+        Args:
+            context: The run context.
+            images: The image files and the date of each.
+            retry: Whether to retry the spreadsheet updates that did not succeed
+                in previous runs.
+        """
+        manifest_db = context.manifest_db
+
+        retries: dict[str, manifest.ManifestEntry] = {}
+        skipped: list[pathlib.Path] = []
+        sheet_ranges: dict[pathlib.Path, list[str]] = {}
+
+        if manifest_db:
+            if retry:
+                retries = {i.path: i for i in manifest_db.unfinished()}
+            images = self._filter_processed(
+                manifest_db,
+                context.router,
+                images,
+                retries,
+                skipped,
+                context.duplicate_finder,
+            )
+
+        try:
+            asyncio.run(self._run_pipeline(context, images, sheet_ranges))
+
+            # retry the spreadsheet updates that did not succeed previously
+            for entry in retries.values():
+                ranges = self._update_sheet(
+                    context.trivia_helper,
+                    entry.question_number,
+                    entry.question_points,
+                    entry.question_text,
+                    entry.sheet_date,
+                    context.router.spreadsheet_id(
+                        pathlib.Path(entry.path).name,
+                        count=True,
+                    ),
+                )
+                sheet_ranges[pathlib.Path(entry.path)] = ranges
+        finally:
+            # send the cell updates for the images that were processed
+            context.sheets_writer.flush()
+
+        context.skipped += len(skipped)
+        context.retried += len(retries)
+        if manifest_db:
+            self._record_sheet_status(
+                manifest_db,
+                context.sheets_writer,
+                context.router,
+                sheet_ranges,
+            )
+        if context.run_journal:
+            # the cell updates were sent, so the images do not need to be resumed
+            context.run_journal.advance_many(
+                [str(i) for i in sheet_ranges],
+                journal.JOURNAL_STAGE_DONE,
+            )
+
+    async def _run_pipeline(
+        self,
+        context: _RunContext,
+        images: typing.Iterable[tuple[pathlib.Path, datetime | None]],
+        sheet_ranges: dict[pathlib.Path, list[str]],
+    ) -> None:
+        """Run the images through the discover, OCR, parse, persist, and sheet stages.
+
+        The stages are connected by queues that hold at most `queue_size` images,
+        so OCR of one image overlaps with saving and updating the spreadsheet
+        for the images before it.
+        The parse and sheet stages handle the images in the order they were found.
+
+        Args:
+            context: The run context.
+            images: The image files and the date of each.
+            sheet_ranges: The ranges of the cells to update are added for each image.
+        """
+        app_args = context.app_args
+        loop = asyncio.get_running_loop()
+
+        ocr_queue: asyncio.Queue[typing.Any] = asyncio.Queue(app_args.queue_size)
+        parse_queue: asyncio.Queue[typing.Any] = asyncio.Queue(app_args.queue_size)
+        persist_queue: asyncio.Queue[typing.Any] = asyncio.Queue(app_args.queue_size)
+        sheet_queue: asyncio.Queue[typing.Any] = asyncio.Queue(app_args.queue_size)
+        parse_order = pipeline.Reorder()
+        sheet_order = pipeline.Reorder()
+
+        async def _discover() -> None:
+            iterator = iter(images)
+            index = 0
+            while True:
+                # finding images reads the directory, so run it in a thread
+                found = await asyncio.to_thread(self._next_image, context, iterator)
+                if found is None:
+                    break
+                image_file, found_date = found
+                await ocr_queue.put(
+                    pipeline.PipelineItem(index, image_file, found_date)
+                )
+                index += 1
+            await ocr_queue.put(pipeline.END)
+
+        async def _ocr(item: pipeline.PipelineItem) -> list[pipeline.PipelineItem]:
+            item.output_text = await loop.run_in_executor(
+                context.executor,
+                self._ocr_image,
+                context,
+                item,
+            )
+            return [item]
+
+        async def _parse(item: pipeline.PipelineItem) -> list[pipeline.PipelineItem]:
+            ready = parse_order.push(item)
+            for ready_item in ready:
+                self._parse_ready(context, ready_item)
+            return ready
+
+        async def _persist(item: pipeline.PipelineItem) -> list[pipeline.PipelineItem]:
+            # a copy of an earlier image is only recorded, so later runs skip it
+            persist = (
+                self._record_duplicate if item.duplicate_of else self._persist_item
+            )
+            await asyncio.to_thread(
+                self._run_timed,
+                context,
+                metrics.STAGE_PERSIST,
+                persist,
+                item,
+            )
+            return [item]
+
+        async def _sheet(item: pipeline.PipelineItem) -> list[pipeline.PipelineItem]:
+            ready = sheet_order.push(item)
+            # a copy of an earlier image has no cells to update
+            for ready_item in [i for i in ready if not i.duplicate_of]:
+                # sending a batch of updates waits for the network
+                await asyncio.to_thread(
+                    self._run_timed,
+                    context,
+                    metrics.STAGE_SHEET,
+                    self._update_sheet_item,
+                    ready_item,
+                )
+                sheet_ranges[ready_item.image_file] = ready_item.ranges
+            return []
+
+        await pipeline.run_stages(
+            [
+                _discover(),
+                pipeline.run_stage(app_args.workers, ocr_queue, parse_queue, _ocr),
+                pipeline.run_stage(1, parse_queue, persist_queue, _parse),
+                pipeline.run_stage(
+                    app_args.persist_workers,
+                    persist_queue,
+                    sheet_queue,
+                    _persist,
+                ),
+                pipeline.run_stage(1, sheet_queue, None, _sheet),
+            ],
+        )
+
+    def _next_image(
+        self,
+        context: _RunContext,
+        images: typing.Iterator[tuple[pathlib.Path, datetime | None]],
+    ) -> tuple[pathlib.Path, datetime | None] | None:
+        """Find the next image, recording the time taken.
+
+        Args:
+            context: The run context.
+            images: The image files and the date of each.
+
+        Returns:
+            The next image file and date, or None if there are no more images.
+        """
+        with context.run_metrics.time(metrics.STAGE_DISCOVER):
+            return next(images, None)
+
+    def _run_timed(
+        self,
+        context: _RunContext,
+        stage: str,
+        func: typing.Callable[[_RunContext, pipeline.PipelineItem], None],
+        item: pipeline.PipelineItem,
+    ) -> None:
+        """Run a stage for one image, recording the time taken.
+
+        Args:
+            context: The run context.
+            stage: The name of the stage.
+            func: The function that runs the stage.
+            item: The pipeline item.
+        """
+        with context.run_metrics.time(stage, item.image_file.name):
+            func(context, item)
+
+    def _build_ocr_cache(self, app_args: AppArgs) -> ocr_cache.OcrCache | None:
+        """Create the OCR text cache, if the cache is enabled.
+
+        Args:
+            app_args: The application arguments.
+
+        Returns:
+            The OCR text cache, or None if the cache is not used.
+        """
+        if not app_args.cache_dir:
+            return None
+
+        cache = ocr_cache.OcrCache(app_args.cache_dir / "ocr")
+        if app_args.clear_cache:
+            cache.clear()
+        if not app_args.use_cache:
+            return None
+        return cache
+
+    def _ocr_image(self, context: _RunContext, item: pipeline.PipelineItem) -> str:
+        """Get the text from an image, using the cached text if available.
+
+        The image file is read once.
+        The same content is hashed for the cache and manifest,
+        and sent to the OCR engine.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+
+        Returns:
+            The text from the image.
+            For the TSV output, the layout is set on the item,
+            and the text is built from the words with enough confidence.
+        """
+        run_metrics = context.run_metrics
+        image_file = item.image_file
+        with run_metrics.time(metrics.STAGE_OCR, image_file.name):
+            image_data = image_file.read_bytes()
+            run_metrics.add(metrics.COUNTER_BYTES_READ, len(image_data))
+            if (
+                context.cache
+                or context.manifest_db
+                or context.run_journal
+                or context.duplicate_finder
+            ):
+                item.content_hash = manifest.content_hash(image_data)
+            if context.duplicate_finder:
+                # copies are found using the content read for OCR,
+                # so the first copy to be read is kept
+                item.duplicate_of = context.duplicate_finder.check(
+                    len(image_data),
+                    item.content_hash,
+                    str(image_file),
+                )
+                if item.duplicate_of:
+                    return ""
+
+            # the image is prepared once, when the first pass needs it
+            prepare = functools.cache(
+                lambda: self._prepare_image(context, image_file, image_data),
+            )
+
+            fast_options = context.app_args.fast_ocr_options
+            if fast_options:
+                run_metrics.add(metrics.COUNTER_OCR_FAST)
+                output_text = self._ocr_pass(context, item, prepare, fast_options)
+                if self._has_question_number(context, item, output_text):
+                    run_metrics.add(metrics.COUNTER_OCR_FAST_HITS)
+                    return output_text
+                run_metrics.add(metrics.COUNTER_OCR_FULL)
+
+            output_text = self._ocr_pass(context, item, prepare, None)
+            if fast_options and self._has_question_number(context, item, output_text):
+                run_metrics.add(metrics.COUNTER_OCR_FULL_HITS)
+            return output_text
+
+    def _ocr_pass(
+        self,
+        context: _RunContext,
+        item: pipeline.PipelineItem,
+        prepare: typing.Callable[[], bytes],
+        options: ocr.TesseractOptions | None,
+    ) -> str:
+        """Get the text from an image using one set of tesseract settings.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+            prepare: Gets the image content to send to the OCR engine.
+            options: The tesseract settings, or None for the full pass settings.
+
+        Returns:
+            The text from the image.
+        """
+        cache = context.cache
+        if not cache:
+            output_text = self._run_ocr(context, item.image_file, prepare(), options)
+        else:
+            engine_id = context.engine_id
+            if options:
+                engine_id = f"{engine_id}|{options.options_id}"
+            key = cache.content_key(item.content_hash, engine_id)
+            cached_text = cache.get(key)
+            if cached_text is None:
+                output_text = self._run_ocr(
+                    context,
+                    item.image_file,
+                    prepare(),
+                    options,
+                )
+                cache.put(key, output_text)
+            else:
+                output_text = cached_text
+                context.run_metrics.add(metrics.COUNTER_CACHE_HITS)
+
+        app_args = context.app_args
+        if app_args.ocr_output != ocr.OCR_OUTPUT_TSV:
+            item.layout = None
+            return output_text
+
+        # the cache keeps the TSV, so the confidence can be changed later
+        item.layout = ocr_layout.parse_tsv(output_text)
+        return item.layout.text(app_args.min_confidence)
+
+    def _has_question_number(
+        self,
+        context: _RunContext,
+        item: pipeline.PipelineItem,
+        output_text: str,
+    ) -> bool:
+        """Check whether the question number can be found in the OCR output.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+            output_text: The text from the image.
+
+        Returns:
+            True if the question number was found, otherwise false.
+        """
+        trivia_helper = context.trivia_helper
+        if item.layout is not None:
+            details = trivia_helper.get_layout_details(
+                item.layout,
+                context.app_args.min_confidence,
+            )
+        else:
+            details = trivia_helper.get_text_details(output_text)
+        return details[0] is not None
+
+    def _prepare_image(
+        self,
+        context: _RunContext,
+        image_file: pathlib.Path,
+        image_data: bytes,
+    ) -> bytes:
+        """Prepare an image for the OCR engine.
+
+        Args:
+            context: The run context.
+            image_file: The path to the image file.
+            image_data: The content of the image file.
+
+        Returns:
+            The prepared image content, or the image content if not preprocessing.
+        """
+        preprocessor = context.preprocessor
+        if not preprocessor:
+            return image_data
+        # the prepared image is kept in memory, instead of a temporary file
+        with context.run_metrics.time(metrics.STAGE_PREPROCESS, image_file.name):
+            return preprocessor.process_bytes(image_data)
+
+    def _run_ocr(
+        self,
+        context: _RunContext,
+        image_file: pathlib.Path,
+        ocr_data: bytes,
+        options: ocr.TesseractOptions | None,
+    ) -> str:
+        """Run the OCR engine over an image.
+
+        Args:
+            context: The run context.
+            image_file: The path to the image file.
+            ocr_data: The image content to send to the OCR engine.
+            options: The tesseract settings, or None for the full pass settings.
+
+        Returns:
+            The text from the image.
+        """
+        run_metrics = context.run_metrics
+        run_metrics.add(metrics.COUNTER_OCR_RUNS)
+        run_metrics.add(metrics.COUNTER_OCR_INPUT_BYTES, len(ocr_data))
+        if isinstance(context.ocr_helper, ocr.OcrHelper):
+            run_metrics.add(metrics.COUNTER_SUBPROCESSES)
+        if options:
+            return context.ocr_helper.run(image_file, ocr_data, options) or ""
+        return context.ocr_helper.run(image_file, ocr_data) or ""
+
+    def _parse_item(self, context: _RunContext, item: pipeline.PipelineItem) -> None:
+        """Extract the question details from the text for one image.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+        """
+        context.count += 1
+        context.run_metrics.add(metrics.COUNTER_IMAGES)
+
+        # extract the question number
+        trivia_helper = context.trivia_helper
+        if item.layout is not None:
+            (
+                question_number,
+                question_points,
+                question_text,
+            ) = trivia_helper.get_layout_details(
+                item.layout,
+                context.app_args.min_confidence,
+            )
+        else:
+            (
+                question_number,
+                question_points,
+                question_text,
+            ) = trivia_helper.get_text_details(item.output_text)
+
+        if not question_points:
+            question_points = 1
+
+        # print the image file name and extracted question number
+        # and text to stdout
+        logger.info(
+            '"%s": Q%s) (%s points) "%s"',
+            item.image_file.name,
+            question_number,
+            question_points,
+            question_text,
+        )
+
+        item.question_number = question_number
+        item.question_points = question_points
+        item.question_text = question_text
+
+    def _persist_item(self, context: _RunContext, item: pipeline.PipelineItem) -> None:
+        """Move the image file and store the extracted text for one image.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+        """
+        app_args = context.app_args
+        image_file = item.image_file
+        output_dir = app_args.output_dir
+        output_name = pathlib.Path(item.output_name or image_file.name)
+        # the text file has the same name as the image file
+        output_text_file = (output_dir / output_name.stem).with_suffix(".txt")
+        moved_file = output_dir / output_name if app_args.move_images else None
+
+        run_journal = context.run_journal
+        if context.manifest_db or run_journal:
+            # record the file details before it is moved
+            item.entry = self._build_manifest_entry(
+                image_file,
+                item,
+                context.router.spreadsheet_id(image_file.name),
+            )
+        if run_journal and item.entry:
+            # the image is recorded on disk before any file is changed
+            run_journal.begin(
+                journal.JournalEntry(
+                    entry=item.entry,
+                    text_path=str(output_text_file),
+                    moved_path=str(moved_file) if moved_file else None,
+                ),
+            )
+
+        if moved_file:
+            # move the image file to the output dir
+            utils.move_file(image_file, moved_file)
+
+        # the text file is replaced in one step, so it is never partly written
+        utils.write_text_atomic(output_text_file, item.output_text)
+
+        if run_journal:
+            run_journal.advance(str(image_file), journal.JOURNAL_STAGE_SHEET)
+
+    def _output_name(self, context: _RunContext, item: pipeline.PipelineItem) -> str:
+        """Choose the name of the image file and text file in the output directory.
+
+        Images from several input directories can have the same file name.
+        The first image found keeps its name, and the others have the start
+        of their content hash added, so they do not replace each other.
+        The hash is always calculated when there are several input directories.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+
+        Returns:
+            The file name to use in the output directory.
+        """
+        image_file = item.image_file
+        claimed = context.output_names.setdefault(image_file.name, image_file)
+        if claimed == image_file:
+            return image_file.name
+
+        output_name = f"{image_file.stem}-{item.content_hash[:12]}{image_file.suffix}"
+        logger.warning(
+            'Using the name "%s" for "%s", as "%s" has the same name.',
+            output_name,
+            image_file,
+            claimed,
+        )
+        context.output_names[output_name] = image_file
+        return output_name
+
+    def _record_duplicate(
+        self,
+        context: _RunContext,
+        item: pipeline.PipelineItem,
+    ) -> None:
+        """Record an image that has the same content as an earlier image.
+
+        The image is not moved and no text file is saved.
+        The manifest entry has the content hash of the earlier image,
+        so later runs skip the image, even after the earlier image was moved.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+        """
+        if not context.manifest_db:
+            return
+        entry = self._build_manifest_entry(
+            item.image_file,
+            item,
+            context.router.spreadsheet_id(item.image_file.name),
+        )
+        entry.sheet_status = manifest.SHEET_STATUS_DUPLICATE
+        context.manifest_db.put(entry)
+
+    def _update_sheet_item(
+        self,
+        context: _RunContext,
+        item: pipeline.PipelineItem,
+    ) -> None:
+        """Update the spreadsheet cells and the manifest for one image.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+        """
+        # update the spreadsheet cell with the text
+        item.ranges = self._update_sheet(
+            context.trivia_helper,
+            item.question_number,
+            item.question_points,
+            item.question_text,
+            item.found_date,
+            context.router.spreadsheet_id(item.image_file.name, count=True),
+        )
+
+        entry = item.entry
+        if context.manifest_db and entry:
+            if not item.ranges:
+                entry.sheet_status = manifest.SHEET_STATUS_SKIPPED
+            context.manifest_db.put(entry)
+
+    def _update_sheet(  # noqa: PLR0913
+        self,
+        trivia_helper: trivia.TriviaHelper,
+        question_number: int | None,
+        question_points: int | None,
+        question_text: str,
+        found_date: datetime | None,
+        spreadsheet_id: str,
+    ) -> list[str]:
+        """Update the spreadsheet cells for a question.
+
+        Args:
+            trivia_helper: The trivia helper.
+            question_number: The question number.
+            question_points: The question points.
+            question_text: The question text.
+            found_date: The date used to find the sheet.
+            spreadsheet_id: The spreadsheet to update.
+
+        Returns:
+            The ranges of the cells to update.
+        """
+        update_result = None
+        ranges = []
+        if question_number:
+            update_result = trivia_helper.update_trivia_cell(
+                question_number,
+                question_points or 1,
+                question_text,
+                sheet_date=found_date,
+                spreadsheet_id=spreadsheet_id,
+            )
+            ranges = [
+                google_sheets.cell_range_notation(sheet_name, col, row)
+                for sheet_name, col, row, _ in trivia_helper.get_trivia_cells(
+                    question_number,
+                    question_points or 1,
+                    question_text,
+                    sheet_date=found_date,
+                )
+            ]
+
+        if not update_result:
+            logger.warning("Could not update spreadsheet.")
+
+        return ranges
+
+    def _filter_processed(  # noqa: PLR0913
+        self,
+        manifest_db: manifest.Manifest,
+        router: routing.SpreadsheetRouter,
+        images: typing.Iterable[tuple[pathlib.Path, datetime | None]],
+        retries: dict[str, manifest.ManifestEntry],
+        skipped: list[pathlib.Path],
+        duplicate_finder: duplicates.DuplicateFinder | None = None,
+    ) -> typing.Iterator[tuple[pathlib.Path, datetime | None]]:
+        """Skip the images that have not changed since they were sent.
+
+        Images that were sent to a different spreadsheet,
+        such as after changing the spreadsheet id or routes, are processed again.
+        Images that are new or changed are not retried,
+        as they will be processed again.
+
+        Args:
+            manifest_db: The manifest of processed images.
+            router: Chooses the spreadsheet for each image.
+            images: The image files and the date of each.
+            retries: The manifest entries with spreadsheet updates to retry.
+            skipped: The skipped image files are added to this list.
+            duplicate_finder: The skipped images are added,
+                so copies of them are also skipped.
+
+        Returns:
+            An iterator of the image files that need to be processed.
+        """
+        for image_file, found_date in images:
+            entry = manifest_db.get(image_file)
+            if (
+                entry
+                and entry.spreadsheet_id == router.spreadsheet_id(image_file.name)
+                and manifest_db.is_unchanged(entry, image_file, image_file.stat())
+            ):
+                skipped.append(image_file)
+                if duplicate_finder:
+                    duplicate_finder.add(entry.size, entry.content_hash, entry.path)
+                continue
+
+            retries.pop(str(image_file), None)
+            yield image_file, found_date
+
+    def _parse_ready(
+        self,
+        context: _RunContext,
+        item: pipeline.PipelineItem,
+    ) -> None:
+        """Parse an image, or skip it if it has the same content as an earlier image.
+
+        Args:
+            context: The run context.
+            item: The pipeline item.
+        """
+        if not item.duplicate_of:
+            item.output_name = self._output_name(context, item)
+            self._run_timed(context, metrics.STAGE_PARSE, self._parse_item, item)
+            return
+
+        logger.info(
+            'Skipping "%s", it has the same content as "%s".',
+            item.image_file,
+            item.duplicate_of,
+        )
+        context.duplicate_count += 1
+        context.run_metrics.add(metrics.COUNTER_DUPLICATES)
+
+    def _build_manifest_entry(
+        self,
+        image_file: pathlib.Path,
+        item: pipeline.PipelineItem,
+        spreadsheet_id: str,
+    ) -> manifest.ManifestEntry:
+        """Create the manifest entry for an image, before it is moved.
+
+        Args:
+            image_file: The path to the image file.
+            item: The pipeline item.
+            spreadsheet_id: The spreadsheet that the cells are sent to.
+
+        Returns:
+            The manifest entry.
+        """
+        stat = image_file.stat()
+        return manifest.ManifestEntry(
+            path=str(image_file),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            # the hash of the content read for OCR, so the file is not read again
+            content_hash=item.content_hash,
+            ocr_text=item.output_text,
+            question_number=item.question_number,
+            question_points=item.question_points,
+            question_text=item.question_text,
+            sheet_date=item.found_date,
+            sheet_status=manifest.SHEET_STATUS_PENDING,
+            spreadsheet_id=spreadsheet_id,
+        )
+
+    def _record_sheet_status(
+        self,
+        manifest_db: manifest.Manifest,
+        sheets_writer: google_sheets.SheetsBatchWriter,
+        router: routing.SpreadsheetRouter,
+        sheet_ranges: dict[pathlib.Path, list[str]],
+    ) -> None:
+        """Store whether the spreadsheet cells were updated for each image.
+
+        Args:
+            manifest_db: The manifest of processed images.
+            sheets_writer: The spreadsheet batch writer.
+            router: Chooses the spreadsheet that was updated for each image.
+            sheet_ranges: The ranges of the cells to update for each image.
+        """
+        for image_file, ranges in sheet_ranges.items():
+            if not ranges:
+                continue
+            spreadsheet_id = router.spreadsheet_id(image_file.name)
+            updated = all(
+                sheets_writer.range_results.get((spreadsheet_id, range_notation))
+                for range_notation in ranges
+            )
+            manifest_db.set_sheet_status(
+                image_file,
+                manifest.SHEET_STATUS_WRITTEN
+                if updated
+                else manifest.SHEET_STATUS_FAILED,
+                spreadsheet_id,
+            )
+
 
 class BuildAppArgs(TypedDict):
     """Type for build app args."""
 
     spreadsheet_id: str
     input_dir: pathlib.Path | None
+    input_dirs: list[pathlib.Path] | None
+    recursive: bool | None
     output_dir: pathlib.Path | None
     tesseract_exe: pathlib.Path | None
     tesseract_data: pathlib.Path | None
@@ -151,9 +1549,53 @@ class BuildAppArgs(TypedDict):
     google_token: pathlib.Path | None
     move_images: bool | None
     no_move_images: bool | None
+    workers: int | None
+    persist_workers: int | None
+    queue_size: int | None
+    ocr_backend: str | None
+    ocr_output: str | None
+    min_confidence: float | None
+    psm: int | None
+    oem: int | None
+    languages: str | None
+    whitelist: str | None
+    fast_pass: bool | None
+    fast_psm: int | None
+    fast_whitelist: str | None
+    cache_dir: pathlib.Path | None
+    use_cache: bool | None
+    clear_cache: bool | None
+    batch_size: int | None
+    batch_interval: float | None
+    check_sheets: bool | None
+    create_sheets: bool | None
+    sheet_template: str | None
+    skip_unchanged: bool | None
+    sink: str | None
+    sink_file: pathlib.Path | None
+    routes_file: pathlib.Path | None
+    sheets_requests_per_minute: float | None
+    sheets_max_retries: int | None
+    manifest_file: pathlib.Path | None
+    use_manifest: bool | None
+    journal_file: pathlib.Path | None
+    use_journal: bool | None
+    watch: bool | None
+    dir_index_file: pathlib.Path | None
+    use_dir_index: bool | None
+    metrics_file: pathlib.Path | None
+    metrics_format: str | None
+    preprocess: bool | None
+    preprocess_crop: str | None
+    preprocess_auto_crop: bool | None
+    preprocess_max_width: int | None
+    preprocess_binarize: bool | None
+    run_ocr: bool | None
 
 
-def build_app_args_with_defaults_from_args(**kwargs: Unpack[BuildAppArgs]) -> AppArgs:
+def build_app_args_with_defaults_from_args(  # noqa: C901, PLR0912, PLR0915
+    **kwargs: Unpack[BuildAppArgs],
+) -> AppArgs:
     """Build app arguments, using defaults for any that are missing.
 
     Args:
@@ -163,24 +1605,214 @@ def build_app_args_with_defaults_from_args(**kwargs: Unpack[BuildAppArgs]) -> Ap
         An `AppArgs` instance with defaults where required.
     """
     d = app_paths.DefaultPaths()
+    run_ocr = kwargs.get("run_ocr") is not False
     spreadsheet_id = kwargs.get("spreadsheet_id")
-    input_dir = kwargs.get("input_dir") or d.downloads_dir
+    input_dirs = list(kwargs.get("input_dirs") or [])
+    input_dir = (
+        kwargs.get("input_dir")
+        or (input_dirs[0] if input_dirs else None)
+        or d.downloads_dir
+    )
+    if input_dir and input_dir not in input_dirs:
+        input_dirs.insert(0, input_dir)
+    recursive = bool(kwargs.get("recursive"))
     output_dir = kwargs.get("output_dir") or d.documents_dir
-    tesseract_exe = kwargs.get("tesseract_exe") or d.tesseract_exe_file
-    tesseract_data = kwargs.get("tesseract_data") or d.tesseract_data_file
-    google_credentials = kwargs.get("google_credentials") or d.google_credentials_file
-    google_token = kwargs.get("google_token") or d.google_token_file
+    tesseract_exe = kwargs.get("tesseract_exe")
+    tesseract_data = kwargs.get("tesseract_data")
+    if run_ocr:
+        tesseract_exe = tesseract_exe or d.tesseract_exe_file
+        tesseract_data = tesseract_data or d.tesseract_data_file
+    else:
+        # the images and Tesseract are not needed when the saved text files are used
+        input_dir = input_dir or pathlib.Path()
+        tesseract_exe = tesseract_exe or pathlib.Path()
+        tesseract_data = tesseract_data or pathlib.Path()
+    sink = kwargs.get("sink") or sheet_sinks.SINK_GOOGLE
+    sink_file = kwargs.get("sink_file")
+    if sink == sheet_sinks.SINK_SQLITE and not sink_file and d.data_dir:
+        sink_file = d.data_dir / "spreadsheet.sqlite3"
+    use_google = sink == sheet_sinks.SINK_GOOGLE
+    routes_file = kwargs.get("routes_file")
+    routes = routing.load_routes(routes_file) if routes_file else []
+    google_credentials = kwargs.get("google_credentials")
+    google_token = kwargs.get("google_token")
+    if use_google:
+        google_credentials = google_credentials or d.google_credentials_file
+        google_token = google_token or d.google_token_file
+    else:
+        # the local sinks do not use Google
+        google_credentials = google_credentials or pathlib.Path()
+        google_token = google_token or pathlib.Path()
 
+    # the local sinks are used for dry runs and load tests,
+    # so by default they leave the images where they are
     move_images = kwargs.get("move_images")
     if move_images is None:
-        move_images = not kwargs.get("no_move_images", False)
+        move_images = use_google and not kwargs.get("no_move_images", False)
 
-    logger.info("Using input directory: '%s'.", input_dir)
+    # the local sinks keep their own records of the processed images,
+    # so they do not stop the images being sent to Google Sheets later
+    state_dir = d.data_dir
+    if state_dir and not use_google:
+        state_dir = state_dir / "sinks" / sink
+    # the memory sink is lost at the end of the run, so by default
+    # the images are not recorded as processed
+    use_records = sink != sheet_sinks.SINK_MEMORY
+
+    workers = kwargs.get("workers") or os.cpu_count() or 1
+    persist_workers = kwargs.get("persist_workers") or 1
+    queue_size = kwargs.get("queue_size") or workers * 2
+    ocr_backend = kwargs.get("ocr_backend") or ocr.OCR_BACKEND_SUBPROCESS
+    ocr_output = kwargs.get("ocr_output") or ocr.OCR_OUTPUT_TEXT
+    min_confidence = kwargs.get("min_confidence")
+    if min_confidence is None:
+        min_confidence = ocr_layout.DEFAULT_MIN_CONFIDENCE
+    psm = kwargs.get("psm")
+    oem = kwargs.get("oem")
+    languages = kwargs.get("languages") or None
+    ocr_options = ocr.TesseractOptions(
+        psm=psm,
+        oem=oem,
+        languages=languages,
+        whitelist=kwargs.get("whitelist") or None,
+    )
+    fast_ocr_options = None
+    if kwargs.get("fast_pass"):
+        fast_psm = kwargs.get("fast_psm")
+        # the fast pass loads the same languages and engine as the full pass
+        fast_ocr_options = ocr.TesseractOptions(
+            psm=ocr.DEFAULT_FAST_PSM if fast_psm is None else fast_psm,
+            oem=oem,
+            languages=languages,
+            whitelist=kwargs.get("fast_whitelist") or None,
+        )
+    cache_dir = kwargs.get("cache_dir") or d.cache_dir
+    use_cache = kwargs.get("use_cache")
+    if use_cache is None:
+        use_cache = True
+    clear_cache = bool(kwargs.get("clear_cache"))
+    batch_size = kwargs.get("batch_size") or 100
+    batch_interval = kwargs.get("batch_interval")
+    if batch_interval is None:
+        batch_interval = 30.0
+    check_sheets = kwargs.get("check_sheets")
+    if check_sheets is None:
+        check_sheets = True
+    # the local sinks start without sheets, so they add the dated sheets
+    create_sheets = bool(kwargs.get("create_sheets")) or (
+        not use_google and check_sheets
+    )
+    sheet_template = kwargs.get("sheet_template") or None
+    skip_unchanged = bool(kwargs.get("skip_unchanged"))
+    sheets_requests_per_minute = kwargs.get("sheets_requests_per_minute")
+    if sheets_requests_per_minute is None:
+        sheets_requests_per_minute = rate_limit.DEFAULT_REQUESTS_PER_MINUTE
+    sheets_max_retries = kwargs.get("sheets_max_retries")
+    if sheets_max_retries is None:
+        sheets_max_retries = rate_limit.DEFAULT_MAX_RETRIES
+    use_manifest = kwargs.get("use_manifest")
+    if use_manifest is None:
+        use_manifest = use_records
+    manifest_file = kwargs.get("manifest_file")
+    if not manifest_file and state_dir:
+        manifest_file = state_dir / "manifest.sqlite3"
+    use_journal = kwargs.get("use_journal")
+    if use_journal is None:
+        use_journal = use_records
+    journal_file = kwargs.get("journal_file")
+    if not journal_file and state_dir:
+        journal_file = state_dir / "journal.jsonl"
+    watch_input_dir = bool(kwargs.get("watch"))
+    use_dir_index = kwargs.get("use_dir_index")
+    if use_dir_index is None:
+        use_dir_index = use_records
+    dir_index_file = kwargs.get("dir_index_file")
+    if not dir_index_file and state_dir:
+        dir_index_file = state_dir / "directory_index.json"
+    metrics_file = kwargs.get("metrics_file")
+    metrics_format = kwargs.get("metrics_format") or metrics.METRICS_FORMAT_JSON
+
+    preprocess_options = None
+    if kwargs.get("preprocess"):
+        preprocess_crop = kwargs.get("preprocess_crop")
+        preprocess_auto_crop = kwargs.get("preprocess_auto_crop")
+        preprocess_max_width = kwargs.get("preprocess_max_width")
+        preprocess_binarize = kwargs.get("preprocess_binarize")
+        preprocess_options = preprocess.PreprocessOptions(
+            crop=preprocess.parse_crop(preprocess_crop) if preprocess_crop else None,
+            auto_crop=preprocess_auto_crop is not False,
+            max_width=preprocess.DEFAULT_MAX_WIDTH
+            if preprocess_max_width is None
+            else preprocess_max_width or None,
+            binarize=preprocess_binarize is not False,
+        )
+
+    if run_ocr:
+        for item in input_dirs:
+            logger.info("Using input directory: '%s'.", item)
+        if recursive:
+            logger.info("Looking for images in the input subdirectories.")
+        logger.info("Using Tesseract executable: '%s'.", tesseract_exe)
+        logger.info("Using Tesseract data: '%s'.", tesseract_data)
     logger.info("Using output directory: '%s'.", output_dir)
-    logger.info("Using Tesseract executable: '%s'.", tesseract_exe)
-    logger.info("Using Tesseract data: '%s'.", tesseract_data)
-    logger.info("Using Google credentials: '%s'.", google_credentials)
-    logger.info("Using Google token: '%s'.", google_token)
+    if use_google:
+        logger.info("Using Google credentials: '%s'.", google_credentials)
+        logger.info("Using Google token: '%s'.", google_token)
+    else:
+        logger.info("Using sheet sink: '%s'.", sink)
+    if sink == sheet_sinks.SINK_SQLITE:
+        logger.info("Using local spreadsheet file: '%s'.", sink_file)
+    if routes_file:
+        logger.info(
+            "Using routes file: '%s' with %s route(s).",
+            routes_file,
+            len(routes),
+        )
+    logger.info(
+        "Using %s OCR worker(s), %s persist worker(s), and queue size %s.",
+        workers,
+        persist_workers,
+        queue_size,
+    )
+    logger.info("Using OCR backend: '%s'.", ocr_backend)
+    if ocr_output == ocr.OCR_OUTPUT_TSV:
+        logger.info(
+            "Using OCR output '%s', keeping words with confidence of at least %s.",
+            ocr_output,
+            min_confidence,
+        )
+    if ocr_options != ocr.TesseractOptions():
+        logger.info("Using Tesseract settings: %s.", ocr_options.options_id)
+    if fast_ocr_options:
+        logger.info(
+            "Using a fast OCR pass first, with Tesseract settings: %s.",
+            fast_ocr_options.options_id,
+        )
+    if use_cache or clear_cache:
+        logger.info("Using cache directory: '%s'.", cache_dir)
+    if create_sheets:
+        logger.info(
+            "Adding missing sheets, using template: '%s'.",
+            sheet_template or "(blank sheet)",
+        )
+    if skip_unchanged:
+        logger.info("Skipping spreadsheet cell updates that do not change the value.")
+    if use_google:
+        logger.info(
+            "Sending up to %s Google Sheets request(s) each minute, with %s retries.",
+            sheets_requests_per_minute or "unlimited",
+            sheets_max_retries,
+        )
+    if use_manifest:
+        logger.info("Using manifest file: '%s'.", manifest_file)
+    if use_journal and run_ocr:
+        logger.info("Using journal file: '%s'.", journal_file)
+    if use_dir_index and run_ocr:
+        logger.info("Using directory index file: '%s'.", dir_index_file)
+    if metrics_file:
+        logger.info("Using metrics file: '%s' (%s).", metrics_file, metrics_format)
+    if preprocess_options:
+        logger.info("Using image preprocessing: %s.", preprocess_options.options_id)
 
     if not spreadsheet_id:
         msg = "Invalid spreadsheet_id."
@@ -203,15 +1835,101 @@ def build_app_args_with_defaults_from_args(**kwargs: Unpack[BuildAppArgs]) -> Ap
     if not google_token:
         msg = "Invalid google_token."
         raise ValueError(msg)
+    if workers < 1:
+        msg = "Invalid workers."
+        raise ValueError(msg)
+    if persist_workers < 1:
+        msg = "Invalid persist_workers."
+        raise ValueError(msg)
+    if queue_size < 1:
+        msg = "Invalid queue_size."
+        raise ValueError(msg)
+    if ocr_backend not in ocr.OCR_BACKENDS:
+        msg = "Invalid ocr_backend."
+        raise ValueError(msg)
+    if ocr_output not in ocr.OCR_OUTPUTS:
+        msg = "Invalid ocr_output."
+        raise ValueError(msg)
+    if not 0 <= min_confidence <= 100:  # noqa: PLR2004
+        msg = "Invalid min_confidence."
+        raise ValueError(msg)
+    if psm is not None and psm not in ocr.PSM_VALUES:
+        msg = "Invalid psm."
+        raise ValueError(msg)
+    if oem is not None and oem not in ocr.OEM_VALUES:
+        msg = "Invalid oem."
+        raise ValueError(msg)
+    if fast_ocr_options and fast_ocr_options.psm not in ocr.PSM_VALUES:
+        msg = "Invalid fast_psm."
+        raise ValueError(msg)
+    if batch_size < 1:
+        msg = "Invalid batch_size."
+        raise ValueError(msg)
+    if batch_interval < 0:
+        msg = "Invalid batch_interval."
+        raise ValueError(msg)
+    if sink not in sheet_sinks.SINKS:
+        msg = "Invalid sink."
+        raise ValueError(msg)
+    if sink == sheet_sinks.SINK_SQLITE and not sink_file:
+        msg = "Invalid sink_file."
+        raise ValueError(msg)
+    if sheets_requests_per_minute < 0:
+        msg = "Invalid sheets_requests_per_minute."
+        raise ValueError(msg)
+    if sheets_max_retries < 0:
+        msg = "Invalid sheets_max_retries."
+        raise ValueError(msg)
+    if create_sheets and not check_sheets:
+        msg = "Must check sheets to create sheets."
+        raise ValueError(msg)
+    if metrics_format not in metrics.METRICS_FORMATS:
+        msg = "Invalid metrics_format."
+        raise ValueError(msg)
 
     result = AppArgs(
         spreadsheet_id=spreadsheet_id,
         input_dir=input_dir,
+        input_dirs=input_dirs,
+        recursive=recursive,
         output_dir=output_dir,
         tesseract_exe=tesseract_exe,
         tesseract_data=tesseract_data,
         move_images=move_images,
         google_credentials=google_credentials,
         google_token=google_token,
+        workers=workers,
+        persist_workers=persist_workers,
+        queue_size=queue_size,
+        ocr_backend=ocr_backend,
+        ocr_output=ocr_output,
+        min_confidence=min_confidence,
+        ocr_options=ocr_options,
+        fast_ocr_options=fast_ocr_options,
+        cache_dir=cache_dir,
+        use_cache=use_cache,
+        clear_cache=clear_cache,
+        batch_size=batch_size,
+        batch_interval=batch_interval,
+        check_sheets=check_sheets,
+        create_sheets=create_sheets,
+        sheet_template=sheet_template,
+        skip_unchanged=skip_unchanged,
+        sink=sink,
+        sink_file=sink_file,
+        routes_file=routes_file,
+        routes=routes,
+        sheets_requests_per_minute=sheets_requests_per_minute,
+        sheets_max_retries=sheets_max_retries,
+        manifest_file=manifest_file,
+        use_manifest=use_manifest,
+        journal_file=journal_file,
+        use_journal=use_journal,
+        watch=watch_input_dir,
+        dir_index_file=dir_index_file,
+        use_dir_index=use_dir_index,
+        metrics_file=metrics_file,
+        metrics_format=metrics_format,
+        preprocess_options=preprocess_options,
     )
     return result
@@ -51,6 +51,26 @@ class DefaultPaths:
         result = self._platform_dirs.user_documents_path
         return self._get_path("Documents directory", "default user directories", result)
 
+    @functools.cached_property
+    def cache_dir(self) -> pathlib.Path | None:
+        """Get the cache directory.
+
+        Returns:
+            The cache directory, if known.
+        """
+        result = self._platform_dirs.user_cache_path
+        return self._get_path("cache directory", "default user cache directory", result)
+
+    @functools.cached_property
+    def data_dir(self) -> pathlib.Path | None:
+        """Get the data directory.
+
+        Returns:
+            The data directory, if known.
+        """
+        result = self._platform_dirs.user_data_path
+        return self._get_path("data directory", "default user data directory", result)
+
     @functools.cached_property
     def google_credentials_file(self) -> pathlib.Path | None:
         """Get the Google credentials file.
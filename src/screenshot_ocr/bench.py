@@ -0,0 +1,779 @@
+"""Measure the throughput and latency of the screenshot processing steps."""
+
+from __future__ import annotations
+
+import dataclasses
+import http.server
+import json
+import logging
+import math
+import os
+import pathlib
+import platform
+import struct
+import subprocess
+import sys
+import threading
+import time
+import typing
+import urllib.parse
+import zlib
+
+from datetime import datetime, timedelta, timezone
+
+from typing_extensions import Self
+
+from screenshot_ocr import (
+    directory_index,
+    google_sheets,
+    http_pool,
+    ocr,
+    rate_limit,
+    trivia,
+)
+from screenshot_ocr.__about__ import __version__
+
+
+try:
+    import resource
+except ImportError:  # no cov
+    # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+BENCH_DISCOVERY = "find_screenshot_images"
+"""Find the screenshot images in a directory."""
+
+BENCH_DISCOVERY_INDEXED = "find_screenshot_images_indexed"
+"""Find the screenshot images in a directory that is in the directory index."""
+
+BENCH_OCR = "ocr_run"
+"""Extract the text from an image."""
+
+BENCH_PARSE = "get_text_details"
+"""Parse the text extracted from an image."""
+
+BENCH_PARSE_DUMP = "get_text_details_dump"
+"""Parse large blocks of OCR text, measured in lines."""
+
+BENCH_SHEETS = "update_trivia_cell"
+"""Update the spreadsheet cells for a question."""
+
+BENCH_SHEETS_UNCHANGED = "update_trivia_cell_unchanged"
+"""Update the spreadsheet cells for a question, when the cells have the values."""
+
+_BENCH_SHEETS_BATCH = 15
+"""The number of questions to send in each batch of spreadsheet cell updates."""
+
+
+@dataclasses.dataclass
+class BenchArgs:
+    """Settings for a benchmark run."""
+
+    work_dir: pathlib.Path
+    """the directory to create the synthetic screenshot corpus in"""
+
+    image_count: int = 200
+    """the number of screenshot images in the corpus"""
+
+    other_count: int = 1000
+    """the number of other files in the corpus"""
+
+    discovery_repeat: int = 5
+    """the number of times to scan the corpus"""
+
+    ocr_count: int = 20
+    """the number of images to run OCR over"""
+
+    text_count: int = 10000
+    """the number of synthetic OCR texts to parse"""
+
+    dump_count: int = 20
+    """the number of large blocks of synthetic OCR text to parse"""
+
+    dump_questions: int = 500
+    """the number of questions in each large block of OCR text"""
+
+    question_count: int = 200
+    """the number of questions to send to the local spreadsheet server"""
+
+    sample_image: pathlib.Path | None = None
+    """an image to use for the screenshot images instead of a blank image"""
+
+    tesseract_exe: pathlib.Path | None = None
+    """the path to the Tesseract executable"""
+
+    tesseract_data: pathlib.Path | None = None
+    """the path to the Tesseract data directory"""
+
+    ocr_backend: str = ocr.OCR_BACKEND_SUBPROCESS
+    """the OCR backend to use"""
+
+    sheets_latency: float = 0.0
+    """the seconds the local spreadsheet server waits before each response"""
+
+
+@dataclasses.dataclass
+class BenchResult:
+    """The measurements for one benchmark."""
+
+    name: str
+    """the name of the benchmark"""
+
+    count: int
+    """the number of items that were processed"""
+
+    seconds: float
+    """the total time taken"""
+
+    per_second: float
+    """the number of items processed per second"""
+
+    p50_ms: float
+    """the median time for one call in milliseconds"""
+
+    p95_ms: float
+    """the 95th percentile time for one call in milliseconds"""
+
+    peak_rss_bytes: int | None
+    """the peak memory used by the process so far"""
+
+
+class FakeSheetsServer:
+    """A local HTTP server that accepts Google Sheets value updates.
+
+    Also provides the sheet titles and cell values, and adds sheets.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Create a new instance.
+
+        Args:
+            latency: The seconds to wait before each response.
+        """
+        self.latency = latency
+        """the seconds to wait before each response"""
+        self.values: dict[tuple[str, str], str] = {}
+        """the cell values, keyed by spreadsheet id and range"""
+        self.request_count = 0
+        """the number of requests received"""
+        self.sheet_titles: list[str] = []
+        """the titles of the sheets in every spreadsheet"""
+
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            self._build_handler(),
+        )
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """The base url of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> None:
+        """Start handling requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="fake-sheets-server",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop handling requests."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> Self:
+        """Start the server."""
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stop the server."""
+        self.stop()
+
+    def _update(self, ss_id: str, data: list[dict[str, typing.Any]]) -> list[int]:
+        """Store the values and return the number of cells updated for each range."""
+        counts = []
+        with self._lock:
+            self.request_count += 1
+            for item in data:
+                values = item.get("values") or [[]]
+                self.values[(ss_id, item["range"])] = values[0][0] if values[0] else ""
+                counts.append(sum(len(row) for row in values))
+        return counts
+
+    def _get_values(self, ss_id: str, ranges: list[str]) -> list[list[list[str]]]:
+        """Get the rows of values for each whole-column range, such as 'Sheet'!B:D."""
+        result = []
+        with self._lock:
+            self.request_count += 1
+            for value_range in ranges:
+                sheet_part, _, cols = value_range.rpartition("!")
+                first_col, _, last_col = cols.partition(":")
+                rows: dict[int, dict[int, str]] = {}
+                for (value_ss_id, cell), value in self.values.items():
+                    cell_sheet, _, cell_range = cell.rpartition("!")
+                    col = cell_range[0]
+                    if (
+                        value_ss_id != ss_id
+                        or cell_sheet != sheet_part
+                        or not first_col <= col <= last_col
+                    ):
+                        continue
+                    row = int(cell_range[1:].partition(":")[0])
+                    rows.setdefault(row, {})[ord(col) - ord(first_col)] = value
+                grid = []
+                for row in range(1, max(rows, default=0) + 1):
+                    row_values = rows.get(row, {})
+                    width = max(row_values, default=-1) + 1
+                    grid.append([row_values.get(col, "") for col in range(width)])
+                result.append(grid)
+        return result
+
+    def _add_sheets(self, requests: list[dict[str, typing.Any]]) -> list[str]:
+        """Add the sheets and return the titles."""
+        titles = []
+        with self._lock:
+            self.request_count += 1
+            for item in requests:
+                if "addSheet" in item:
+                    title = item["addSheet"]["properties"]["title"]
+                else:
+                    title = item["duplicateSheet"]["newSheetName"]
+                self.sheet_titles.append(title)
+                titles.append(title)
+        return titles
+
+    def _build_handler(self) -> type[http.server.BaseHTTPRequestHandler]:
+        server = self
+
+        class _Handler(http.server.BaseHTTPRequestHandler):
+            # keep the connection open and send small responses immediately
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_PUT(self) -> None:
+                # /v4/spreadsheets/{id}/values/{range}
+                parts = urllib.parse.urlparse(self.path).path.split("/")
+                ss_id = urllib.parse.unquote(parts[3])
+                body = self._read_body()
+                (count,) = server._update(ss_id, [body])  # noqa: SLF001
+                self._send_json(
+                    {
+                        "spreadsheetId": ss_id,
+                        "updatedRange": body["range"],
+                        "updatedCells": count,
+                    },
+                )
+
+            def do_GET(self) -> None:
+                url = urllib.parse.urlparse(self.path)
+                parts = url.path.split("/")
+                if len(parts) > 4 and parts[4] == "values:batchGet":  # noqa: PLR2004
+                    # /v4/spreadsheets/{id}/values:batchGet
+                    ss_id = urllib.parse.unquote(parts[3])
+                    ranges = urllib.parse.parse_qs(url.query).get("ranges") or []
+                    sheet_rows = server._get_values(ss_id, ranges)  # noqa: SLF001
+                    self._send_json(
+                        {
+                            "spreadsheetId": ss_id,
+                            "valueRanges": [
+                                {"range": value_range, "values": rows}
+                                for value_range, rows in zip(ranges, sheet_rows)
+                            ],
+                        },
+                    )
+                    return
+
+                # /v4/spreadsheets/{id}
+                with server._lock:  # noqa: SLF001
+                    server.request_count += 1
+                    titles = list(server.sheet_titles)
+                self._send_json(
+                    {
+                        "sheets": [
+                            {"properties": {"sheetId": index, "title": title}}
+                            for index, title in enumerate(titles)
+                        ],
+                    },
+                )
+
+            def do_POST(self) -> None:
+                # /v4/spreadsheets/{id}/values:batchUpdate
+                parts = urllib.parse.urlparse(self.path).path.split("/")
+                body = self._read_body()
+                if parts[3].endswith(":batchUpdate"):
+                    # /v4/spreadsheets/{id}:batchUpdate
+                    titles = server._add_sheets(body.get("requests") or [])  # noqa: SLF001
+                    self._send_json(
+                        {
+                            "replies": [
+                                {"addSheet": {"properties": {"title": title}}}
+                                for title in titles
+                            ],
+                        },
+                    )
+                    return
+
+                ss_id = urllib.parse.unquote(parts[3])
+                data = body.get("data") or []
+                counts = server._update(ss_id, data)  # noqa: SLF001
+                self._send_json(
+                    {
+                        "spreadsheetId": ss_id,
+                        "totalUpdatedCells": sum(counts),
+                        "responses": [
+                            {
+                                "spreadsheetId": ss_id,
+                                "updatedRange": item["range"],
+                                "updatedCells": count,
+                            }
+                            for item, count in zip(data, counts)
+                        ],
+                    },
+                )
+
+            def log_message(self, format: str, *args: typing.Any) -> None:  # noqa: A002
+                logger.debug("Fake sheets server: " + format, *args)  # noqa: G003
+
+            def _read_body(self) -> dict[str, typing.Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b"{}"
+                result: dict[str, typing.Any] = json.loads(raw)
+                return result
+
+            def _send_json(self, value: dict[str, typing.Any]) -> None:
+                if server.latency > 0:
+                    time.sleep(server.latency)
+                content = json.dumps(value).encode(encoding="UTF-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return _Handler
+
+
+class LocalSheetsHelper(google_sheets.GoogleSheetsHelper):
+    """A Google Sheets helper that sends requests to a local server."""
+
+    def __init__(self, endpoint: str) -> None:
+        """Create a new instance.
+
+        Args:
+            endpoint: The base url of the local server.
+        """
+        from googleapiclient import discovery  # noqa: PLC0415
+
+        # the local server does not need authorisation
+        self._client = discovery.build(
+            "sheets",
+            "v4",
+            http=http_pool.PooledHttp(),
+            static_discovery=True,
+            cache_discovery=False,
+            client_options={"api_endpoint": endpoint},
+        )
+        self._client_lock = threading.Lock()
+        self._spreadsheets_resource = None
+        self._values_resource = None
+        self._metadata_ttl = google_sheets.DEFAULT_METADATA_TTL
+        self._metadata_lock = threading.Lock()
+        self._sheet_metadata = {}
+        # the local server does not have a quota
+        self._init_requests(0, rate_limit.DEFAULT_MAX_RETRIES, None)
+
+
+def build_corpus(
+    directory: pathlib.Path,
+    image_count: int,
+    other_count: int,
+    sample_image: pathlib.Path | None = None,
+) -> list[pathlib.Path]:
+    """Create a directory of synthetic screenshot images and other files.
+
+    Args:
+        directory: The directory to create the files in.
+        image_count: The number of screenshot images to create.
+        other_count: The number of other files to create.
+        sample_image: An image to copy for the screenshot images.
+
+    Returns:
+        The paths to the screenshot images.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    image_data = sample_image.read_bytes() if sample_image else blank_png(800, 600)
+    start = datetime(2023, 6, 16, 18, 0, 0, tzinfo=timezone.utc)
+
+    images = []
+    for index in range(image_count):
+        taken = start + timedelta(days=index // 30, seconds=index * 37)
+        source = "Facebook" if index % 2 == 0 else "Isolation Trivia"
+        name = f"Screenshot {taken:%Y-%m-%d at %H-%M-%S} {source}.png"
+        path = directory / name
+        path.write_bytes(image_data)
+        images.append(path)
+
+    for index in range(other_count):
+        taken = start + timedelta(seconds=index * 53)
+        kind = index % 3
+        if kind == 0:
+            name = f"Screenshot {taken:%Y-%m-%d at %H-%M-%S} Other.png"
+        elif kind == 1:
+            name = f"Document {index}.pdf"
+        else:
+            name = f"Photo {index}.jpg"
+        (directory / name).write_bytes(b"\0" * 64)
+
+    # set the directory modified time to the past, so it can be indexed
+    past_ns = time.time_ns() - 60_000_000_000
+    os.utime(directory, ns=(past_ns, past_ns))
+
+    return sorted(images)
+
+
+def blank_png(width: int, height: int) -> bytes:
+    """Build a white greyscale PNG image.
+
+    Args:
+        width: The width in pixels.
+        height: The height in pixels.
+
+    Returns:
+        The PNG file content.
+    """
+
+    def _chunk(kind: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(kind + data) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    rows = (b"\0" + b"\xff" * width) * height
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(rows))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def build_question_text(index: int) -> str:
+    """Build text that looks like the OCR output for a screenshot.
+
+    Args:
+        index: Used to vary the question number, points, and text.
+
+    Returns:
+        The synthetic OCR text.
+    """
+    number = index % 29 + 1
+    points = ["one", "two", "three"][index % 3]
+    # the letter 'o' is a common OCR mistake for zero
+    number_text = str(number).replace("0", "o")
+    return "\n".join(
+        [
+            "Isolation Trivia",
+            "",
+            f"QUESTION {number_text}",
+            "",
+            f"For {points} points, which bird lays the largest eggs? (In",
+            f"terms of the size of a single egg) item {index}",
+            "",
+            "Like Reply Share",
+        ],
+    )
+
+
+def measure(
+    name: str,
+    items: typing.Iterable[typing.Any],
+    func: typing.Callable[[typing.Any], int],
+) -> BenchResult:
+    """Call a function for each item and measure the time taken.
+
+    Args:
+        name: The name of the benchmark.
+        items: The items to pass to the function.
+        func: The function to measure, which returns the number of items processed.
+
+    Returns:
+        The measurements.
+    """
+    latencies = []
+    count = 0
+    start = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        count += func(item)
+        latencies.append(time.perf_counter() - item_start)
+    seconds = time.perf_counter() - start
+
+    return BenchResult(
+        name=name,
+        count=count,
+        seconds=seconds,
+        per_second=count / seconds if seconds > 0 else 0.0,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p95_ms=percentile(latencies, 0.95) * 1000,
+        peak_rss_bytes=peak_rss_bytes(),
+    )
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Get the value at a percentile using the nearest rank.
+
+    Args:
+        values: The values.
+        fraction: The percentile as a fraction between 0 and 1.
+
+    Returns:
+        The value at the percentile, or 0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_bytes(*, children: bool = False) -> int | None:
+    """Get the peak resident memory size.
+
+    Args:
+        children: Get the peak for child processes instead of this process.
+
+    Returns:
+        The peak memory size in bytes, or None if it is not available.
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    max_rss = resource.getrusage(who).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return int(max_rss if sys.platform == "darwin" else max_rss * 1024)
+
+
+def run_benchmarks(bench_args: BenchArgs) -> dict[str, typing.Any]:
+    """Build a synthetic corpus and measure each processing step.
+
+    Args:
+        bench_args: The benchmark settings.
+
+    Returns:
+        The benchmark report.
+    """
+    corpus_dir = bench_args.work_dir / "corpus"
+    logger.info("Building synthetic corpus in '%s'.", corpus_dir)
+    images = build_corpus(
+        corpus_dir,
+        bench_args.image_count,
+        bench_args.other_count,
+        bench_args.sample_image,
+    )
+
+    results = []
+    with FakeSheetsServer(latency=bench_args.sheets_latency) as server:
+        trivia_helper = trivia.TriviaHelper(LocalSheetsHelper(server.url), "bench")
+
+        def _discover(_: int) -> int:
+            return sum(1 for _ in trivia_helper.find_screenshot_images(corpus_dir))
+
+        dir_index = directory_index.DirectoryIndex(
+            bench_args.work_dir / "directory_index.json",
+        )
+        # read the directory once to fill the index
+        _ = sum(1 for _ in trivia_helper.find_screenshot_images(corpus_dir, dir_index))
+
+        def _discover_indexed(_: int) -> int:
+            return sum(
+                1 for _ in trivia_helper.find_screenshot_images(corpus_dir, dir_index)
+            )
+
+        def _parse(text: str) -> int:
+            trivia_helper.get_text_details(text)
+            return 1
+
+        def _parse_dump(text: str) -> int:
+            trivia_helper.get_text_details(text)
+            return text.count("\n") + 1
+
+        sheet_date = datetime(2023, 6, 16, tzinfo=timezone.utc)
+
+        def _update(question: tuple[int, int, str]) -> int:
+            number, points, text = question
+            trivia_helper.update_trivia_cell(number, points, text, sheet_date)
+            return 1
+
+        results.append(
+            measure(BENCH_DISCOVERY, range(bench_args.discovery_repeat), _discover)
+        )
+        results.append(
+            measure(
+                BENCH_DISCOVERY_INDEXED,
+                range(bench_args.discovery_repeat),
+                _discover_indexed,
+            )
+        )
+
+        ocr_result = _measure_ocr(bench_args, images[: bench_args.ocr_count])
+        if ocr_result:
+            results.append(ocr_result)
+
+        texts = [build_question_text(index) for index in range(bench_args.text_count)]
+        results.append(measure(BENCH_PARSE, texts, _parse))
+
+        dumps = [
+            "\n".join(
+                build_question_text(index * bench_args.dump_questions + offset)
+                for offset in range(bench_args.dump_questions)
+            )
+            for index in range(bench_args.dump_count)
+        ]
+        results.append(measure(BENCH_PARSE_DUMP, dumps, _parse_dump))
+
+        questions = [
+            trivia_helper.get_text_details(build_question_text(index))
+            for index in range(bench_args.question_count)
+        ]
+        results.append(measure(BENCH_SHEETS, questions, _update))
+
+        # the cells were set by the previous benchmark
+        sheets_writer = google_sheets.SheetsBatchWriter(
+            LocalSheetsHelper(server.url),
+            flush_size=_BENCH_SHEETS_BATCH * 2,
+            skip_unchanged=True,
+        )
+        writer_helper = trivia.TriviaHelper(sheets_writer, "bench")
+
+        def _update_unchanged(batch: list[tuple[int, int, str]]) -> int:
+            for number, points, text in batch:
+                writer_helper.update_trivia_cell(number, points, text, sheet_date)
+            sheets_writer.flush()
+            return len(batch)
+
+        batches = [
+            questions[index : index + _BENCH_SHEETS_BATCH]
+            for index in range(0, len(questions), _BENCH_SHEETS_BATCH)
+        ]
+        results.append(measure(BENCH_SHEETS_UNCHANGED, batches, _update_unchanged))
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            key: str(value) if isinstance(value, pathlib.Path) else value
+            for key, value in dataclasses.asdict(bench_args).items()
+        },
+        "results": [dataclasses.asdict(result) for result in results],
+        "peak_rss_bytes": peak_rss_bytes(),
+        # only the OCR benchmark starts child processes
+        "peak_child_rss_bytes": peak_rss_bytes(children=True) if ocr_result else None,
+    }
+
+
+def _measure_ocr(
+    bench_args: BenchArgs,
+    images: list[pathlib.Path],
+) -> BenchResult | None:
+    """Measure running OCR over images, if Tesseract is available."""
+    if not images:
+        return None
+    if not bench_args.tesseract_exe or not bench_args.tesseract_data:
+        logger.warning("Skipping the OCR benchmark, Tesseract was not found.")
+        return None
+
+    ocr_helper = ocr.build_ocr_helper(
+        bench_args.ocr_backend,
+        bench_args.tesseract_exe,
+        bench_args.tesseract_data,
+    )
+
+    def _ocr(image: pathlib.Path) -> int:
+        # the same as a run, which reads the image once and sends it using stdin
+        ocr_helper.run(image, image.read_bytes())
+        return 1
+
+    try:
+        return measure(BENCH_OCR, images, _ocr)
+    except (OSError, subprocess.CalledProcessError) as error:
+        logger.warning("Skipping the OCR benchmark, Tesseract failed: %s", error)
+        return None
+    finally:
+        ocr_helper.close()
+
+
+def save_report(report: dict[str, typing.Any], path: pathlib.Path) -> None:
+    """Save a benchmark report as JSON.
+
+    Args:
+        report: The benchmark report.
+        path: The path to the JSON file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2), encoding="UTF-8")
+
+
+def load_report(path: pathlib.Path) -> dict[str, typing.Any]:
+    """Load a benchmark report saved as JSON.
+
+    Args:
+        path: The path to the JSON file.
+
+    Returns:
+        The benchmark report.
+    """
+    result: dict[str, typing.Any] = json.loads(path.read_text(encoding="UTF-8"))
+    return result
+
+
+def format_report(
+    report: dict[str, typing.Any],
+    baseline: dict[str, typing.Any] | None = None,
+) -> str:
+    """Format a benchmark report as a table.
+
+    Args:
+        report: The benchmark report.
+        baseline: An earlier report to compare the throughput against.
+
+    Returns:
+        The table of results.
+    """
+    baseline_rates = {
+        item["name"]: item["per_second"] for item in (baseline or {}).get("results", [])
+    }
+    lines = [
+        f"{'benchmark':<32} {'count':>8} {'per sec':>12} "
+        f"{'p50 ms':>10} {'p95 ms':>10} {'change':>8}",
+    ]
+    for item in report["results"]:
+        baseline_rate = baseline_rates.get(item["name"])
+        if baseline_rate:
+            change = f"{(item['per_second'] / baseline_rate - 1) * 100:+.1f}%"
+        else:
+            change = "-"
+        lines.append(
+            f"{item['name']:<32} {item['count']:>8} {item['per_second']:>12.1f} "
+            f"{item['p50_ms']:>10.3f} {item['p95_ms']:>10.3f} {change:>8}",
+        )
+
+    for key, label in [
+        ("peak_rss_bytes", "Peak memory"),
+        ("peak_child_rss_bytes", "Peak child process memory"),
+    ]:
+        value = report.get(key)
+        if value is not None:
+            lines.append(f"{label}: {value / (1024 * 1024):.1f} MiB")
+    return "\n".join(lines)
@@ -1,29 +1,102 @@
 """Command line definition."""
 
+from __future__ import annotations
+
 import logging
 import pathlib
+import tempfile
+import typing
 
 import click
 
-from screenshot_ocr import app, utils
+# the application and benchmark modules import the Google and OCR libraries,
+# so they are imported when a command runs, to keep --help and --version fast
+from screenshot_ocr import (
+    metrics,
+    ocr,
+    ocr_layout,
+    preprocess,
+    rate_limit,
+    sheet_sinks,
+    utils,
+)
 from screenshot_ocr.__about__ import __version__
 
+if typing.TYPE_CHECKING:
+    from screenshot_ocr import app
+
 overall_log_level = logging.DEBUG
 default_app_log_level = logging.DEBUG
 default_app_log_level_str = logging.getLevelName(default_app_log_level)
 default_app_log_level_lower = default_app_log_level_str.lower()
 
 
+class _SpreadsheetIdGroup(click.Group):
+    """A command group that allows the options after the spreadsheet id.
+
+    The arguments after the subcommand name are left for the subcommand,
+    so that options such as --help apply to the subcommand.
+    """
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        """Parse the arguments, stopping at the subcommand name.
+
+        Args:
+            ctx: The click context.
+            args: The command line arguments.
+
+        Returns:
+            The arguments that were not parsed.
+        """
+        value_opts = {
+            opt
+            for param in self.get_params(ctx)
+            if isinstance(param, click.Option) and not param.is_flag and not param.count
+            for opt in param.opts
+        }
+        positional_count = 0
+        is_value = False
+        for index, arg in enumerate(args):
+            if is_value:
+                is_value = False
+            elif arg == "--":
+                break
+            elif arg.startswith("-"):
+                is_value = arg in value_opts
+            elif positional_count == 0:
+                # the spreadsheet id
+                positional_count += 1
+            elif arg in self.commands:
+                # the remaining arguments are not options of this group
+                args = [*args[:index], "--", *args[index:]]
+                break
+        return super().parse_args(ctx, args)
+
+
 @click.group(
-    context_settings={"help_option_names": ["-h", "--help"]},
+    cls=_SpreadsheetIdGroup,
+    context_settings={
+        "help_option_names": ["-h", "--help"],
+        # allow the options after the spreadsheet id
+        "allow_interspersed_args": True,
+    },
     invoke_without_command=True,
 )
 @click.version_option(version=__version__, prog_name="Screenshot OCR")
 @click.argument("spreadsheet_id")
 @click.option(
     "--input-dir",
+    "input_dirs",
     type=pathlib.Path,
-    help="path to the folder containing the input images",
+    multiple=True,
+    help="path to the folder containing the input images, "
+    "can be given more than once",
+)
+@click.option(
+    "--recursive",
+    is_flag=True,
+    default=False,
+    help="also look for images in the subfolders of the input folders",
 )
 @click.option(
     "--output-dir",
@@ -42,8 +115,9 @@ default_app_log_level_lower = default_app_log_level_str.lower()
 )
 @click.option(
     "--move-images/--no-move-images",
-    default=True,
-    help="move image files to the output directory " "(default true)",
+    default=None,
+    help="move image files to the output directory "
+    "(default true, false for the local sinks)",
 )
 @click.option(
     "--google-credentials",
@@ -55,6 +129,257 @@ default_app_log_level_lower = default_app_log_level_str.lower()
     type=pathlib.Path,
     help="path to the file containing the current authorisation token data",
 )
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    help="number of images to run OCR over at the same time "
+    "(default the number of CPUs)",
+)
+@click.option(
+    "--persist-workers",
+    type=click.IntRange(min=1),
+    help="number of images to move and save text files for at the same time; "
+    "more than 1 may move images out of order (default 1)",
+)
+@click.option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    help="maximum number of images waiting between each processing stage "
+    "(default twice the number of workers)",
+)
+@click.option(
+    "--ocr-backend",
+    default=ocr.OCR_BACKEND_SUBPROCESS,
+    type=click.Choice(ocr.OCR_BACKENDS, case_sensitive=False),
+    help="run the Tesseract executable for each image (subprocess), "
+    "or load the Tesseract library once (library) (default subprocess)",
+)
+@click.option(
+    "--ocr-output",
+    default=ocr.OCR_OUTPUT_TEXT,
+    type=click.Choice(ocr.OCR_OUTPUTS, case_sensitive=False),
+    help="get the text (text), or the words with their position and confidence "
+    "to find the question line and leave out other screen text (tsv) (default text)",
+)
+@click.option(
+    "--min-confidence",
+    type=click.FloatRange(min=0, max=100),
+    default=ocr_layout.DEFAULT_MIN_CONFIDENCE,
+    help="the lowest confidence, from 0 to 100, of the words to keep "
+    "when using the tsv OCR output (default 60)",
+)
+@click.option(
+    "--psm",
+    type=click.IntRange(min=0, max=13),
+    help="the Tesseract page segmentation mode (default Tesseract default)",
+)
+@click.option(
+    "--oem",
+    type=click.IntRange(min=0, max=3),
+    help="the Tesseract OCR engine mode (default Tesseract default)",
+)
+@click.option(
+    "--languages",
+    help="the Tesseract languages to recognise, such as eng+fra (default eng)",
+)
+@click.option(
+    "--whitelist",
+    help="the only characters for Tesseract to recognise (default all characters)",
+)
+@click.option(
+    "--fast-pass/--no-fast-pass",
+    default=False,
+    help="run a fast OCR pass first, and only run the full pass "
+    "when the question number is not found (default false)",
+)
+@click.option(
+    "--fast-psm",
+    type=click.IntRange(min=0, max=13),
+    default=ocr.DEFAULT_FAST_PSM,
+    help="the Tesseract page segmentation mode of the fast pass "
+    "(default 6, a single block of text)",
+)
+@click.option(
+    "--fast-whitelist",
+    help="the only characters for Tesseract to recognise in the fast pass "
+    "(default all characters)",
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    default=True,
+    help="use cached text for images that have been processed before (default true)",
+)
+@click.option(
+    "--clear-cache",
+    is_flag=True,
+    default=False,
+    help="remove all cached text before processing images",
+)
+@click.option(
+    "--cache-dir",
+    type=pathlib.Path,
+    help="path to the folder that contains the cached text",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=100,
+    help="number of spreadsheet cell updates to send in one request (default 100)",
+)
+@click.option(
+    "--batch-interval",
+    type=click.FloatRange(min=0),
+    default=30.0,
+    help="maximum number of seconds to wait before sending spreadsheet cell updates "
+    "(default 30)",
+)
+@click.option(
+    "--check-sheets/--no-check-sheets",
+    default=True,
+    help="check that the dated sheets exist before sending cell updates, "
+    "so updates for missing sheets are not sent (default true)",
+)
+@click.option(
+    "--create-sheets",
+    is_flag=True,
+    default=False,
+    help="add the dated sheets that do not exist",
+)
+@click.option(
+    "--sheet-template",
+    help="title of the sheet to copy when adding a dated sheet "
+    "(default is a blank sheet)",
+)
+@click.option(
+    "--skip-unchanged/--no-skip-unchanged",
+    default=False,
+    help="read the current cell values and only send the cell updates "
+    "that change a value (default false)",
+)
+@click.option(
+    "--sink",
+    default=sheet_sinks.SINK_GOOGLE,
+    type=click.Choice(sheet_sinks.SINKS, case_sensitive=False),
+    help="where to send the spreadsheet cell updates: "
+    "the Google Docs spreadsheet, a local SQLite spreadsheet file, "
+    "or memory for a dry run (default google)",
+)
+@click.option(
+    "--sink-file",
+    type=pathlib.Path,
+    help="path to the local spreadsheet file used by the sqlite sink "
+    "(the local sinks keep their own manifest, journal, and directory index)",
+)
+@click.option(
+    "--routes-file",
+    type=pathlib.Path,
+    help="path to a JSON file of routes that send screenshots with file names "
+    "matching a pattern to another spreadsheet; "
+    "other screenshots use the spreadsheet id",
+)
+@click.option(
+    "--sheets-rate-limit",
+    "sheets_requests_per_minute",
+    type=click.FloatRange(min=0),
+    default=rate_limit.DEFAULT_REQUESTS_PER_MINUTE,
+    help="number of Google Sheets requests to send each minute, 0 for no limit "
+    f"(default {rate_limit.DEFAULT_REQUESTS_PER_MINUTE:g})",
+)
+@click.option(
+    "--sheets-retries",
+    "sheets_max_retries",
+    type=click.IntRange(min=0),
+    default=rate_limit.DEFAULT_MAX_RETRIES,
+    help="number of times to retry a Google Sheets request "
+    "that failed because of the rate limit or a server error "
+    f"(default {rate_limit.DEFAULT_MAX_RETRIES})",
+)
+@click.option(
+    "--manifest/--no-manifest",
+    "use_manifest",
+    default=None,
+    help="skip images that have not changed since they were processed, "
+    "and retry spreadsheet updates that did not succeed "
+    "(default true, false for the memory sink)",
+)
+@click.option(
+    "--manifest-file",
+    type=pathlib.Path,
+    help="path to the file that records the processed images",
+)
+@click.option(
+    "--journal/--no-journal",
+    "use_journal",
+    default=None,
+    help="record each image before moving it and saving its text, "
+    "so the next run finishes the images from a run that stopped part way "
+    "(default true, false for the memory sink)",
+)
+@click.option(
+    "--journal-file",
+    type=pathlib.Path,
+    help="path to the file that records the images being saved",
+)
+@click.option(
+    "--dir-index/--no-dir-index",
+    "use_dir_index",
+    default=None,
+    help="skip reading the input directory if it has not changed "
+    "since the last run (default true, false for the memory sink)",
+)
+@click.option(
+    "--dir-index-file",
+    type=pathlib.Path,
+    help="path to the file that records the screenshot files in the input directory",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    default=False,
+    help="keep running and process new images as they are saved to the input folder",
+)
+@click.option(
+    "--metrics-file",
+    type=pathlib.Path,
+    help="path to the file to write the time spent in each stage "
+    "and counts of work done",
+)
+@click.option(
+    "--metrics-format",
+    default=metrics.METRICS_FORMAT_JSON,
+    type=click.Choice(metrics.METRICS_FORMATS, case_sensitive=False),
+    help="the metrics file format: json, or prometheus for the node exporter "
+    "textfile collector (default json)",
+)
+@click.option(
+    "--preprocess/--no-preprocess",
+    default=False,
+    help="crop, shrink, and convert images to black and white before OCR; "
+    "requires the 'preprocess' extra (default false)",
+)
+@click.option(
+    "--preprocess-crop",
+    help="the question region to keep as 'left,top,right,bottom' pixel edges",
+)
+@click.option(
+    "--preprocess-auto-crop/--no-preprocess-auto-crop",
+    default=True,
+    help="remove blank margins around the text (default true)",
+)
+@click.option(
+    "--preprocess-max-width",
+    type=click.IntRange(min=0),
+    default=preprocess.DEFAULT_MAX_WIDTH,
+    help="scale down images wider than this many pixels, 0 to keep the size "
+    f"(default {preprocess.DEFAULT_MAX_WIDTH})",
+)
+@click.option(
+    "--preprocess-binarize/--no-preprocess-binarize",
+    default=True,
+    help="convert images to only black and white, "
+    "instead of shades of grey (default true)",
+)
 @click.option(
     "--log-level",
     default=default_app_log_level_lower,
@@ -64,15 +389,59 @@ default_app_log_level_lower = default_app_log_level_str.lower()
     ),
     help="the log level: debug, info, warning, error, critical",
 )
-def screenshot_ocr(
+@click.pass_context
+def screenshot_ocr(  # noqa: PLR0913
+    ctx,
     spreadsheet_id,
-    input_dir,
+    input_dirs,
+    recursive,
     output_dir,
     tesseract_exe,
     tesseract_data,
     move_images,
     google_credentials,
     google_token,
+    workers,
+    persist_workers,
+    queue_size,
+    ocr_backend,
+    ocr_output,
+    min_confidence,
+    psm,
+    oem,
+    languages,
+    whitelist,
+    fast_pass,
+    fast_psm,
+    fast_whitelist,
+    use_cache,
+    clear_cache,
+    cache_dir,
+    batch_size,
+    batch_interval,
+    check_sheets,
+    create_sheets,
+    sheet_template,
+    skip_unchanged,
+    sink,
+    sink_file,
+    routes_file,
+    sheets_requests_per_minute,
+    sheets_max_retries,
+    use_manifest,
+    manifest_file,
+    use_journal,
+    journal_file,
+    use_dir_index,
+    dir_index_file,
+    watch,
+    metrics_file,
+    metrics_format,
+    preprocess,
+    preprocess_crop,
+    preprocess_auto_crop,
+    preprocess_max_width,
+    preprocess_binarize,
     log_level,
 ):
     """The spreadsheet id is the Google Docs spreadsheet id."""
@@ -82,18 +451,63 @@ def screenshot_ocr(
         level=overall_log_level,
     )
 
+    from screenshot_ocr import app  # noqa: PLC0415
+
     app_instance = app.App()
 
     parsed_args = {
         "spreadsheet_id": spreadsheet_id,
-        "input_dir": input_dir,
+        "input_dirs": list(input_dirs),
+        "recursive": recursive,
         "output_dir": output_dir,
         "tesseract_exe": tesseract_exe,
         "tesseract_data": tesseract_data,
         "google_credentials": google_credentials,
         "google_token": google_token,
         "move_images": move_images,
-        "no_move_images": not move_images,
+        "no_move_images": move_images is False,
+        "workers": workers,
+        "persist_workers": persist_workers,
+        "queue_size": queue_size,
+        "ocr_backend": ocr_backend,
+        "ocr_output": ocr_output,
+        "min_confidence": min_confidence,
+        "psm": psm,
+        "oem": oem,
+        "languages": languages,
+        "whitelist": whitelist,
+        "fast_pass": fast_pass,
+        "fast_psm": fast_psm,
+        "fast_whitelist": fast_whitelist,
+        "use_cache": use_cache,
+        "clear_cache": clear_cache,
+        "cache_dir": cache_dir,
+        "batch_size": batch_size,
+        "batch_interval": batch_interval,
+        "check_sheets": check_sheets,
+        "create_sheets": create_sheets,
+        "sheet_template": sheet_template,
+        "skip_unchanged": skip_unchanged,
+        "sink": sink,
+        "sink_file": sink_file,
+        "routes_file": routes_file,
+        "sheets_requests_per_minute": sheets_requests_per_minute,
+        "sheets_max_retries": sheets_max_retries,
+        "use_manifest": use_manifest,
+        "manifest_file": manifest_file,
+        "use_journal": use_journal,
+        "journal_file": journal_file,
+        "use_dir_index": use_dir_index,
+        "dir_index_file": dir_index_file,
+        "watch": watch,
+        "metrics_file": metrics_file,
+        "metrics_format": metrics_format,
+        "preprocess": preprocess,
+        "preprocess_crop": preprocess_crop,
+        "preprocess_auto_crop": preprocess_auto_crop,
+        "preprocess_max_width": preprocess_max_width,
+        "preprocess_binarize": preprocess_binarize,
+        "run_ocr": ctx.invoked_subcommand is None,
         "log_level": log_level,
     }
 
@@ -105,6 +519,11 @@ def screenshot_ocr(
         ).upper()
         logging.getLogger().setLevel(selected_log_level)
 
+        if ctx.invoked_subcommand:
+            # the subcommand uses the same arguments
+            ctx.obj = app_args
+            return 0
+
         result = app_instance.run(app_args)
         if result is True:
             return 0
@@ -121,5 +540,169 @@ def screenshot_ocr(
         return 2
 
 
+@screenshot_ocr.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.pass_obj
+def resync(app_args: app.AppArgs | None) -> int:
+    """Update the spreadsheet from the text files in the output directory.
+
+    The images are not processed again, so Tesseract is not used.
+    """
+    if app_args is None:
+        # the arguments were not valid, the error has already been logged
+        return 1
+
+    from screenshot_ocr import app  # noqa: PLC0415
+
+    try:
+        result = app.App().resync(app_args)
+        if result is True:
+            return 0
+
+        return 1
+
+    except Exception as error:  # noqa: BLE001
+        # Catch broad exception to log error.
+        utils.log_exception(error)
+        return 2
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.version_option(version=__version__, prog_name="Screenshot OCR")
+@click.option(
+    "--images",
+    type=click.IntRange(min=0),
+    default=200,
+    help="number of synthetic screenshot images to create (default 200)",
+)
+@click.option(
+    "--other-files",
+    type=click.IntRange(min=0),
+    default=1000,
+    help="number of other files to create next to the images (default 1000)",
+)
+@click.option(
+    "--ocr-images",
+    type=click.IntRange(min=0),
+    default=20,
+    help="number of images to run OCR over (default 20)",
+)
+@click.option(
+    "--texts",
+    type=click.IntRange(min=0),
+    default=10000,
+    help="number of synthetic OCR texts to parse (default 10000)",
+)
+@click.option(
+    "--questions",
+    type=click.IntRange(min=0),
+    default=200,
+    help="number of questions to send to the local spreadsheet server "
+    "(default 200)",
+)
+@click.option(
+    "--sample-image",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    help="image to copy for the screenshot images (default a blank image)",
+)
+@click.option(
+    "--tesseract-exe",
+    type=pathlib.Path,
+    help="path to the Tesseract executable file",
+)
+@click.option(
+    "--tesseract-data",
+    type=pathlib.Path,
+    help="path to the Tesseract data directory",
+)
+@click.option(
+    "--ocr-backend",
+    default=ocr.OCR_BACKEND_SUBPROCESS,
+    type=click.Choice(ocr.OCR_BACKENDS, case_sensitive=False),
+    help="the OCR backend to measure (default subprocess)",
+)
+@click.option(
+    "--sheets-latency",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    help="seconds the local spreadsheet server waits before each response "
+    "(default 0)",
+)
+@click.option(
+    "--work-dir",
+    type=pathlib.Path,
+    help="path to the folder to create the synthetic files in "
+    "(default a temporary folder)",
+)
+@click.option(
+    "--output",
+    type=pathlib.Path,
+    help="path to the JSON file to save the results to",
+)
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    help="path to the JSON results of an earlier run to compare against",
+)
+@click.option(
+    "--log-level",
+    default="warning",
+    type=click.Choice(
+        sorted(["debug", "info", "warning", "error", "critical"]),
+        case_sensitive=False,
+    ),
+    help="the log level: debug, info, warning, error, critical",
+)
+def screenshot_ocr_bench(  # noqa: PLR0913
+    images: int,
+    other_files: int,
+    ocr_images: int,
+    texts: int,
+    questions: int,
+    sample_image: pathlib.Path | None,
+    tesseract_exe: pathlib.Path | None,
+    tesseract_data: pathlib.Path | None,
+    ocr_backend: str,
+    sheets_latency: float,
+    work_dir: pathlib.Path | None,
+    output: pathlib.Path | None,
+    compare: pathlib.Path | None,
+    log_level: str,
+) -> None:
+    """Measure the throughput and latency of the processing steps."""
+
+    logging.basicConfig(
+        format="%(asctime)s [%(levelname)-8s] %(message)s",
+        level=overall_log_level,
+    )
+    logging.getLogger().setLevel(log_level.upper())
+
+    from screenshot_ocr import app_paths, bench  # noqa: PLC0415
+
+    d = app_paths.DefaultPaths(allow_not_exist=True)
+
+    with tempfile.TemporaryDirectory(prefix="screenshot-ocr-bench-") as temp_dir:
+        bench_args = bench.BenchArgs(
+            work_dir=work_dir or pathlib.Path(temp_dir),
+            image_count=images,
+            other_count=other_files,
+            ocr_count=ocr_images,
+            text_count=texts,
+            question_count=questions,
+            sample_image=sample_image,
+            tesseract_exe=tesseract_exe or d.tesseract_exe_file,
+            tesseract_data=tesseract_data or d.tesseract_data_file,
+            ocr_backend=ocr_backend,
+            sheets_latency=sheets_latency,
+        )
+        report = bench.run_benchmarks(bench_args)
+
+    baseline = bench.load_report(compare) if compare else None
+    click.echo(bench.format_report(report, baseline))
+
+    if output:
+        bench.save_report(report, output)
+        click.echo(f"Saved results to '{output}'.")
+
+
 if __name__ == "__main__":
     screenshot_ocr()
@@ -0,0 +1,148 @@
+"""Record of the screenshot files found in each input directory."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import typing
+
+from screenshot_ocr import utils
+
+if typing.TYPE_CHECKING:
+    import os
+    import pathlib
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+"""The version of the index file, change this when the file name matching changes."""
+
+_RACY_NS = 2_000_000_000
+"""Directories modified this recently are not indexed.
+
+A change in the same clock tick as the scan would not change the modified time.
+"""
+
+
+class DirectoryIndex:
+    """Remembers the screenshot file and subdirectory names in each directory.
+
+    A directory that has the same inode and modified time as when it was scanned
+    contains the same files, so the names can be used without reading the directory.
+    The methods can be called from any thread.
+    """
+
+    def __init__(self, index_file: pathlib.Path) -> None:
+        """Create a new instance, reading the index file if it exists.
+
+        Args:
+            index_file: The path to the index file.
+        """
+        self._index_file = index_file
+        self._lock = threading.Lock()
+        self._directories: dict[str, dict[str, typing.Any]] = {}
+        self._changed = False
+
+        self.hits = 0
+        """the number of directories that were not read again"""
+        self.misses = 0
+        """the number of directories that were read"""
+
+        self._load()
+
+    def get(
+        self,
+        directory: pathlib.Path,
+        dir_stat: os.stat_result,
+    ) -> tuple[list[str], list[str]] | None:
+        """Get the names in a directory, if it has not changed.
+
+        Args:
+            directory: The path to the directory.
+            dir_stat: The current stat of the directory.
+
+        Returns:
+            The screenshot file names and subdirectory names,
+            or None if the directory needs to be read.
+        """
+        with self._lock:
+            entry = self._directories.get(str(directory))
+            if (
+                entry
+                and entry["inode"] == dir_stat.st_ino
+                and entry["mtime_ns"] == dir_stat.st_mtime_ns
+            ):
+                self.hits += 1
+                return list(entry["names"]), list(entry["dirs"])
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        directory: pathlib.Path,
+        dir_stat: os.stat_result,
+        names: list[str],
+        dirs: list[str],
+    ) -> None:
+        """Store the names found by reading a directory.
+
+        Args:
+            directory: The path to the directory.
+            dir_stat: The stat of the directory from before it was read.
+            names: The screenshot file names.
+            dirs: The subdirectory names.
+        """
+        key = str(directory)
+        with self._lock:
+            self._changed = True
+            if time.time_ns() - dir_stat.st_mtime_ns < _RACY_NS:
+                # the directory might change again without changing the modified time
+                self._directories.pop(key, None)
+                return
+            self._directories[key] = {
+                "inode": dir_stat.st_ino,
+                "mtime_ns": dir_stat.st_mtime_ns,
+                "names": names,
+                "dirs": dirs,
+            }
+
+    def save(self) -> None:
+        """Write the index file, if the index has changed.
+
+        The file is replaced in one step, so a reader never sees a partial file.
+        """
+        with self._lock:
+            if not self._changed:
+                return
+            content = json.dumps(
+                {"version": INDEX_VERSION, "directories": self._directories},
+            )
+            self._changed = False
+
+        self._index_file.parent.mkdir(parents=True, exist_ok=True)
+        # a lost index only means the directories are read again
+        utils.write_text_atomic(
+            self._index_file,
+            content,
+            encoding="UTF-8",
+            sync=False,
+        )
+
+    def _load(self) -> None:
+        """Read the index file, ignoring a missing, invalid, or old file."""
+        try:
+            values = json.loads(self._index_file.read_text(encoding="UTF-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            logger.warning(
+                "Could not read directory index '%s': %s", self._index_file, error
+            )
+            return
+
+        if not isinstance(values, dict) or values.get("version") != INDEX_VERSION:
+            logger.info("Not using old directory index '%s'.", self._index_file)
+            return
+        self._directories = values.get("directories") or {}
@@ -0,0 +1,52 @@
+"""Find screenshot images that have the same content as another image."""
+
+from __future__ import annotations
+
+import threading
+
+
+class DuplicateFinder:
+    """Remembers the content of the images seen in a run.
+
+    An image with the same size and content hash as an earlier image
+    is a duplicate, such as a screenshot copied to more than one input directory.
+    The methods can be called from any thread.
+    """
+
+    def __init__(self) -> None:
+        """Create a new instance."""
+        self._lock = threading.Lock()
+        self._seen: dict[tuple[int, str], str] = {}
+
+    def add(self, size: int, content_hash: str, path: str) -> None:
+        """Remember an image that was processed previously.
+
+        Args:
+            size: The size of the image file in bytes.
+            content_hash: The hash of the image file content.
+            path: The path to the image file.
+        """
+        with self._lock:
+            self._seen.setdefault((size, content_hash), path)
+
+    def check(self, size: int, content_hash: str, path: str) -> str | None:
+        """Check whether an image is a duplicate, and remember it if it is not.
+
+        The hash is the one calculated from the content read for OCR,
+        so the image file is not read again.
+
+        Args:
+            size: The size of the image file in bytes.
+            content_hash: The hash of the image file content.
+            path: The path to the image file.
+
+        Returns:
+            The path to the earlier image with the same content,
+            or None if the image is not a duplicate.
+        """
+        with self._lock:
+            original = self._seen.setdefault((size, content_hash), path)
+        if original == path:
+            # the same image file seen again, such as a changed file in watch mode
+            return None
+        return original
@@ -2,33 +2,74 @@
 
 from __future__ import annotations
 
+import contextlib
 import logging
-from typing import TYPE_CHECKING
+import threading
+import time
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
 
-from google.auth.transport import requests
-from google.oauth2 import credentials
-from google_auth_oauthlib import flow
-from googleapiclient import discovery, errors
+from googleapiclient import errors
+
+from screenshot_ocr import http_pool, metrics, rate_limit, utils
 
 if TYPE_CHECKING:
     import pathlib
 
+    from google.oauth2 import credentials
+    from googleapiclient import discovery
+
+    from screenshot_ocr import sheet_sinks
+
 logger = logging.getLogger(__name__)
 
+_RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+"""The HTTP status codes of errors that are likely to succeed if sent again."""
+
+_REQUEST_STATS_FIELDS = {
+    metrics.COUNTER_SHEETS_REQUESTS: "requests",
+    metrics.COUNTER_SHEETS_RETRIES: "retries",
+    metrics.COUNTER_SHEETS_FAILURES: "failures",
+    metrics.STAGE_SHEETS_THROTTLE: "throttle_seconds",
+    metrics.STAGE_SHEETS_BACKOFF: "backoff_seconds",
+}
+"""The request stats field for each metrics counter and stage."""
+
+DEFAULT_METADATA_TTL = 300.0
+"""The default number of seconds to use the sheet titles before getting them again."""
+
+_VALUES_FIRST_COL = "B"
+"""The first column of the trivia cells, which has the question text."""
+
+_VALUES_LAST_COL = "D"
+"""The last column of the trivia cells, which has the question points."""
+
 
 class GoogleSheetsHelper:
     """A helper that provides access to Google Sheets."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         credentials_file: pathlib.Path,
         token_file: pathlib.Path,
+        metadata_ttl: float = DEFAULT_METADATA_TTL,
+        *,
+        requests_per_minute: float = rate_limit.DEFAULT_REQUESTS_PER_MINUTE,
+        max_retries: int = rate_limit.DEFAULT_MAX_RETRIES,
+        run_metrics: metrics.RunMetrics | None = None,
     ) -> None:
         """Create a new Google Sheets Helper instance.
 
         Args:
             credentials_file: Path to the Google OAuth app client secrets file.
             token_file: Path to the current Google OAuth token file.
+            metadata_ttl: The number of seconds to use the sheet titles
+                before getting them again.
+            requests_per_minute: The number of requests to send each minute,
+                or 0 to not limit the rate.
+            max_retries: The number of times to retry a request
+                that failed with a retryable error.
+            run_metrics: Records the requests, retries, and time spent waiting.
         """
         if not credentials_file:
             msg = "Must provide path to credentials file."
@@ -48,13 +89,134 @@ class GoogleSheetsHelper:
         self._auth_token_file = token_file
 
         self._client = None
+        self._http: http_pool.PooledHttp | None = None
+        self._client_lock = threading.Lock()
+        self._spreadsheets_resource: Any = None
+        self._values_resource: Any = None
+        self._metadata_ttl = metadata_ttl
+        self._metadata_lock = threading.Lock()
+        # the time the sheet titles were retrieved and the sheet id for each title,
+        # keyed by spreadsheet id
+        self._sheet_metadata: dict[str, tuple[float, dict[str, int]]] = {}
+        self._init_requests(requests_per_minute, max_retries, run_metrics)
         self._scopes = [
             # "https://www.googleapis.com/auth/spreadsheets.readonly",
             "https://www.googleapis.com/auth/spreadsheets",
         ]
 
+    def _init_requests(
+        self,
+        requests_per_minute: float,
+        max_retries: int,
+        run_metrics: metrics.RunMetrics | None,
+    ) -> None:
+        """Set up the rate limit and retries for requests.
+
+        Args:
+            requests_per_minute: The number of requests to send each minute,
+                or 0 to not limit the rate.
+            max_retries: The number of times to retry a request.
+            run_metrics: Records the requests, retries, and time spent waiting.
+        """
+        self._rate_limiter = (
+            rate_limit.TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._backoff = rate_limit.Backoff(max_retries=max_retries)
+        self._run_metrics = run_metrics
+        self._stats_lock = threading.Lock()
+        self.request_stats = rate_limit.RequestStats()
+        """the number of requests and retries, and the time spent waiting"""
+
+    def _execute(self, request: Any) -> dict[str, Any]:
+        """Send a request, waiting for the rate limit and retrying errors.
+
+        Rate limit errors, server errors, and connection errors are retried,
+        waiting longer after each attempt.
+
+        Args:
+            request: The Google API request.
+
+        Returns:
+            The response.
+        """
+        attempt = 0
+        while True:
+            if self._rate_limiter:
+                throttled = self._rate_limiter.acquire()
+                if throttled > 0:
+                    self._record_wait(metrics.STAGE_SHEETS_THROTTLE, throttled)
+            self._count(metrics.COUNTER_SHEETS_REQUESTS)
+            try:
+                response: dict[str, Any] = request.execute()
+            except (errors.HttpError, ConnectionError, TimeoutError) as error:
+                status = _error_status(error)
+                retryable = status is None or status in _RETRY_STATUSES
+                if not retryable or attempt >= self._backoff.max_retries:
+                    if retryable:
+                        self._count(metrics.COUNTER_SHEETS_FAILURES)
+                    raise
+
+                delay = max(self._backoff.delay(attempt), _retry_after(error))
+                attempt += 1
+                logger.warning(
+                    "Retrying Google Sheets request in %.1fs (attempt %s of %s): %s",
+                    delay,
+                    attempt,
+                    self._backoff.max_retries,
+                    error,
+                )
+                self._count(metrics.COUNTER_SHEETS_RETRIES)
+                if self._rate_limiter and status == HTTPStatus.TOO_MANY_REQUESTS:
+                    # slow down the other requests as well
+                    self._rate_limiter.pause(delay)
+                time.sleep(delay)
+                self._record_wait(metrics.STAGE_SHEETS_BACKOFF, delay)
+            else:
+                return response
+
+    def _count(self, counter: str) -> None:
+        """Add one to a request counter.
+
+        Args:
+            counter: The name of the counter.
+        """
+        self._add_stat(counter, 1)
+        if self._run_metrics:
+            self._run_metrics.add(counter)
+
+    def _record_wait(self, stage: str, seconds: float) -> None:
+        """Record the time spent waiting to send a request.
+
+        Args:
+            stage: The name of the stage.
+            seconds: The number of seconds.
+        """
+        self._add_stat(stage, seconds)
+        if self._run_metrics:
+            self._run_metrics.record(stage, seconds)
+
+    def _add_stat(self, name: str, value: float) -> None:
+        """Add to one of the request stats.
+
+        Args:
+            name: The name of the counter or stage.
+            value: The amount to add.
+        """
+        field = _REQUEST_STATS_FIELDS[name]
+        with self._stats_lock:
+            setattr(
+                self.request_stats,
+                field,
+                getattr(self.request_stats, field) + value,
+            )
+
     def _authorise(self) -> credentials.Credentials | None:
         """Authorise access to the Google Sheets API."""
+        # the Google auth libraries take a while to import, and are only needed here
+        from google.auth.transport import requests  # noqa: PLC0415
+        from google.oauth2 import credentials  # noqa: PLC0415
+        from google_auth_oauthlib import flow  # noqa: PLC0415
+
         creds: credentials.Credentials | None = None
 
         # The file token.json stores the user's access and refresh tokens, and is
@@ -85,36 +247,197 @@ class GoogleSheetsHelper:
             if creds:
                 logger.info("Saving credentials to token.json file.")
                 creds_json = creds.to_json()  # type: ignore[no-untyped-call]
-                self._auth_token_file.write_text(creds_json)
+                utils.write_text_atomic(self._auth_token_file, creds_json)
 
         return creds
 
     def client(self) -> discovery.Resource | None:
         """Get the client."""
-        if self._client:
-            logger.debug("Using existing client.")
+        from googleapiclient import discovery  # noqa: PLC0415
+
+        with self._client_lock:
+            if self._client:
+                logger.debug("Using existing client.")
+                return self._client
+
+            creds = self._authorise()
+
+            try:
+                # The discovery document included in the library is used,
+                # so building the client does not need a network request.
+                # The transport keeps connections open and can be used by any thread.
+                self._http = http_pool.PooledHttp(creds)
+                self._client = discovery.build(
+                    "sheets",
+                    "v4",
+                    http=self._http,
+                    static_discovery=True,
+                    cache_discovery=False,
+                )
+
+                logger.info("Created new client.")
+            except errors.HttpError as error:
+                logger.exception(
+                    "Error: %s - %s",
+                    error.__class__.__name__,
+                    str(error),  # noqa:TRY401
+                )
+
             return self._client
 
-        creds = self._authorise()
+    def close(self) -> None:
+        """Close the open connections to Google Sheets."""
+        with self._client_lock:
+            http = self._http
+        if http:
+            http.close()
 
-        try:
-            # NOTE: Tried to use the MemoryCache,
-            # but the cache does not seem to be used?
-            # https://github.com/googleapis/google-api-python-client/issues/325#issuecomment-274349841
-            build_args = ["sheets", "v4"]
-            params = {"cache_discovery": False, "credentials": creds}
-
-            self._client = discovery.build(*build_args, **params)
-
-            logger.info("Created new client.")
-        except errors.HttpError as error:
-            logger.exception(
-                "Error: %s - %s",
-                error.__class__.__name__,
-                str(error),  # noqa:TRY401
-            )
+    def _spreadsheets(self) -> Any:
+        """Get the spreadsheets resource.
+
+        The resource is created once,
+        as creating it again for each request takes longer than building the request.
+
+        Returns:
+            The spreadsheets resource.
+        """
+        if self._spreadsheets_resource is None:
+            client = self.client()
+            if not client:
+                msg = "Client is not configured."
+                raise ValueError(msg)
+            # creating the resource twice in different threads is harmless
+            self._spreadsheets_resource = client.spreadsheets()
+        return self._spreadsheets_resource
+
+    def _values(self) -> Any:
+        """Get the spreadsheet values resource, which is created once.
+
+        Returns:
+            The spreadsheet values resource.
+        """
+        if self._values_resource is None:
+            self._values_resource = self._spreadsheets().values()
+        return self._values_resource
+
+    def get_sheet_titles(self, ss_id: str) -> dict[str, int]:
+        """Get the titles of the sheets in the spreadsheet.
+
+        The titles are retrieved once, and again after the metadata TTL has passed.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+
+        Returns:
+            The sheet id for each sheet title.
+        """
+        with self._metadata_lock:
+            cached = self._sheet_metadata.get(ss_id)
+            if cached and time.monotonic() - cached[0] < self._metadata_ttl:
+                return dict(cached[1])
+
+        # https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets/get
+        request = self._spreadsheets().get(
+            spreadsheetId=ss_id,
+            fields="sheets.properties(sheetId,title)",
+        )
+        logger.info('Getting the sheet titles in "%s".', ss_id)
+        response = self._execute(request)
+
+        titles = {
+            sheet["properties"]["title"]: sheet["properties"]["sheetId"]
+            for sheet in response.get("sheets") or []
+        }
+        with self._metadata_lock:
+            self._sheet_metadata[ss_id] = (time.monotonic(), titles)
+        return dict(titles)
 
-        return self._client
+    def create_sheets(
+        self,
+        ss_id: str,
+        titles: list[str],
+        template_title: str | None = None,
+    ) -> list[str]:
+        """Add sheets to the spreadsheet using one request.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            titles: The titles of the sheets to add.
+            template_title: The title of a sheet to copy,
+                or None to add blank sheets.
+
+        Returns:
+            The titles of the sheets that were added.
+        """
+        template_id = None
+        if template_title:
+            template_id = self.get_sheet_titles(ss_id).get(template_title)
+            if template_id is None:
+                logger.warning(
+                    'Template sheet "%s" does not exist, adding blank sheets.',
+                    template_title,
+                )
+
+        # https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets/batchUpdate
+        requests_body: list[dict[str, Any]]
+        if template_id is None:
+            requests_body = [{"addSheet": {"properties": {"title": i}}} for i in titles]
+        else:
+            requests_body = [
+                {"duplicateSheet": {"sourceSheetId": template_id, "newSheetName": i}}
+                for i in titles
+            ]
+        request = self._spreadsheets().batchUpdate(
+            spreadsheetId=ss_id,
+            body={"requests": requests_body},
+        )
+        logger.info('Adding %s sheet(s) to "%s".', len(titles), ss_id)
+        response = self._execute(request)
+
+        created = {}
+        for reply in response.get("replies") or []:
+            added = reply.get("addSheet") or reply.get("duplicateSheet") or {}
+            properties = added.get("properties") or {}
+            if "title" in properties:
+                created[properties["title"]] = properties.get("sheetId", 0)
+
+        with self._metadata_lock:
+            cached = self._sheet_metadata.get(ss_id)
+            if cached:
+                cached[1].update(created)
+        return list(created)
+
+    def get_spreadsheet_values(
+        self,
+        ss_id: str,
+        ranges: list[str],
+    ) -> list[list[list[str]]]:
+        """Get the displayed values of many ranges using one request.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            ranges: The ranges in A1 notation.
+
+        Returns:
+            The rows of values for each range, in the same order as the ranges.
+            The rows start at the first row of the range,
+            and empty cells at the end of a row or range are not included.
+        """
+        # https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets.values/batchGet
+        request = self._values().batchGet(
+            spreadsheetId=ss_id,
+            ranges=ranges,
+            majorDimension="ROWS",
+            valueRenderOption="FORMATTED_VALUE",
+        )
+        logger.info('Getting %s spreadsheet range(s) in "%s".', len(ranges), ss_id)
+        response = self._execute(request)
+
+        value_ranges = response.get("valueRanges") or []
+        return [
+            value_ranges[index].get("values") or [] if index < len(value_ranges) else []
+            for index in range(len(ranges))
+        ]
 
     def update_spreadsheet_cell(
         self,
@@ -139,37 +462,545 @@ class GoogleSheetsHelper:
         Returns:
             True if the update succeeded, otherwise false.
         """
-        client = self.client()
-        if not client:
-            msg = "Client is not configured."
-            raise ValueError(msg)
-
         # https://developers.google.com/resources/api-libraries/documentation/sheets/v4/python/latest/sheets_v4.spreadsheets.html
         # https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets.values/update
         value_input_option = "USER_ENTERED"
         major_dimension = "ROWS"
-        range_notation = f"'{sheet_name}'!{col}{row}:{col}{row}"
+        range_notation = cell_range_notation(sheet_name, col, row)
         body = {
             "range": range_notation,
             "majorDimension": major_dimension,
             "values": [[value]],
         }
         # TODO: consider using WrapStrategy WRAP?
-        request = (
-            client.spreadsheets()
-            .values()
-            .update(
-                spreadsheetId=ss_id,
-                range=range_notation,
-                valueInputOption=value_input_option,
-                body=body,
-                includeValuesInResponse=False,
-            )
+        request = self._values().update(
+            spreadsheetId=ss_id,
+            range=range_notation,
+            valueInputOption=value_input_option,
+            body=body,
+            includeValuesInResponse=False,
         )
 
         logger.info('Updating spreadsheet cell "%s" to "%s".', range_notation, value)
 
-        response = request.execute()
+        response = self._execute(request)
         if response.get("spreadsheetId") != ss_id:
             logger.warning("Unexpected response '%s'.", response)
         return True
+
+    def update_spreadsheet_cells(
+        self,
+        ss_id: str,
+        cells: list[tuple[str, str]],
+    ) -> dict[str, bool]:
+        """Update many cells in the spreadsheet using one request.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            cells: The range notation and value for each cell.
+
+        Returns:
+            Whether each range was updated, keyed by range notation.
+        """
+        # https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets.values/batchUpdate
+        value_input_option = "USER_ENTERED"
+        major_dimension = "ROWS"
+        body = {
+            "valueInputOption": value_input_option,
+            "includeValuesInResponse": False,
+            "data": [
+                {
+                    "range": range_notation,
+                    "majorDimension": major_dimension,
+                    "values": [[value]],
+                }
+                for range_notation, value in cells
+            ],
+        }
+        request = self._values().batchUpdate(
+            spreadsheetId=ss_id,
+            body=body,
+        )
+
+        logger.info('Updating %s spreadsheet cell(s) in "%s".', len(cells), ss_id)
+
+        response = self._execute(request)
+        if response.get("spreadsheetId") != ss_id:
+            logger.warning("Unexpected response '%s'.", response)
+
+        # the responses are in the same order as the data
+        responses = response.get("responses") or []
+        results = {}
+        for index, (range_notation, _) in enumerate(cells):
+            range_response = responses[index] if index < len(responses) else {}
+            results[range_notation] = bool(range_response.get("updatedCells"))
+        return results
+
+
+class SheetsBatchWriter:
+    """Collects spreadsheet cell updates and sends them in batches.
+
+    Updates are grouped by spreadsheet.
+    They are sent when the number of updates reaches the flush size,
+    when the flush interval has passed since the last send,
+    or when `flush` is called.
+
+    When checking sheets, the updates for sheets that do not exist
+    are not sent, and are recorded as failed,
+    unless the missing sheets can be added.
+
+    When skipping unchanged cells, the current values of the trivia columns
+    of each sheet are read using one request,
+    and updates that would not change a cell are not sent.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        sheets_helper: sheet_sinks.SheetSink,
+        flush_size: int = 100,
+        flush_interval: float = 30.0,
+        run_metrics: metrics.RunMetrics | None = None,
+        *,
+        check_sheets: bool = False,
+        create_sheets: bool = False,
+        sheet_template: str | None = None,
+        skip_unchanged: bool = False,
+        values_ttl: float = DEFAULT_METADATA_TTL,
+    ) -> None:
+        """Create a new instance.
+
+        Args:
+            sheets_helper: The Google Sheets helper or other sheet sink
+                used to send the updates.
+            flush_size: Send the updates when there are this many.
+            flush_interval: Send the updates when this many seconds have passed.
+            run_metrics: Records the time taken by each request.
+            check_sheets: Whether to check that the sheets exist before
+                sending the updates.
+            create_sheets: Whether to add the sheets that do not exist.
+            sheet_template: The title of the sheet to copy when adding a sheet.
+            skip_unchanged: Whether to skip updates that would not change a cell.
+            values_ttl: The number of seconds to use the current cell values
+                before reading them again.
+        """
+        self._sheets_helper = sheets_helper
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._run_metrics = run_metrics
+        self._check_sheets = check_sheets
+        self._create_sheets = create_sheets
+        self._sheet_template = sheet_template
+        self._skip_unchanged = skip_unchanged
+        self._values_ttl = values_ttl
+
+        # the time the values were read and the value of each cell,
+        # keyed by spreadsheet id and sheet name
+        self._current: dict[tuple[str, str], tuple[float, dict[str, str]]] = {}
+
+        # the sheet name and value, keyed by spreadsheet id and range notation
+        self._pending: dict[str, dict[str, tuple[str, str]]] = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+
+        self.updated_count = 0
+        """the number of cells that were updated"""
+        self.failed_ranges: list[str] = []
+        """the ranges that could not be updated"""
+        self.range_results: dict[tuple[str, str], bool] = {}
+        """whether each range was updated, keyed by spreadsheet id and range"""
+        self.missing_sheets: set[str] = set()
+        """the titles of the sheets that do not exist"""
+        self.unchanged_count = 0
+        """the number of updates that were not sent because the cell had the value"""
+
+    def update_spreadsheet_cell(
+        self,
+        ss_id: str,
+        sheet_name: str,
+        col: str,
+        row: str,
+        value: str,
+    ) -> bool:
+        """Add an update for the given cell in the spreadsheet.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            sheet_name: The name of the sheet.
+            col: The column identifier.
+            row: The row identifier.
+            value: Set the cell to this value.
+
+        Returns:
+            True if the update was added,
+            or the result of sending the updates if they were sent.
+        """
+        range_notation = cell_range_notation(sheet_name, col, row)
+        ss_pending = self._pending.setdefault(ss_id, {})
+        if range_notation not in ss_pending:
+            self._pending_count += 1
+        # a later update to the same cell replaces the earlier update
+        ss_pending[range_notation] = (sheet_name, value)
+
+        elapsed = time.monotonic() - self._last_flush
+        if self._pending_count >= self._flush_size or elapsed >= self._flush_interval:
+            return all(self.flush().values())
+        return True
+
+    def flush(self) -> dict[str, bool]:
+        """Send all pending updates.
+
+        Returns:
+            Whether each range was updated, keyed by range notation.
+        """
+        results: dict[str, bool] = {}
+        pending = self._pending
+        self._pending = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+
+        for ss_id, ss_pending in pending.items():
+            results.update(self._flush_spreadsheet(ss_id, ss_pending))
+
+        return results
+
+    def close(self) -> None:
+        """Close the sheet sink.
+
+        Pending updates are not sent, so call `flush` first.
+        """
+        self._sheets_helper.close()
+
+    def _flush_spreadsheet(
+        self,
+        ss_id: str,
+        ss_pending: dict[str, tuple[str, str]],
+    ) -> dict[str, bool]:
+        """Send the pending updates for one spreadsheet.
+
+        An error that was still raised after retrying is logged,
+        and the updates are recorded as failed,
+        so the updates for the other spreadsheets are still sent.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            ss_pending: The sheet name and value, keyed by range notation.
+
+        Returns:
+            Whether each range was updated, keyed by range notation.
+        """
+        try:
+            return self._update_spreadsheet(ss_id, ss_pending)
+        except (errors.HttpError, ConnectionError, TimeoutError) as error:
+            logger.warning(
+                'Could not update %s spreadsheet cell(s) in "%s": %s',
+                len(ss_pending),
+                ss_id,
+                error,
+            )
+            ss_results = dict.fromkeys(ss_pending, False)
+            self._record_results(ss_id, ss_results)
+            return ss_results
+
+    def _update_spreadsheet(
+        self,
+        ss_id: str,
+        ss_pending: dict[str, tuple[str, str]],
+    ) -> dict[str, bool]:
+        """Check the sheets and cell values, then send the updates that are needed.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            ss_pending: The sheet name and value, keyed by range notation.
+
+        Returns:
+            Whether each range was updated, keyed by range notation.
+        """
+        results: dict[str, bool] = {}
+        missing = set()
+        if self._check_sheets:
+            missing = self._find_missing_sheets(ss_id, ss_pending)
+
+        current: dict[str, str] = {}
+        if self._skip_unchanged:
+            sheet_names = {i for i, _ in ss_pending.values()} - missing
+            current = self._current_values(ss_id, sheet_names)
+
+        cells = []
+        not_sent = {}
+        unchanged = 0
+        for range_notation, (sheet_name, value) in ss_pending.items():
+            if sheet_name in missing:
+                # the update would fail, so it is not sent
+                not_sent[range_notation] = False
+            elif current.get(range_notation) == value:
+                # the cell already has the value
+                self.range_results[(ss_id, range_notation)] = True
+                results[range_notation] = True
+                unchanged += 1
+            else:
+                cells.append((range_notation, value))
+        self._record_results(ss_id, not_sent)
+        results.update(not_sent)
+
+        if unchanged:
+            self.unchanged_count += unchanged
+            logger.info(
+                'Skipped %s unchanged spreadsheet cell(s) in "%s".',
+                unchanged,
+                ss_id,
+            )
+            if self._run_metrics:
+                self._run_metrics.add(metrics.COUNTER_SHEET_CELLS_UNCHANGED, unchanged)
+        if cells:
+            results.update(self._send(ss_id, ss_pending, cells))
+        return results
+
+    def _send(
+        self,
+        ss_id: str,
+        ss_pending: dict[str, tuple[str, str]],
+        cells: list[tuple[str, str]],
+    ) -> dict[str, bool]:
+        """Send cell updates to one spreadsheet.
+
+        An error that was still raised after retrying is logged,
+        and the updates are recorded as failed,
+        so the rest of the run can continue.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            ss_pending: The sheet name and value, keyed by range notation.
+            cells: The range notation and value for each cell to send.
+
+        Returns:
+            Whether each range was updated, keyed by range notation.
+        """
+        if self._run_metrics:
+            self._run_metrics.add(metrics.COUNTER_SHEET_CELLS, len(cells))
+        try:
+            with self._time(metrics.STAGE_SHEETS_API):
+                ss_results = self._sheets_helper.update_spreadsheet_cells(
+                    ss_id,
+                    cells,
+                )
+        except (errors.HttpError, ConnectionError, TimeoutError) as error:
+            logger.warning(
+                'Could not update %s spreadsheet cell(s) in "%s": %s',
+                len(cells),
+                ss_id,
+                error,
+            )
+            ss_results = {range_notation: False for range_notation, _ in cells}
+        self._record_results(ss_id, ss_results)
+
+        if self._skip_unchanged:
+            self._store_values(ss_id, ss_pending, ss_results)
+        return ss_results
+
+    def _current_values(self, ss_id: str, sheet_names: set[str]) -> dict[str, str]:
+        """Get the current value of the trivia cells in the sheets.
+
+        The values for the sheets that have not been read recently
+        are read using one request.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            sheet_names: The names of the sheets.
+
+        Returns:
+            The value of each cell, keyed by range notation.
+        """
+        now = time.monotonic()
+        to_read = sorted(
+            name
+            for name in sheet_names
+            if (ss_id, name) not in self._current
+            or now - self._current[(ss_id, name)][0] >= self._values_ttl
+        )
+        if to_read:
+            ranges = [
+                f"'{name}'!{_VALUES_FIRST_COL}:{_VALUES_LAST_COL}" for name in to_read
+            ]
+            try:
+                with self._time(metrics.STAGE_SHEETS_READ):
+                    sheet_rows = self._sheets_helper.get_spreadsheet_values(
+                        ss_id,
+                        ranges,
+                    )
+            except errors.HttpError as error:
+                logger.warning(
+                    "Could not read the current values of sheets %s: %s",
+                    to_read,
+                    error,
+                )
+                sheet_rows = []
+            for name, rows in zip(to_read, sheet_rows):
+                self._current[(ss_id, name)] = (now, _cell_values(name, rows))
+
+        current: dict[str, str] = {}
+        for name in sheet_names:
+            if (ss_id, name) in self._current:
+                current.update(self._current[(ss_id, name)][1])
+        return current
+
+    def _store_values(
+        self,
+        ss_id: str,
+        ss_pending: dict[str, tuple[str, str]],
+        ss_results: dict[str, bool],
+    ) -> None:
+        """Remember the values of the cells that were updated.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            ss_pending: The sheet name and value, keyed by range notation.
+            ss_results: Whether each range was updated, keyed by range notation.
+        """
+        for range_notation, updated in ss_results.items():
+            sheet_name, value = ss_pending[range_notation]
+            cached = self._current.get((ss_id, sheet_name))
+            if updated and cached:
+                cached[1][range_notation] = value
+
+    def _find_missing_sheets(
+        self,
+        ss_id: str,
+        ss_pending: dict[str, tuple[str, str]],
+    ) -> set[str]:
+        """Find the sheets that do not exist, adding them if enabled.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            ss_pending: The sheet name and value, keyed by range notation.
+
+        Returns:
+            The titles of the sheets that do not exist.
+        """
+        sheet_names = {sheet_name for sheet_name, _ in ss_pending.values()}
+        with self._time(metrics.STAGE_SHEETS_METADATA):
+            titles = self._sheets_helper.get_sheet_titles(ss_id)
+        missing = sheet_names - titles.keys()
+
+        if missing and self._create_sheets:
+            try:
+                with self._time(metrics.STAGE_SHEETS_METADATA):
+                    created = self._sheets_helper.create_sheets(
+                        ss_id,
+                        sorted(missing),
+                        self._sheet_template,
+                    )
+            except errors.HttpError as error:
+                logger.warning("Could not add sheets %s: %s", sorted(missing), error)
+                created = []
+            for title in created:
+                logger.info('Added sheet "%s".', title)
+            if self._run_metrics and created:
+                self._run_metrics.add(metrics.COUNTER_SHEETS_CREATED, len(created))
+            missing -= set(created)
+
+        for title in sorted(missing):
+            count = sum(1 for name, _ in ss_pending.values() if name == title)
+            logger.warning(
+                'Sheet "%s" does not exist, not updating %s cell(s).', title, count
+            )
+            if self._run_metrics:
+                self._run_metrics.add(metrics.COUNTER_SHEET_CELLS_MISSING, count)
+        self.missing_sheets.update(missing)
+        return missing
+
+    def _record_results(self, ss_id: str, ss_results: dict[str, bool]) -> None:
+        """Store whether each range was updated.
+
+        Args:
+            ss_id: The Google Spreadsheet id.
+            ss_results: Whether each range was updated, keyed by range notation.
+        """
+        for range_notation, result in ss_results.items():
+            self.range_results[(ss_id, range_notation)] = result
+            if result:
+                self.updated_count += 1
+            else:
+                self.failed_ranges.append(range_notation)
+                logger.warning(
+                    'Could not update spreadsheet cell "%s".', range_notation
+                )
+
+    def _time(self, stage: str) -> contextlib.AbstractContextManager[None]:
+        """Measure the time taken by a request, if there are run metrics.
+
+        Args:
+            stage: The name of the stage.
+
+        Returns:
+            A context manager.
+        """
+        if self._run_metrics:
+            return self._run_metrics.time(stage)
+        return contextlib.nullcontext()
+
+
+def _error_status(error: Exception) -> int | None:
+    """Get the HTTP status code of an error.
+
+    Args:
+        error: The error raised by a request.
+
+    Returns:
+        The status code, or None for a connection error.
+    """
+    if isinstance(error, errors.HttpError):
+        return int(error.resp.status)
+    return None
+
+
+def _retry_after(error: Exception) -> float:
+    """Get the number of seconds the server asked to wait before retrying.
+
+    Args:
+        error: The error raised by a request.
+
+    Returns:
+        The number of seconds, or 0 if the server did not say.
+    """
+    if not isinstance(error, errors.HttpError):
+        return 0.0
+    value = error.resp.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value else 0.0
+    except ValueError:
+        # the value can also be a date, which is not used
+        return 0.0
+
+
+def _cell_values(sheet_name: str, rows: list[list[str]]) -> dict[str, str]:
+    """Get the value of each cell in the trivia columns.
+
+    Args:
+        sheet_name: The name of the sheet.
+        rows: The rows of values, starting from row 1 of the first trivia column.
+
+    Returns:
+        The value of each cell, keyed by range notation.
+    """
+    first_col = ord(_VALUES_FIRST_COL)
+    return {
+        cell_range_notation(
+            sheet_name, chr(first_col + col_index), str(row_index)
+        ): str(value)
+        for row_index, row in enumerate(rows, start=1)
+        for col_index, value in enumerate(row)
+    }
+
+
+def cell_range_notation(sheet_name: str, col: str, row: str) -> str:
+    """Build the A1 notation for a single cell.
+
+    Args:
+        sheet_name: The name of the sheet.
+        col: The column identifier.
+        row: The row identifier.
+
+    Returns:
+        The range in A1 notation.
+    """
+    return f"'{sheet_name}'!{col}{row}:{col}{row}"
@@ -0,0 +1,111 @@
+"""A pool of HTTP connections that can be shared by threads."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    import httplib2
+
+    from google.auth import credentials as auth_credentials
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IDLE = 4
+"""The default number of idle transports to keep open."""
+
+
+class PooledHttp:
+    """An HTTP transport for the Google API client that can be used from any thread.
+
+    A single `httplib2.Http` must not be used by more than one thread at a time.
+    Each request borrows an idle transport from the pool, or creates one,
+    and returns it when the request is done.
+    The transports keep their connections open,
+    so later requests to the same host reuse the connection.
+    """
+
+    def __init__(
+        self,
+        credentials: auth_credentials.Credentials | None = None,
+        max_idle: int = DEFAULT_MAX_IDLE,
+        build_http: typing.Callable[[], httplib2.Http] | None = None,
+    ) -> None:
+        """Create a new instance.
+
+        Args:
+            credentials: The credentials to authorise each request,
+                or None to not authorise requests.
+            max_idle: The number of idle transports to keep open.
+            build_http: Creates a new transport,
+                defaults to the transport used by the Google API client.
+        """
+        self.credentials = credentials
+        """the credentials used to authorise requests"""
+        self._max_idle = max_idle
+        self._build_http = build_http
+        self._lock = threading.Lock()
+        self._idle: list[typing.Any] = []
+        self._created = 0
+
+    @property
+    def created_count(self) -> int:
+        """The number of transports created."""
+        return self._created
+
+    def request(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        """Send a request using an idle transport.
+
+        Args:
+            args: The positional arguments for `httplib2.Http.request`.
+            kwargs: The keyword arguments for `httplib2.Http.request`.
+
+        Returns:
+            The response and content.
+        """
+        transport = self._acquire()
+        try:
+            return transport.request(*args, **kwargs)
+        finally:
+            self._release(transport)
+
+    def close(self) -> None:
+        """Close the idle transports and their connections."""
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+        for transport in idle:
+            transport.close()
+
+    def _acquire(self) -> typing.Any:
+        """Get an idle transport, or create one."""
+        with self._lock:
+            if self._idle:
+                # the most recently used transport is the most likely to be connected
+                return self._idle.pop()
+            self._created += 1
+            created = self._created
+
+        logger.debug("Creating HTTP transport %s.", created)
+        if self._build_http:
+            transport = self._build_http()
+        else:
+            from googleapiclient import http as api_http  # noqa: PLC0415
+
+            transport = api_http.build_http()
+        if self.credentials is None:
+            return transport
+
+        import google_auth_httplib2  # noqa: PLC0415
+
+        return google_auth_httplib2.AuthorizedHttp(self.credentials, http=transport)
+
+    def _release(self, transport: typing.Any) -> None:
+        """Return a transport to the pool, or close it if the pool is full."""
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(transport)
+                return
+        transport.close()
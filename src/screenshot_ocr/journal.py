@@ -0,0 +1,262 @@
+"""Write-ahead journal of the images being saved, used to resume after a crash."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import threading
+import typing
+from datetime import datetime
+
+from screenshot_ocr import manifest, utils
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_STAGE_PERSIST = "persist"
+"""The image details are recorded, and the image is about to be moved and saved."""
+
+JOURNAL_STAGE_SHEET = "sheet"
+"""The image was moved and its text file saved, the cells are about to be sent."""
+
+JOURNAL_STAGE_DONE = "done"
+"""The spreadsheet cell updates were sent, so the image is finished."""
+
+
+@dataclasses.dataclass
+class JournalEntry:
+    """An image that has been started, and the last stage that was reached."""
+
+    entry: manifest.ManifestEntry
+    """the details of the image and the text extracted from it"""
+
+    text_path: str
+    """the path to the text file for the image"""
+
+    moved_path: str | None
+    """the path the image file is moved to, or None if it is not moved"""
+
+    stage: str = JOURNAL_STAGE_PERSIST
+    """the last stage that was started"""
+
+
+class Journal:
+    """An append-only file that records each stage before it changes any files.
+
+    Each image is recorded, and the record is written to disk,
+    before the image is moved or its text file is saved.
+    If the run stops part way, the images that were not finished
+    are resumed from the last recorded stage by the next run,
+    without running OCR again.
+
+    The file is emptied whenever every recorded image is finished.
+    """
+
+    def __init__(self, journal_file: pathlib.Path) -> None:
+        """Create a new instance.
+
+        Args:
+            journal_file: The path to the journal file.
+        """
+        journal_file.parent.mkdir(parents=True, exist_ok=True)
+        self._journal_file = journal_file
+        self._lock = threading.Lock()
+        self._unfinished: dict[str, JournalEntry] = {}
+        self._load()
+
+        # keep only the unfinished images, which also drops an incomplete record,
+        # so the records added by this run can be read
+        records = []
+        for journal_entry in self._unfinished.values():
+            records.append(_persist_record(journal_entry))
+            if journal_entry.stage != JOURNAL_STAGE_PERSIST:
+                records.append(
+                    {"path": journal_entry.entry.path, "stage": journal_entry.stage},
+                )
+        utils.write_text_atomic(
+            journal_file,
+            "".join(f"{json.dumps(i)}\n" for i in records),
+            encoding="UTF-8",
+        )
+        self._file = journal_file.open("a", encoding="UTF-8")
+
+    def unfinished(self) -> list[JournalEntry]:
+        """Get the images that were started but not finished.
+
+        Returns:
+            The unfinished journal entries, in the order they were started.
+        """
+        with self._lock:
+            return list(self._unfinished.values())
+
+    def begin(self, journal_entry: JournalEntry) -> None:
+        """Record an image before it is moved and its text file saved.
+
+        The record is written to disk before this method returns.
+
+        Args:
+            journal_entry: The journal entry.
+        """
+        with self._lock:
+            journal_entry.stage = JOURNAL_STAGE_PERSIST
+            self._unfinished[journal_entry.entry.path] = journal_entry
+            self._write([_persist_record(journal_entry)], sync=True)
+
+    def advance(self, path: str, stage: str) -> None:
+        """Record that an image reached a stage.
+
+        Args:
+            path: The path to the image file in the input directory.
+            stage: The stage.
+        """
+        self.advance_many([path], stage)
+
+    def advance_many(self, paths: list[str], stage: str) -> None:
+        """Record that several images reached a stage.
+
+        Finished images are written to disk before this method returns.
+
+        Args:
+            paths: The paths to the image files in the input directory.
+            stage: The stage.
+        """
+        with self._lock:
+            records = []
+            for path in paths:
+                journal_entry = self._unfinished.get(path)
+                if not journal_entry:
+                    continue
+                if stage == JOURNAL_STAGE_DONE:
+                    del self._unfinished[path]
+                else:
+                    journal_entry.stage = stage
+                records.append({"path": path, "stage": stage})
+            if not records:
+                return
+
+            if self._unfinished:
+                # a lost stage record only means that stage is repeated,
+                # so only the finished records need to be on disk
+                self._write(records, sync=stage == JOURNAL_STAGE_DONE)
+            else:
+                # nothing to resume, so the records are no longer needed
+                self._file.truncate(0)
+                self._file.flush()
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            self._file.close()
+
+    def _write(self, records: list[dict[str, typing.Any]], *, sync: bool) -> None:
+        """Append records to the journal file.
+
+        Args:
+            records: The records.
+            sync: Whether to wait until the records are written to disk.
+        """
+        self._file.write("".join(f"{json.dumps(i)}\n" for i in records))
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def _load(self) -> None:
+        """Read the unfinished images from the journal file.
+
+        A record that was only partly written stops the reading,
+        as it and anything after it were not written to disk.
+        """
+        try:
+            lines = self._journal_file.read_text(encoding="UTF-8").splitlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            if not self._load_record(line):
+                logger.warning(
+                    "Stopped reading the journal file '%s' at an incomplete record.",
+                    self._journal_file,
+                )
+                break
+
+        if self._unfinished:
+            logger.info(
+                "Found %s unfinished image file(s) in the journal.",
+                len(self._unfinished),
+            )
+
+    def _load_record(self, line: str) -> bool:
+        """Apply one record from the journal file.
+
+        Args:
+            line: The record as a line of JSON.
+
+        Returns:
+            True if the record was applied, False if it is incomplete.
+        """
+        try:
+            record = json.loads(line)
+            path = record["path"]
+            stage = record["stage"]
+            if stage == JOURNAL_STAGE_PERSIST:
+                self._unfinished[path] = _journal_entry(record)
+            elif stage == JOURNAL_STAGE_DONE:
+                self._unfinished.pop(path, None)
+            elif path in self._unfinished:
+                self._unfinished[path].stage = stage
+        except (ValueError, KeyError, TypeError):
+            return False
+        return True
+
+
+def _persist_record(journal_entry: JournalEntry) -> dict[str, typing.Any]:
+    """Build the persist stage record for a journal entry.
+
+    Args:
+        journal_entry: The journal entry.
+
+    Returns:
+        The record to write to the journal file.
+    """
+    entry = journal_entry.entry
+    return {
+        **dataclasses.asdict(entry),
+        "sheet_date": entry.sheet_date.isoformat() if entry.sheet_date else None,
+        "text_path": journal_entry.text_path,
+        "moved_path": journal_entry.moved_path,
+        "stage": JOURNAL_STAGE_PERSIST,
+    }
+
+
+def _journal_entry(record: dict[str, typing.Any]) -> JournalEntry:
+    """Build a journal entry from a persist stage record.
+
+    Args:
+        record: The record read from the journal file.
+
+    Returns:
+        The journal entry.
+    """
+    sheet_date = record["sheet_date"]
+    return JournalEntry(
+        entry=manifest.ManifestEntry(
+            path=record["path"],
+            size=record["size"],
+            mtime_ns=record["mtime_ns"],
+            content_hash=record["content_hash"],
+            ocr_text=record["ocr_text"],
+            question_number=record["question_number"],
+            question_points=record["question_points"],
+            question_text=record["question_text"],
+            sheet_date=datetime.fromisoformat(sheet_date) if sheet_date else None,
+            sheet_status=record["sheet_status"],
+            spreadsheet_id=record.get("spreadsheet_id", ""),
+        ),
+        text_path=record["text_path"],
+        moved_path=record["moved_path"],
+        stage=JOURNAL_STAGE_PERSIST,
+    )
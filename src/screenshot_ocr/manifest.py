@@ -0,0 +1,254 @@
+"""Record of the screenshots that have been processed."""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+import typing
+from datetime import datetime
+
+if typing.TYPE_CHECKING:
+    import os
+
+logger = logging.getLogger(__name__)
+
+SHEET_STATUS_PENDING = "pending"
+"""The spreadsheet cells have not been updated yet."""
+
+SHEET_STATUS_WRITTEN = "written"
+"""The spreadsheet cells were updated."""
+
+SHEET_STATUS_FAILED = "failed"
+"""The spreadsheet cells could not be updated."""
+
+SHEET_STATUS_SKIPPED = "skipped"
+"""There was no question number, so there are no spreadsheet cells to update."""
+
+SHEET_STATUS_DUPLICATE = "duplicate"
+"""The image has the same content as another image, so it was not processed."""
+
+
+@dataclasses.dataclass
+class ManifestEntry:
+    """The details of a processed screenshot."""
+
+    path: str
+    """the path to the image file in the input directory"""
+
+    size: int
+    """the size of the image file in bytes"""
+
+    mtime_ns: int
+    """the modified time of the image file in nanoseconds"""
+
+    content_hash: str
+    """the SHA-256 hash of the image file content"""
+
+    ocr_text: str
+    """the text extracted from the image"""
+
+    question_number: int | None
+    """the question number"""
+
+    question_points: int | None
+    """the question points"""
+
+    question_text: str
+    """the question text"""
+
+    sheet_date: datetime | None
+    """the date used to find the sheet"""
+
+    sheet_status: str
+    """whether the spreadsheet cells were updated"""
+
+    spreadsheet_id: str = ""
+    """the spreadsheet that the cells are sent to"""
+
+
+class Manifest:
+    """A SQLite database that records the screenshots that have been processed."""
+
+    def __init__(self, db_file: pathlib.Path) -> None:
+        """Create a new instance.
+
+        Args:
+            db_file: The path to the SQLite database file.
+        """
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._db_file = db_file
+        # the manifest is used from the pipeline threads, one at a time
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS screenshots ("
+            "path TEXT PRIMARY KEY, "
+            "size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, "
+            "content_hash TEXT NOT NULL, "
+            "ocr_text TEXT NOT NULL, "
+            "question_number INTEGER, "
+            "question_points INTEGER, "
+            "question_text TEXT NOT NULL, "
+            "sheet_date TEXT, "
+            "sheet_status TEXT NOT NULL, "
+            "updated_at REAL NOT NULL, "
+            "spreadsheet_id TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(screenshots)")
+        }
+        if "spreadsheet_id" not in columns:
+            # the manifests from earlier versions did not record the spreadsheet,
+            # so those images are sent again
+            self._conn.execute(
+                "ALTER TABLE screenshots "
+                "ADD COLUMN spreadsheet_id TEXT NOT NULL DEFAULT ''",
+            )
+        self._conn.commit()
+
+    def get(self, image_file: pathlib.Path) -> ManifestEntry | None:
+        """Get the entry for an image file.
+
+        Args:
+            image_file: The path to the image file.
+
+        Returns:
+            The entry, or None if the image file has not been processed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, ocr_text, "
+                "question_number, question_points, question_text, "
+                "sheet_date, sheet_status, spreadsheet_id "
+                "FROM screenshots WHERE path = ?",
+                (str(image_file),),
+            ).fetchone()
+        if not row:
+            return None
+
+        values = list(row)
+        values[8] = datetime.fromisoformat(values[8]) if values[8] else None
+        return ManifestEntry(*values)
+
+    def put(self, entry: ManifestEntry) -> None:
+        """Add or replace the entry for an image file.
+
+        Args:
+            entry: The entry.
+        """
+        sheet_date = entry.sheet_date.isoformat() if entry.sheet_date else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO screenshots ("
+                "path, size, mtime_ns, content_hash, ocr_text, "
+                "question_number, question_points, question_text, "
+                "sheet_date, sheet_status, updated_at, spreadsheet_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.path,
+                    entry.size,
+                    entry.mtime_ns,
+                    entry.content_hash,
+                    entry.ocr_text,
+                    entry.question_number,
+                    entry.question_points,
+                    entry.question_text,
+                    sheet_date,
+                    entry.sheet_status,
+                    time.time(),
+                    entry.spreadsheet_id,
+                ),
+            )
+            self._conn.commit()
+
+    def unfinished(self) -> list[ManifestEntry]:
+        """Get the entries where the spreadsheet cells have not been updated.
+
+        Returns:
+            The entries with a pending or failed spreadsheet update status.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM screenshots WHERE sheet_status IN (?, ?) "
+                "ORDER BY path",
+                (SHEET_STATUS_PENDING, SHEET_STATUS_FAILED),
+            ).fetchall()
+        entries = [self.get(pathlib.Path(row[0])) for row in rows]
+        return [entry for entry in entries if entry]
+
+    def set_sheet_status(
+        self,
+        image_file: pathlib.Path,
+        sheet_status: str,
+        spreadsheet_id: str | None = None,
+    ) -> None:
+        """Change the spreadsheet update status for an image file.
+
+        Args:
+            image_file: The path to the image file.
+            sheet_status: The spreadsheet update status.
+            spreadsheet_id: The spreadsheet the cells were sent to,
+                or None to keep the recorded spreadsheet.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE screenshots SET sheet_status = ?, updated_at = ?, "
+                "spreadsheet_id = COALESCE(?, spreadsheet_id) "
+                "WHERE path = ?",
+                (sheet_status, time.time(), spreadsheet_id, str(image_file)),
+            )
+            self._conn.commit()
+
+    def is_unchanged(
+        self,
+        entry: ManifestEntry,
+        image_file: pathlib.Path,
+        stat: os.stat_result,
+    ) -> bool:
+        """Check whether an image file is the same as when it was processed.
+
+        The size and modified time are compared first.
+        If they differ, the content hash is compared,
+        and the entry is updated if the content is the same.
+
+        Args:
+            entry: The entry for the image file.
+            image_file: The path to the image file.
+            stat: The stat result for the image file.
+
+        Returns:
+            True if the image file content has not changed.
+        """
+        if entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            return True
+        if entry.size != stat.st_size:
+            return False
+        if content_hash(image_file.read_bytes()) != entry.content_hash:
+            return False
+
+        entry.mtime_ns = stat.st_mtime_ns
+        self.put(entry)
+        return True
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def content_hash(data: bytes) -> str:
+    """Calculate the hash of image file content.
+
+    Args:
+        data: The image file content.
+
+    Returns:
+        The SHA-256 hash as hex.
+    """
+    return hashlib.sha256(data).hexdigest()
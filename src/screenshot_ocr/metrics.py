@@ -0,0 +1,375 @@
+"""Timings and counts for a run of the application."""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import json
+import threading
+import time
+import typing
+
+from screenshot_ocr import utils
+
+try:
+    import resource
+except ImportError:  # no cov
+    # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+METRICS_FORMAT_JSON = "json"
+"""Write the metrics as a JSON document."""
+
+METRICS_FORMAT_PROMETHEUS = "prometheus"
+"""Write the metrics in the Prometheus text format, for the node exporter."""
+
+METRICS_FORMATS = [METRICS_FORMAT_JSON, METRICS_FORMAT_PROMETHEUS]
+"""The available metrics file formats."""
+
+STAGE_DISCOVER = "discover"
+"""Finding the screenshot images."""
+
+STAGE_OCR = "ocr"
+"""Extracting the text from an image, including reading the cache."""
+
+STAGE_PREPROCESS = "preprocess"
+"""Preparing an image for OCR, which is part of the OCR stage."""
+
+STAGE_PARSE = "parse"
+"""Finding the question details in the text."""
+
+STAGE_PERSIST = "persist"
+"""Moving the image and saving the text file."""
+
+STAGE_SHEET = "sheet"
+"""Queueing the spreadsheet cell updates, which can send a batch."""
+
+STAGE_SHEETS_API = "sheets_api"
+"""Sending a batch of cell updates to the Google Sheets API."""
+
+STAGE_SHEETS_METADATA = "sheets_metadata"
+"""Getting the sheet titles or adding sheets using the Google Sheets API."""
+
+STAGE_SHEETS_READ = "sheets_read"
+"""Reading the current cell values using the Google Sheets API."""
+
+STAGE_SHEETS_THROTTLE = "sheets_throttle"
+"""Waiting for the Google Sheets request rate limit."""
+
+STAGE_SHEETS_BACKOFF = "sheets_backoff"
+"""Waiting before retrying a failed Google Sheets request."""
+
+COUNTER_IMAGES = "images"
+"""The number of images processed."""
+
+COUNTER_OCR_RUNS = "ocr_runs"
+"""The number of times the OCR engine was run."""
+
+COUNTER_SUBPROCESSES = "subprocesses"
+"""The number of Tesseract processes started."""
+
+COUNTER_BYTES_READ = "bytes_read"
+"""The number of bytes of image files read by the application."""
+
+COUNTER_OCR_INPUT_BYTES = "ocr_input_bytes"
+"""The number of bytes of image files given to the OCR engine."""
+
+COUNTER_DUPLICATES = "duplicates"
+"""The number of images skipped because another image has the same content."""
+
+COUNTER_CACHE_HITS = "ocr_cache_hits"
+"""The number of images with cached text."""
+
+COUNTER_OCR_FAST = "ocr_fast_images"
+"""The number of images given to the fast OCR pass."""
+
+COUNTER_OCR_FAST_HITS = "ocr_fast_hits"
+"""The number of images with a question number found by the fast OCR pass."""
+
+COUNTER_OCR_FULL = "ocr_full_images"
+"""The number of images given to the full OCR pass after the fast pass."""
+
+COUNTER_OCR_FULL_HITS = "ocr_full_hits"
+"""The number of images with a question number found by the full OCR pass."""
+
+COUNTER_SHEET_CELLS_MISSING = "sheet_cells_missing_sheet"
+"""The number of spreadsheet cells not sent because the sheet does not exist."""
+
+COUNTER_SHEET_CELLS_UNCHANGED = "sheet_cells_unchanged"
+"""The number of spreadsheet cells not sent because they already had the value."""
+
+COUNTER_SHEETS_CREATED = "sheets_created"
+"""The number of sheets added to the spreadsheet."""
+
+COUNTER_TEXT_FILES = "text_files"
+"""The number of saved text files parsed again."""
+
+COUNTER_RESUMED = "images_resumed"
+"""The number of images finished from the journal of a run that stopped part way."""
+
+COUNTER_SHEET_CELLS = "sheet_cells"
+"""The number of spreadsheet cells sent to the Google Sheets API."""
+
+COUNTER_SHEETS_REQUESTS = "sheets_requests"
+"""The number of requests sent to the Google Sheets API, including retries."""
+
+COUNTER_SHEETS_RETRIES = "sheets_retries"
+"""The number of Google Sheets requests sent again after a retryable error."""
+
+COUNTER_SHEETS_FAILURES = "sheets_failures"
+"""The number of Google Sheets requests that still failed after retrying."""
+
+
+@dataclasses.dataclass
+class StageMetrics:
+    """The time spent in one processing stage."""
+
+    count: int = 0
+    """the number of times the stage ran"""
+
+    wall_seconds: float = 0.0
+    """the total elapsed time"""
+
+    cpu_seconds: float = 0.0
+    """the total CPU time used by the thread running the stage"""
+
+    max_wall_seconds: float = 0.0
+    """the longest elapsed time for one run of the stage"""
+
+
+class RunMetrics:
+    """Records the time spent in each stage and counts of work done.
+
+    The methods can be called from any thread.
+    CPU time is measured for the thread that runs the stage,
+    the CPU time of Tesseract processes is only available for the whole run.
+    """
+
+    def __init__(self) -> None:
+        """Create a new instance."""
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self._started_children_cpu = _children_cpu_seconds()
+
+        self.stages: dict[str, StageMetrics] = {}
+        """the time spent in each stage, keyed by stage name"""
+        self.counters: dict[str, int] = {}
+        """the counts of work done, keyed by counter name"""
+        self.images: dict[str, dict[str, float]] = {}
+        """the elapsed time of each stage, keyed by image file name"""
+
+    @contextlib.contextmanager
+    def time(self, stage: str, image_name: str | None = None) -> typing.Iterator[None]:
+        """Measure the time taken by the code in the `with` block.
+
+        Args:
+            stage: The name of the stage.
+            image_name: The name of the image file, to record the time for the image.
+
+        Returns:
+            A context manager.
+        """
+        start = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(
+                stage,
+                time.perf_counter() - start,
+                time.thread_time() - start_cpu,
+                image_name,
+            )
+
+    def record(
+        self,
+        stage: str,
+        wall_seconds: float,
+        cpu_seconds: float = 0.0,
+        image_name: str | None = None,
+    ) -> None:
+        """Add the time taken by one run of a stage.
+
+        Args:
+            stage: The name of the stage.
+            wall_seconds: The elapsed time.
+            cpu_seconds: The CPU time.
+            image_name: The name of the image file, to record the time for the image.
+        """
+        with self._lock:
+            stage_metrics = self.stages.setdefault(stage, StageMetrics())
+            stage_metrics.count += 1
+            stage_metrics.wall_seconds += wall_seconds
+            stage_metrics.cpu_seconds += cpu_seconds
+            stage_metrics.max_wall_seconds = max(
+                stage_metrics.max_wall_seconds,
+                wall_seconds,
+            )
+            if image_name:
+                image_stages = self.images.setdefault(image_name, {})
+                image_stages[stage] = image_stages.get(stage, 0.0) + wall_seconds
+
+    def add(self, counter: str, value: int = 1) -> None:
+        """Increase a counter.
+
+        Args:
+            counter: The name of the counter.
+            value: The amount to add.
+        """
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Get the metrics as plain values.
+
+        Returns:
+            The metrics.
+        """
+        children_cpu = _children_cpu_seconds()
+        with self._lock:
+            return {
+                "wall_seconds": time.perf_counter() - self._started,
+                "cpu_seconds": time.process_time() - self._started_cpu,
+                "subprocess_cpu_seconds": (
+                    children_cpu - self._started_children_cpu
+                    if children_cpu is not None
+                    and self._started_children_cpu is not None
+                    else None
+                ),
+                "stages": {
+                    name: dataclasses.asdict(value)
+                    for name, value in self.stages.items()
+                },
+                "counters": dict(self.counters),
+                "images": {name: dict(value) for name, value in self.images.items()},
+            }
+
+    def summary_table(self) -> str:
+        """Format the time spent in each stage and the counters as a table.
+
+        Returns:
+            The table.
+        """
+        values = self.to_dict()
+        # the stage column fits the longest stage name
+        width = max([len("stage"), *(len(name) for name in values["stages"])])
+        lines = [
+            f"{'stage':<{width}} {'count':>8} {'wall s':>10} {'cpu s':>10} "
+            f"{'mean ms':>10} {'max ms':>10}",
+        ]
+        for name, stage in values["stages"].items():
+            mean_ms = stage["wall_seconds"] / stage["count"] * 1000
+            lines.append(
+                f"{name:<{width}} {stage['count']:>8} {stage['wall_seconds']:>10.3f} "
+                f"{stage['cpu_seconds']:>10.3f} {mean_ms:>10.1f} "
+                f"{stage['max_wall_seconds'] * 1000:>10.1f}",
+            )
+
+        lines.append(
+            f"Total {values['wall_seconds']:.3f}s elapsed, "
+            f"{values['cpu_seconds']:.3f}s CPU",
+        )
+        if values["subprocess_cpu_seconds"] is not None:
+            lines[-1] += f", {values['subprocess_cpu_seconds']:.3f}s subprocess CPU"
+        lines.extend(
+            f"{name}: {value}" for name, value in sorted(values["counters"].items())
+        )
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """Format the metrics in the Prometheus text format.
+
+        The time for each image is not included.
+
+        Returns:
+            The metrics text.
+        """
+        values = self.to_dict()
+        prefix = "screenshot_ocr"
+        lines = []
+
+        def _metric(
+            name: str, help_text: str, samples: list[tuple[str, float]]
+        ) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.extend(
+                f"{prefix}_{name}{labels} {value}" for labels, value in samples
+            )
+
+        _metric(
+            "run_wall_seconds",
+            "Elapsed time of the run.",
+            [("", values["wall_seconds"])],
+        )
+        _metric(
+            "run_cpu_seconds", "CPU time of the run.", [("", values["cpu_seconds"])]
+        )
+        if values["subprocess_cpu_seconds"] is not None:
+            _metric(
+                "run_subprocess_cpu_seconds",
+                "CPU time of the processes started by the run.",
+                [("", values["subprocess_cpu_seconds"])],
+            )
+
+        stages = values["stages"]
+        for name, key, help_text in [
+            ("stage_count", "count", "Number of times each stage ran."),
+            ("stage_wall_seconds", "wall_seconds", "Elapsed time of each stage."),
+            ("stage_cpu_seconds", "cpu_seconds", "CPU time of each stage."),
+            (
+                "stage_max_wall_seconds",
+                "max_wall_seconds",
+                "Longest elapsed time of one run of each stage.",
+            ),
+        ]:
+            _metric(
+                name,
+                help_text,
+                [
+                    (f'{{stage="{stage}"}}', value[key])
+                    for stage, value in stages.items()
+                ],
+            )
+
+        _metric(
+            "count",
+            "Counts of work done in the run.",
+            [
+                (f'{{counter="{counter}"}}', value)
+                for counter, value in sorted(values["counters"].items())
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: pathlib.Path, metrics_format: str) -> None:
+        """Write the metrics to a file.
+
+        The file is replaced in one step, so a reader never sees a partial file.
+
+        Args:
+            path: The path to the metrics file.
+            metrics_format: The file format.
+        """
+        if metrics_format == METRICS_FORMAT_JSON:
+            content = json.dumps(self.to_dict(), indent=2)
+        elif metrics_format == METRICS_FORMAT_PROMETHEUS:
+            content = self.to_prometheus()
+        else:
+            msg = f"Unknown metrics format '{metrics_format}'."
+            raise ValueError(msg)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        utils.write_text_atomic(path, content, encoding="UTF-8", sync=False)
+
+
+def _children_cpu_seconds() -> float | None:
+    """Get the CPU time used by the child processes that have finished."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return float(usage.ru_utime + usage.ru_stime)
@@ -2,47 +2,167 @@
 
 from __future__ import annotations
 
+import ctypes
+import ctypes.util
+import dataclasses
+import functools
 import logging
 import subprocess
+import sys
+import threading
 import typing
 
+from screenshot_ocr import utils
+
 if typing.TYPE_CHECKING:
     import pathlib
 
 logger = logging.getLogger(__name__)
 
+OCR_BACKEND_SUBPROCESS = "subprocess"
+"""Run the tesseract executable for each image."""
+
+OCR_BACKEND_LIBRARY = "library"
+"""Load libtesseract once and use it for all images."""
+
+OCR_BACKENDS = [OCR_BACKEND_SUBPROCESS, OCR_BACKEND_LIBRARY]
+"""The available OCR backends."""
+
+OCR_OUTPUT_TEXT = "text"
+"""Get the recognised text."""
+
+OCR_OUTPUT_TSV = "tsv"
+"""Get the recognised words with their position and confidence, as TSV."""
+
+OCR_OUTPUTS = [OCR_OUTPUT_TEXT, OCR_OUTPUT_TSV]
+"""The available OCR output formats."""
+
+PSM_VALUES = range(14)
+"""The Tesseract page segmentation modes."""
+
+OEM_VALUES = range(4)
+"""The Tesseract OCR engine modes."""
+
+DEFAULT_FAST_PSM = 6
+"""The page segmentation mode of the fast pass, which is a single block of text."""
+
+_WHITELIST_VARIABLE = "tessedit_char_whitelist"
+"""The Tesseract variable that limits the characters that are recognised."""
+
+_TESSERACT_LIBRARY_NAMES = {
+    "linux": ["libtesseract.so.5", "libtesseract.so.4", "libtesseract.so"],
+    "win": ["libtesseract-5.dll", "tesseract50.dll", "libtesseract-4.dll"],
+    "darwin": ["libtesseract.5.dylib", "libtesseract.dylib"],
+}
+_LEPTONICA_LIBRARY_NAMES = {
+    "linux": ["libleptonica.so.6", "liblept.so.5", "libleptonica.so", "liblept.so"],
+    "win": ["libleptonica-6.dll", "leptonica-1.84.1.dll", "liblept-5.dll"],
+    "darwin": ["libleptonica.6.dylib", "liblept.5.dylib", "libleptonica.dylib"],
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class TesseractOptions:
+    """Settings for how Tesseract finds and recognises text."""
+
+    psm: int | None = None
+    """the page segmentation mode, or None for the Tesseract default"""
+
+    oem: int | None = None
+    """the OCR engine mode, or None for the Tesseract default"""
+
+    languages: str | None = None
+    """the languages to recognise, such as 'eng+fra', or None for English"""
+
+    whitelist: str | None = None
+    """the only characters to recognise, or None to recognise any character"""
+
+    @property
+    def options_id(self) -> str:
+        """Get the text that identifies the settings, for the OCR cache key.
+
+        Returns:
+            The settings identifier.
+        """
+        return (
+            f"tesseract|psm={self.psm}|oem={self.oem}"
+            f"|languages={self.languages}|whitelist={self.whitelist}"
+        )
+
+    def args(self) -> list[str]:
+        """Get the tesseract command line arguments for the settings.
+
+        Returns:
+            The arguments.
+        """
+        result = []
+        if self.psm is not None:
+            result.extend(["--psm", str(self.psm)])
+        if self.oem is not None:
+            result.extend(["--oem", str(self.oem)])
+        if self.languages:
+            result.extend(["-l", self.languages])
+        if self.whitelist:
+            result.extend(["-c", f"{_WHITELIST_VARIABLE}={self.whitelist}"])
+        return result
+
 
 class OcrHelper:
     """OCT helper for Tesseract."""
 
-    def __init__(self, exe_path: pathlib.Path, data_dir: pathlib.Path) -> None:
+    def __init__(
+        self,
+        exe_path: pathlib.Path,
+        data_dir: pathlib.Path,
+        output_format: str = OCR_OUTPUT_TEXT,
+        options: TesseractOptions | None = None,
+    ) -> None:
         """Create a new instance.
 
         Args:
             exe_path: The path to the tesseract executable.
             data_dir: The path to the tesseract data directory.
+            output_format: The OCR output format.
+            options: The tesseract settings, or None for the tesseract defaults.
         """
         self._exe_path = exe_path
         self._data_dir = data_dir
+        self._output_format = output_format
+        self._options = options or TesseractOptions()
 
-    def run(self, image_file: pathlib.Path) -> str | None:
+    def run(
+        self,
+        image_file: pathlib.Path,
+        image_data: bytes | None = None,
+        options: TesseractOptions | None = None,
+    ) -> str | None:
         """Run tesseract over an image file.
 
         Args:
             image_file: The path to the image file.
+            image_data: The content of the image, already read from the file.
+                If given, it is sent to tesseract using stdin,
+                so the file is not read again.
+            options: The tesseract settings for this image,
+                or None to use the settings of the helper.
 
         Returns:
-            The text from the image.
+            The text from the image, in the output format.
         """
         cmds = [
             str(self._exe_path),
             "--tessdata-dir",
             str(self._data_dir),
-            str(image_file),
+            "stdin" if image_data is not None else str(image_file),
             "stdout",
+            *(options or self._options).args(),
         ]
-        result = subprocess.run(
+        if self._output_format == OCR_OUTPUT_TSV:
+            # the tesseract config file that selects the TSV output
+            cmds.append("tsv")
+        result = subprocess.run(  # noqa: S603
             cmds,
+            input=image_data,
             check=True,
             capture_output=True,
             shell=False,
@@ -50,3 +170,384 @@ class OcrHelper:
 
         raw_value = result.stdout.decode(encoding="UTF-8")
         return raw_value
+
+    @functools.cached_property
+    def engine_id(self) -> str:
+        """Get the text that identifies the tesseract version, data, and options.
+
+        Returns:
+            The engine identifier.
+        """
+        result = subprocess.run(  # noqa: S603
+            [str(self._exe_path), "--version"],
+            check=True,
+            capture_output=True,
+            shell=False,
+        )
+        output = result.stdout or result.stderr
+        version = output.decode(encoding="UTF-8").strip().splitlines()[0]
+        return _engine_id(
+            f"{OCR_BACKEND_SUBPROCESS}|{version}|{self._data_dir}",
+            self._output_format,
+            self._options,
+        )
+
+    def close(self) -> None:
+        """Release any resources held by the helper."""
+
+
+class TesseractLibraryHelper:
+    """OCR helper that keeps the Tesseract engine loaded using libtesseract.
+
+    The language model is loaded once for each thread that runs OCR,
+    and is reused for every image processed by that thread.
+    """
+
+    def __init__(
+        self,
+        exe_path: pathlib.Path,
+        data_dir: pathlib.Path,
+        language: str = "eng",
+        output_format: str = OCR_OUTPUT_TEXT,
+        options: TesseractOptions | None = None,
+    ) -> None:
+        """Create a new instance.
+
+        Args:
+            exe_path: The path to the tesseract executable,
+                used to find the libraries on Windows.
+            data_dir: The path to the tesseract data directory.
+            language: The tesseract language to load,
+                unless the settings include languages.
+            output_format: The OCR output format.
+            options: The tesseract settings, or None for the tesseract defaults.
+        """
+        self._data_dir = data_dir
+        self._language = language
+        self._output_format = output_format
+        self._options = options or TesseractOptions()
+
+        search_dir = exe_path.parent if exe_path else None
+        self._tess = _load_library("tesseract", _TESSERACT_LIBRARY_NAMES, search_dir)
+        self._lept = _load_library("lept", _LEPTONICA_LIBRARY_NAMES, search_dir)
+        self._configure_library()
+
+        self._local = threading.local()
+        self._handles: list[int] = []
+        self._handles_lock = threading.Lock()
+
+        self._version = self._tess.TessVersion().decode(encoding="UTF-8")
+        logger.info("Using Tesseract library version '%s'.", self._version)
+
+    def run(
+        self,
+        image_file: pathlib.Path,
+        image_data: bytes | None = None,
+        options: TesseractOptions | None = None,
+    ) -> str | None:
+        """Run the loaded tesseract engine over an image file.
+
+        Args:
+            image_file: The path to the image file.
+            image_data: The content of the image, already read from the file.
+                If given, the image is decoded from memory,
+                so the file is not read again.
+            options: The tesseract settings for this image,
+                or None to use the settings of the helper.
+
+        Returns:
+            The text from the image, in the output format.
+        """
+        options = options or self._options
+        handle, default_psm = self._thread_handle(
+            options.languages or self._language,
+            options.oem,
+        )
+        # the settings are changed for each image, as the engine is reused
+        self._tess.TessBaseAPISetPageSegMode(
+            handle,
+            default_psm if options.psm is None else options.psm,
+        )
+        self._tess.TessBaseAPISetVariable(
+            handle,
+            _WHITELIST_VARIABLE.encode(encoding="UTF-8"),
+            (options.whitelist or "").encode(encoding="UTF-8"),
+        )
+
+        if image_data is not None:
+            pix = self._lept.pixReadMem(image_data, len(image_data))
+        else:
+            pix = self._lept.pixRead(str(image_file).encode(encoding="UTF-8"))
+        if not pix:
+            msg = f"Could not read image file '{image_file}'."
+            raise utils.ScreenshotOcrError(msg)
+
+        try:
+            self._tess.TessBaseAPISetImage2(handle, pix)
+            if self._output_format == OCR_OUTPUT_TSV:
+                text_ptr = self._tess.TessBaseAPIGetTsvText(handle, 0)
+            else:
+                text_ptr = self._tess.TessBaseAPIGetUTF8Text(handle)
+            if not text_ptr:
+                msg = f"Could not recognise text in image file '{image_file}'."
+                raise utils.ScreenshotOcrError(msg)
+            try:
+                raw_value = ctypes.string_at(text_ptr).decode(encoding="UTF-8")
+            finally:
+                self._tess.TessDeleteText(text_ptr)
+        finally:
+            self._tess.TessBaseAPIClear(handle)
+            self._lept.pixDestroy(ctypes.byref(ctypes.c_void_p(pix)))
+
+        return raw_value
+
+    @property
+    def engine_id(self) -> str:
+        """Get the text that identifies the tesseract version, data, and options.
+
+        Returns:
+            The engine identifier.
+        """
+        return _engine_id(
+            f"{OCR_BACKEND_LIBRARY}|{self._version}|{self._data_dir}|{self._language}",
+            self._output_format,
+            self._options,
+        )
+
+    def close(self) -> None:
+        """Shut down the loaded tesseract engines."""
+        with self._handles_lock:
+            handles = self._handles
+            self._handles = []
+
+        for handle in handles:
+            self._tess.TessBaseAPIEnd(handle)
+            self._tess.TessBaseAPIDelete(handle)
+
+        self._local = threading.local()
+
+    def _thread_handle(self, language: str, oem: int | None) -> tuple[int, int]:
+        """Get the tesseract engine for the current thread, creating it if needed.
+
+        An engine is loaded for each language and engine mode,
+        as these can only be set when the engine is loaded.
+
+        Args:
+            language: The tesseract languages to load.
+            oem: The OCR engine mode, or None for the tesseract default.
+
+        Returns:
+            The engine and its default page segmentation mode.
+        """
+        engines: dict[tuple[str, int | None], tuple[int, int]] | None = getattr(
+            self._local,
+            "engines",
+            None,
+        )
+        if engines is None:
+            engines = {}
+            self._local.engines = engines
+        engine = engines.get((language, oem))
+        if engine:
+            return engine
+
+        handle = self._tess.TessBaseAPICreate()
+        data_dir = str(self._data_dir).encode(encoding="UTF-8")
+        if oem is None:
+            result = self._tess.TessBaseAPIInit3(
+                handle,
+                data_dir,
+                language.encode(encoding="UTF-8"),
+            )
+        else:
+            result = self._tess.TessBaseAPIInit2(
+                handle,
+                data_dir,
+                language.encode(encoding="UTF-8"),
+                oem,
+            )
+        if result != 0:
+            self._tess.TessBaseAPIDelete(handle)
+            msg = (
+                f"Could not load Tesseract language '{language}' "
+                f"from '{self._data_dir}'."
+            )
+            raise utils.ScreenshotOcrError(msg)
+
+        logger.debug(
+            "Loaded Tesseract engine for thread '%s'.",
+            threading.current_thread().name,
+        )
+        with self._handles_lock:
+            self._handles.append(handle)
+        engine = (handle, self._tess.TessBaseAPIGetPageSegMode(handle))
+        engines[(language, oem)] = engine
+        return engine
+
+    def _configure_library(self) -> None:
+        """Set the argument and return types of the library functions."""
+        tess = self._tess
+        lept = self._lept
+        void_p = ctypes.c_void_p
+
+        tess.TessVersion.argtypes = []
+        tess.TessVersion.restype = ctypes.c_char_p
+        tess.TessBaseAPICreate.argtypes = []
+        tess.TessBaseAPICreate.restype = void_p
+        tess.TessBaseAPIInit3.argtypes = [void_p, ctypes.c_char_p, ctypes.c_char_p]
+        tess.TessBaseAPIInit3.restype = ctypes.c_int
+        tess.TessBaseAPIInit2.argtypes = [
+            void_p,
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_int,
+        ]
+        tess.TessBaseAPIInit2.restype = ctypes.c_int
+        tess.TessBaseAPIGetPageSegMode.argtypes = [void_p]
+        tess.TessBaseAPIGetPageSegMode.restype = ctypes.c_int
+        tess.TessBaseAPISetPageSegMode.argtypes = [void_p, ctypes.c_int]
+        tess.TessBaseAPISetPageSegMode.restype = None
+        tess.TessBaseAPISetVariable.argtypes = [
+            void_p,
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+        ]
+        tess.TessBaseAPISetVariable.restype = ctypes.c_int
+        tess.TessBaseAPISetImage2.argtypes = [void_p, void_p]
+        tess.TessBaseAPISetImage2.restype = None
+        tess.TessBaseAPIGetUTF8Text.argtypes = [void_p]
+        tess.TessBaseAPIGetUTF8Text.restype = void_p
+        tess.TessBaseAPIGetTsvText.argtypes = [void_p, ctypes.c_int]
+        tess.TessBaseAPIGetTsvText.restype = void_p
+        tess.TessDeleteText.argtypes = [void_p]
+        tess.TessDeleteText.restype = None
+        tess.TessBaseAPIClear.argtypes = [void_p]
+        tess.TessBaseAPIClear.restype = None
+        tess.TessBaseAPIEnd.argtypes = [void_p]
+        tess.TessBaseAPIEnd.restype = None
+        tess.TessBaseAPIDelete.argtypes = [void_p]
+        tess.TessBaseAPIDelete.restype = None
+
+        lept.pixRead.argtypes = [ctypes.c_char_p]
+        lept.pixRead.restype = void_p
+        lept.pixReadMem.argtypes = [ctypes.c_char_p, ctypes.c_size_t]
+        lept.pixReadMem.restype = void_p
+        lept.pixDestroy.argtypes = [ctypes.POINTER(void_p)]
+        lept.pixDestroy.restype = None
+
+
+def build_ocr_helper(
+    backend: str,
+    exe_path: pathlib.Path,
+    data_dir: pathlib.Path,
+    output_format: str = OCR_OUTPUT_TEXT,
+    options: TesseractOptions | None = None,
+) -> OcrHelper | TesseractLibraryHelper:
+    """Create the OCR helper for the selected backend.
+
+    The library backend falls back to the subprocess backend
+    if libtesseract cannot be loaded.
+
+    Args:
+        backend: The name of the OCR backend.
+        exe_path: The path to the tesseract executable.
+        data_dir: The path to the tesseract data directory.
+        output_format: The OCR output format.
+        options: The tesseract settings, or None for the tesseract defaults.
+
+    Returns:
+        The OCR helper.
+    """
+    if backend == OCR_BACKEND_LIBRARY:
+        try:
+            return TesseractLibraryHelper(
+                exe_path,
+                data_dir,
+                output_format=output_format,
+                options=options,
+            )
+        except (OSError, AttributeError, utils.ScreenshotOcrError) as error:
+            logger.warning(
+                "Could not load the Tesseract library, "
+                "using the Tesseract executable instead: %s",
+                error,
+            )
+        return OcrHelper(exe_path, data_dir, output_format, options)
+
+    if backend == OCR_BACKEND_SUBPROCESS:
+        return OcrHelper(exe_path, data_dir, output_format, options)
+
+    msg = f"Unknown OCR backend '{backend}'."
+    raise ValueError(msg)
+
+
+def _engine_id(
+    engine_id: str,
+    output_format: str,
+    options: TesseractOptions,
+) -> str:
+    """Add the output format and tesseract settings to an engine identifier.
+
+    The text output and default settings are not included,
+    so cached text is kept when upgrading.
+
+    Args:
+        engine_id: The engine identifier.
+        output_format: The OCR output format.
+        options: The tesseract settings.
+
+    Returns:
+        The engine identifier.
+    """
+    if output_format != OCR_OUTPUT_TEXT:
+        engine_id = f"{engine_id}|{output_format}"
+    if options != TesseractOptions():
+        engine_id = f"{engine_id}|{options.options_id}"
+    return engine_id
+
+
+def _find_library(name: str) -> str | None:
+    """Find a shared library using the platform search rules."""
+    return ctypes.util.find_library(name)
+
+
+def _load_library(
+    name: str,
+    names: dict[str, list[str]],
+    search_dir: pathlib.Path | None,
+) -> ctypes.CDLL:
+    """Load a shared library.
+
+    Args:
+        name: The short name of the library.
+        names: The library file names for each platform.
+        search_dir: An extra directory to look for the library files.
+
+    Returns:
+        The loaded library.
+    """
+    platform_names = next(
+        (value for key, value in names.items() if sys.platform.startswith(key)),
+        [],
+    )
+
+    candidates: list[str] = []
+    if search_dir:
+        candidates.extend(
+            str(search_dir / i) for i in platform_names if (search_dir / i).exists()
+        )
+    found = _find_library(name)
+    if found:
+        candidates.append(found)
+    candidates.extend(platform_names)
+
+    for candidate in candidates:
+        try:
+            library = ctypes.CDLL(candidate)
+        except OSError:
+            continue
+        logger.debug("Loaded library '%s' from '%s'.", name, candidate)
+        return library
+
+    msg = f"Could not find the '{name}' library."
+    raise OSError(msg)
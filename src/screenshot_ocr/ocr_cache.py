@@ -0,0 +1,166 @@
+"""Cache of text extracted from images."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import typing
+
+from screenshot_ocr import utils
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE_BYTES = 50 * 1024 * 1024
+"""The default maximum total size of the cached text files."""
+
+DEFAULT_MAX_AGE_SECONDS = 90 * 24 * 60 * 60
+"""The default maximum time since a cached text file was last used."""
+
+
+class OcrCache:
+    """An on-disk cache of OCR text, keyed by the image content and OCR engine."""
+
+    def __init__(
+        self,
+        cache_dir: pathlib.Path,
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    ) -> None:
+        """Create a new instance.
+
+        Args:
+            cache_dir: The directory to store the cached text files.
+            max_size_bytes: The maximum total size of the cached text files.
+            max_age_seconds: The maximum time since a cached text file was last used.
+        """
+        self._cache_dir = cache_dir
+        self._max_size_bytes = max_size_bytes
+        self._max_age_seconds = max_age_seconds
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        """the number of times cached text was found"""
+        self.misses = 0
+        """the number of times cached text was not found"""
+
+    def content_key(self, content_hash: str, engine_id: str) -> str:
+        """Build the cache key for an image from the hash of its content.
+
+        This avoids hashing the image again when the hash is already known.
+
+        Args:
+            content_hash: The SHA-256 hash of the image file content as hex.
+            engine_id: Identifies the OCR engine version, data, and options.
+
+        Returns:
+            The cache key.
+        """
+        digest = hashlib.sha256()
+        digest.update(engine_id.encode(encoding="UTF-8"))
+        digest.update(b"\0")
+        digest.update(content_hash.encode(encoding="UTF-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Get the cached text for a key.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached text, or None if there is no cached text.
+        """
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if time.time() - stat.st_mtime > self._max_age_seconds:
+                path.unlink()
+                value = None
+            else:
+                value = path.read_text(encoding="UTF-8")
+                # update the modified time to record the last use
+                os.utime(path)
+        except FileNotFoundError:
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        """Store the text for a key.
+
+        Args:
+            key: The cache key.
+            value: The text to store.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # a lost cache entry only means OCR is run again, so do not wait for the disk
+        utils.write_text_atomic(path, value, encoding="UTF-8", sync=False)
+
+    def prune(self) -> int:
+        """Remove cached text that is too old, then the oldest until under size.
+
+        Returns:
+            The number of cached text files removed.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self._cache_dir.glob("*/*.txt"):
+            stat = _stat(path)
+            if stat is None:
+                continue
+            if now - stat.st_mtime > self._max_age_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda i: i[0]):
+            if total_size <= self._max_size_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+            removed += 1
+
+        if removed:
+            logger.info("Removed %s cached OCR text file(s).", removed)
+        return removed
+
+    def clear(self) -> int:
+        """Remove all cached text.
+
+        Returns:
+            The number of cached text files removed.
+        """
+        removed = 0
+        for path in self._cache_dir.glob("*/*.txt"):
+            path.unlink(missing_ok=True)
+            removed += 1
+
+        logger.info("Cleared %s cached OCR text file(s).", removed)
+        return removed
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self._cache_dir / key[:2] / f"{key}.txt"
+
+
+def _stat(path: pathlib.Path) -> os.stat_result | None:
+    """Get the size and times of a file, or None if the file was removed."""
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
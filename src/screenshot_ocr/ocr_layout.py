@@ -0,0 +1,159 @@
+"""The words found by OCR, with the position and confidence of each word."""
+
+from __future__ import annotations
+
+import array
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_CONFIDENCE = 60.0
+"""The default lowest confidence, from 0 to 100, of the words to keep."""
+
+_TSV_WORD_LEVEL = "5"
+"""The level of the rows in the Tesseract TSV output that are words."""
+
+_TSV_COLUMNS = 12
+"""The number of columns in the Tesseract TSV output."""
+
+
+class OcrLayout:
+    """The words found by OCR, with the line, box, and confidence of each word.
+
+    The values are stored in arrays with one item for each word,
+    instead of an object for each word,
+    so a page of words is quick to build and uses little memory.
+    """
+
+    __slots__ = ("confidences", "heights", "lefts", "line_ids", "tops", "words")
+
+    def __init__(self) -> None:
+        """Create a new instance."""
+        self.words: list[str] = []
+        """the text of each word"""
+        self.line_ids = array.array("i")
+        """the line number of each word, starting at 0"""
+        self.lefts = array.array("i")
+        """the left edge of each word in pixels"""
+        self.tops = array.array("i")
+        """the top edge of each word in pixels"""
+        self.heights = array.array("i")
+        """the height of each word in pixels"""
+        self.confidences = array.array("f")
+        """the confidence of each word, from 0 to 100"""
+
+    def __len__(self) -> int:
+        """The number of words."""
+        return len(self.words)
+
+    def append(  # noqa: PLR0913
+        self,
+        word: str,
+        line_id: int,
+        left: int,
+        top: int,
+        height: int,
+        confidence: float,
+    ) -> None:
+        """Add a word.
+
+        Args:
+            word: The text of the word.
+            line_id: The line number.
+            left: The left edge in pixels.
+            top: The top edge in pixels.
+            height: The height in pixels.
+            confidence: The confidence, from 0 to 100.
+        """
+        self.words.append(word)
+        self.line_ids.append(line_id)
+        self.lefts.append(left)
+        self.tops.append(top)
+        self.heights.append(height)
+        self.confidences.append(confidence)
+
+    def lines(self, min_confidence: float = 0.0) -> list[list[int]]:
+        """Get the words in each line, leaving out the words with low confidence.
+
+        Args:
+            min_confidence: The lowest confidence of the words to keep.
+
+        Returns:
+            The indexes of the words in each line, in reading order.
+            Lines without any words to keep are not included.
+        """
+        result: list[list[int]] = []
+        current_id = -1
+        for index, line_id in enumerate(self.line_ids):
+            if self.confidences[index] < min_confidence:
+                continue
+            if line_id != current_id:
+                result.append([])
+                current_id = line_id
+            result[-1].append(index)
+        return result
+
+    def line_text(self, indexes: list[int]) -> str:
+        """Get the text of the words in a line.
+
+        Args:
+            indexes: The indexes of the words.
+
+        Returns:
+            The words separated by spaces.
+        """
+        return " ".join(self.words[i] for i in indexes)
+
+    def line_height(self, indexes: list[int]) -> int:
+        """Get the height of the tallest word in a line.
+
+        Args:
+            indexes: The indexes of the words.
+
+        Returns:
+            The height in pixels.
+        """
+        return max((self.heights[i] for i in indexes), default=0)
+
+    def text(self, min_confidence: float = 0.0) -> str:
+        """Get the text, leaving out the words with low confidence.
+
+        Args:
+            min_confidence: The lowest confidence of the words to keep.
+
+        Returns:
+            The text, with one line of text for each line of words.
+        """
+        return "\n".join(self.line_text(i) for i in self.lines(min_confidence))
+
+
+def parse_tsv(value: str) -> OcrLayout:
+    """Read the words from the Tesseract TSV output.
+
+    Args:
+        value: The TSV output, including the header row.
+
+    Returns:
+        The words and their line, box, and confidence.
+    """
+    layout = OcrLayout()
+    line_keys: dict[tuple[str, str, str, str], int] = {}
+    for row in value.splitlines()[1:]:
+        # the word text is the last column, and might contain a tab
+        columns = row.split("\t", _TSV_COLUMNS - 1)
+        if len(columns) != _TSV_COLUMNS or columns[0] != _TSV_WORD_LEVEL:
+            continue
+        word = columns[11].strip()
+        if not word:
+            continue
+        try:
+            left, top, height = int(columns[6]), int(columns[7]), int(columns[9])
+            confidence = float(columns[10])
+        except ValueError:
+            logger.debug("Ignoring invalid Tesseract TSV row '%s'.", row)
+            continue
+        # page, block, paragraph, and line number
+        line_key = (columns[1], columns[2], columns[3], columns[4])
+        line_id = line_keys.setdefault(line_key, len(line_keys))
+        layout.append(word, line_id, left, top, height, confidence)
+    return layout
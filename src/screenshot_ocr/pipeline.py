@@ -0,0 +1,148 @@
+"""Run the stages of processing images connected by bounded queues."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+
+if typing.TYPE_CHECKING:
+    import pathlib
+    from datetime import datetime
+
+    from screenshot_ocr import manifest, ocr_layout
+
+T = typing.TypeVar("T")
+
+
+class _End:
+    """Marks the end of the items in a queue."""
+
+
+END = _End()
+"""Put in a queue after the last item."""
+
+
+@dataclasses.dataclass
+class PipelineItem:
+    """An image that is moving through the pipeline stages."""
+
+    index: int
+    """the position of the image in the order the images were found"""
+
+    image_file: pathlib.Path
+    """the path to the image file"""
+
+    found_date: datetime | None
+    """the date extracted from the image file name"""
+
+    output_text: str = ""
+    """the text extracted from the image"""
+
+    content_hash: str = ""
+    """the SHA-256 hash of the image file content, from the bytes read for OCR"""
+
+    layout: ocr_layout.OcrLayout | None = None
+    """the words found by OCR, when using the TSV output"""
+
+    duplicate_of: str | None = None
+    """the path to an earlier image with the same content, if this is a copy"""
+
+    output_name: str = ""
+    """the name of the image file in the output directory"""
+
+    question_number: int | None = None
+    """the question number"""
+
+    question_points: int | None = None
+    """the question points"""
+
+    question_text: str = ""
+    """the question text"""
+
+    entry: manifest.ManifestEntry | None = None
+    """the manifest entry for the image"""
+
+    ranges: list[str] = dataclasses.field(default_factory=list)
+    """the ranges of the spreadsheet cells to update"""
+
+
+class Reorder:
+    """Releases items in index order, holding items that arrive early."""
+
+    def __init__(self) -> None:
+        """Create a new instance."""
+        self._next_index = 0
+        self._waiting: dict[int, PipelineItem] = {}
+
+    def push(self, item: PipelineItem) -> list[PipelineItem]:
+        """Add an item.
+
+        Args:
+            item: The item.
+
+        Returns:
+            The items that are ready, in index order.
+        """
+        self._waiting[item.index] = item
+        ready = []
+        while self._next_index in self._waiting:
+            ready.append(self._waiting.pop(self._next_index))
+            self._next_index += 1
+        return ready
+
+
+async def run_stage(
+    workers: int,
+    in_queue: asyncio.Queue[typing.Any],
+    out_queue: asyncio.Queue[typing.Any] | None,
+    handle: typing.Callable[[T], typing.Awaitable[list[typing.Any]]],
+) -> None:
+    """Run the workers for a stage until the end of the input queue.
+
+    Each worker takes an item from the input queue,
+    and puts the items returned by `handle` in the output queue.
+    Putting waits while the output queue is full,
+    so a slow stage holds back the stages before it.
+
+    Args:
+        workers: The number of items to handle at the same time.
+        in_queue: The queue of items for the stage.
+        out_queue: The queue for the next stage, if there is one.
+        handle: Process an item and return the items for the next stage.
+    """
+
+    async def _worker() -> None:
+        while True:
+            item = await in_queue.get()
+            if item is END:
+                # let the other workers see the end
+                await in_queue.put(END)
+                return
+            for result in await handle(item):
+                if out_queue is not None:
+                    await out_queue.put(result)
+
+    await asyncio.gather(*(_worker() for _ in range(workers)))
+    if out_queue is not None:
+        await out_queue.put(END)
+
+
+async def run_stages(
+    stages: list[typing.Coroutine[typing.Any, typing.Any, None]],
+) -> None:
+    """Run the stages until they all finish or one raises an error.
+
+    Args:
+        stages: The stage coroutines.
+    """
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            # raise the first error
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
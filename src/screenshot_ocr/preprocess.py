@@ -0,0 +1,201 @@
+"""Prepare screenshot images before extracting the text."""
+
+from __future__ import annotations
+
+import dataclasses
+import io
+import logging
+import typing
+
+from screenshot_ocr import utils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WIDTH = 1600
+"""The default maximum width of a prepared image in pixels."""
+
+_AUTO_CROP_MIN_STD = 8.0
+"""Rows and columns with less variation than this are treated as blank margin."""
+
+
+@dataclasses.dataclass
+class PreprocessOptions:
+    """Settings for preparing images before OCR."""
+
+    crop: tuple[int, int, int, int] | None = None
+    """the left, top, right, and bottom pixel edges of the question region"""
+
+    auto_crop: bool = True
+    """whether to remove blank margins around the text"""
+
+    max_width: int | None = DEFAULT_MAX_WIDTH
+    """the maximum width in pixels, larger images are scaled down"""
+
+    binarize: bool = True
+    """whether to convert the image to only black and white"""
+
+    @property
+    def options_id(self) -> str:
+        """Get the text that identifies the settings, for the OCR cache key.
+
+        Returns:
+            The settings identifier.
+        """
+        crop = ",".join(str(i) for i in self.crop) if self.crop else "none"
+        return (
+            f"preprocess|crop={crop}|auto_crop={self.auto_crop}"
+            f"|max_width={self.max_width}|binarize={self.binarize}"
+        )
+
+
+class ImagePreprocessor:
+    """Converts images to a smaller greyscale or black and white image for OCR.
+
+    Uses Pillow to read, scale, and save images,
+    and NumPy for the pixel operations.
+    """
+
+    def __init__(self, options: PreprocessOptions) -> None:
+        """Create a new instance.
+
+        Args:
+            options: The preprocessing settings.
+        """
+        self._options = options
+        try:
+            import numpy as np  # noqa: PLC0415
+
+            from PIL import Image  # noqa: PLC0415
+        except ImportError as error:
+            msg = (
+                "Preprocessing images requires the optional 'preprocess' "
+                f"dependencies (Pillow and NumPy): {error}"
+            )
+            raise utils.ScreenshotOcrError(msg) from error
+
+        self._np = np
+        self._image = Image
+
+    @property
+    def options(self) -> PreprocessOptions:
+        """The preprocessing settings."""
+        return self._options
+
+    def process_bytes(self, image_data: bytes) -> bytes:
+        """Prepare an image in memory.
+
+        Args:
+            image_data: The content of the screenshot image.
+
+        Returns:
+            The prepared image as PNG data.
+        """
+        output = io.BytesIO()
+        self._prepare(io.BytesIO(image_data)).save(output, format="PNG")
+        return output.getvalue()
+
+    def _prepare(self, source: typing.BinaryIO) -> typing.Any:
+        """Crop, shrink, and convert an image.
+
+        Args:
+            source: The content of the screenshot image.
+
+        Returns:
+            The prepared image.
+        """
+        np = self._np
+        options = self._options
+
+        with self._image.open(source) as opened:
+            image = opened.crop(options.crop) if options.crop else opened
+            # luminance as 8 bit greyscale
+            pixels = np.asarray(image.convert("L"), dtype=np.uint8)
+
+        if options.auto_crop:
+            pixels = self._trim_margins(pixels)
+
+        result = self._image.fromarray(pixels)
+        if options.max_width and result.width > options.max_width:
+            height = max(1, round(result.height * options.max_width / result.width))
+            result = result.resize(
+                (options.max_width, height),
+                self._image.Resampling.LANCZOS,
+            )
+
+        if options.binarize:
+            pixels = np.asarray(result, dtype=np.uint8)
+            threshold = self._otsu_threshold(pixels)
+            pixels = np.where(pixels > threshold, 255, 0).astype(np.uint8)
+            result = self._image.fromarray(pixels)
+
+        return result
+
+    def _trim_margins(self, pixels: typing.Any) -> typing.Any:
+        """Remove the rows and columns at the edges that have no text."""
+        np = self._np
+        rows = np.flatnonzero(pixels.std(axis=1) >= _AUTO_CROP_MIN_STD)
+        cols = np.flatnonzero(pixels.std(axis=0) >= _AUTO_CROP_MIN_STD)
+        if rows.size == 0 or cols.size == 0:
+            return pixels
+        return pixels[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+
+    def _otsu_threshold(self, pixels: typing.Any) -> int:
+        """Find the grey level that best separates the text from the background."""
+        np = self._np
+        histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+        levels = np.arange(256, dtype=np.float64)
+
+        # the pixel count and mean of the pixels at or below each level
+        weight_low = np.cumsum(histogram)
+        weight_high = weight_low[-1] - weight_low
+        sum_low = np.cumsum(histogram * levels)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_low = sum_low / weight_low
+            mean_high = (sum_low[-1] - sum_low) / weight_high
+            variance = weight_low * weight_high * (mean_low - mean_high) ** 2
+
+        variance = np.nan_to_num(variance)
+        return int(np.argmax(variance))
+
+
+def build_preprocessor(options: PreprocessOptions) -> ImagePreprocessor | None:
+    """Create the image preprocessor.
+
+    Preprocessing is not used if the optional dependencies are not installed.
+
+    Args:
+        options: The preprocessing settings.
+
+    Returns:
+        The image preprocessor, or None if it is not available.
+    """
+    try:
+        return ImagePreprocessor(options)
+    except utils.ScreenshotOcrError as error:
+        logger.warning("Not preprocessing images: %s", error)
+        return None
+
+
+def parse_crop(value: str) -> tuple[int, int, int, int]:
+    """Parse the question region from text.
+
+    Args:
+        value: The left, top, right, and bottom pixel edges separated by commas.
+
+    Returns:
+        The left, top, right, and bottom pixel edges.
+    """
+    expected_count = 4
+    try:
+        parts = [int(i.strip()) for i in value.split(",")]
+    except ValueError:
+        parts = []
+    if len(parts) != expected_count:
+        msg = f"Invalid crop '{value}', expected 'left,top,right,bottom'."
+        raise ValueError(msg)
+
+    left, top, right, bottom = parts
+    if left < 0 or top < 0 or right <= left or bottom <= top:
+        msg = f"Invalid crop '{value}', the region is empty."
+        raise ValueError(msg)
+    return left, top, right, bottom
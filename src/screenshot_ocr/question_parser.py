@@ -0,0 +1,148 @@
+"""Find the question number, points, and text in the text from a screenshot."""
+
+from __future__ import annotations
+
+import logging
+import re
+import typing
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+    from screenshot_ocr import ocr_layout
+
+logger = logging.getLogger(__name__)
+
+_QUESTION_KEY = "question"
+"""The word before the question number."""
+
+_NUMBER_FIXES = str.maketrans({"i": "1", "l": "1", "o": "0"})
+"""Letters that OCR commonly recognises instead of digits."""
+
+_NUMBER_RE = re.compile(r"\d+")
+"""Matches a question number, after the letter fixes."""
+
+_POINTS_RE = re.compile(r"(?P<num>one|two|three|four|five)\s+points?")
+"""Matches the points for a question."""
+
+_POINTS_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5}
+"""The number for each points word."""
+
+
+def parse_question_text(
+    value: str,
+    *,
+    find_number: bool = True,
+) -> tuple[int | None, int, str]:
+    """Parse the text from a screenshot to get the question number, points, and text.
+
+    The first line that contains 'question' followed by only a number
+    gives the question number, and is not included in the question text.
+    The first points phrase (e.g. 'two points') gives the points, otherwise 1.
+    The other non-blank lines are joined with spaces to form the question text.
+
+    Args:
+        value: The raw text from the screenshot.
+        find_number: Whether to look for the question number,
+            otherwise every line is part of the question text.
+
+    Returns:
+        A tuple containing the question number, points, and text.
+    """
+    number = None
+    points = 1
+    parts = []
+
+    # casefold all the lines at once, the line breaks are not changed
+    for line, line_folded in zip(value.splitlines(), value.casefold().splitlines()):
+        line_strip = line.strip()
+        if not line_strip:
+            continue
+
+        line_lower = line_folded.strip()
+
+        if find_number and not number:
+            start_index = line_lower.find(_QUESTION_KEY)
+            if start_index >= 0:
+                number_raw = (
+                    line_lower[start_index + len(_QUESTION_KEY) :]
+                    .strip()
+                    .translate(_NUMBER_FIXES)
+                )
+                if _NUMBER_RE.fullmatch(number_raw):
+                    number = int(number_raw)
+                    continue
+
+        if points == 1:
+            match = _POINTS_RE.search(line_lower)
+            if match:
+                points = _POINTS_WORDS[match.group("num")]
+
+        parts.append(line_strip)
+
+    return number, points, " ".join(parts)
+
+
+def parse_question_layout(
+    layout: ocr_layout.OcrLayout,
+    min_confidence: float,
+) -> tuple[int | None, int, str]:
+    """Parse the words from a screenshot to get the question number, points, and text.
+
+    Words with lower confidence than `min_confidence`,
+    such as faint buttons and icons, are left out.
+    The question number is on a line with only 'question' and a number.
+    If more than one line matches, the line with the tallest words is used,
+    as the question heading is larger than the other text.
+    The points and text are found in the other lines, as for plain text.
+
+    Args:
+        layout: The words from the screenshot.
+        min_confidence: The lowest confidence of the words to keep.
+
+    Returns:
+        A tuple containing the question number, points, and text.
+    """
+    lines = layout.lines(min_confidence)
+    number = None
+    number_line = None
+    number_height = -1
+    for line_index, indexes in enumerate(lines):
+        # the words on the line without spaces, so 'question 17' and 'question17' match
+        joined = "".join(layout.words[i] for i in indexes).casefold()
+        if not joined.startswith(_QUESTION_KEY):
+            continue
+        number_raw = joined[len(_QUESTION_KEY) :].translate(_NUMBER_FIXES)
+        height = layout.line_height(indexes)
+        if _NUMBER_RE.fullmatch(number_raw) and height > number_height:
+            number = int(number_raw)
+            number_line = line_index
+            number_height = height
+
+    text = "\n".join(
+        layout.line_text(indexes)
+        for line_index, indexes in enumerate(lines)
+        if line_index != number_line
+    )
+    _, points, question_text = parse_question_text(text, find_number=False)
+    return number, points, question_text
+
+
+def parse_text_files(
+    text_files: typing.Iterable[pathlib.Path],
+) -> typing.Iterator[tuple[pathlib.Path, tuple[int | None, int, str]]]:
+    """Parse saved text files, such as the text files in the output directory.
+
+    Args:
+        text_files: The paths to the text files.
+
+    Returns:
+        An iterator of the text file path and the question number, points, and text.
+    """
+    for text_file in text_files:
+        try:
+            value = text_file.read_text()
+        except (OSError, UnicodeDecodeError) as error:
+            logger.warning("Could not read text file '%s': %s", text_file, error)
+            continue
+        yield text_file, parse_question_text(value)
@@ -0,0 +1,144 @@
+"""Limit the rate of requests and wait between retries."""
+
+from __future__ import annotations
+
+import dataclasses
+import random
+import threading
+import time
+import typing
+
+DEFAULT_REQUESTS_PER_MINUTE = 60.0
+"""The default request rate, the Google Sheets per-user quota for each minute."""
+
+DEFAULT_MAX_RETRIES = 5
+"""The default number of times to retry a request."""
+
+
+class TokenBucket:
+    """Limits the rate of requests, allowing short bursts.
+
+    The bucket holds up to `capacity` tokens and gains tokens at a steady rate.
+    Each request takes one token, and waits for a token if the bucket is empty.
+    The methods can be called from any thread.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        capacity: float | None = None,
+        clock: typing.Callable[[], float] = time.monotonic,
+        sleep: typing.Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Create a new instance.
+
+        Args:
+            per_minute: The number of requests allowed each minute.
+            capacity: The largest burst of requests, defaults to one minute of requests.
+            clock: Gets the current time in seconds.
+            sleep: Waits for a number of seconds.
+        """
+        if per_minute <= 0:
+            msg = "Invalid per_minute."
+            raise ValueError(msg)
+        self._rate = per_minute / 60.0
+        self._capacity = capacity if capacity is not None else per_minute
+        if self._capacity < 1:
+            msg = "Invalid capacity."
+            raise ValueError(msg)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self._capacity
+        self._updated = clock()
+
+    def acquire(self) -> float:
+        """Take a token, waiting until one is available.
+
+        The token is reserved before waiting,
+        so threads waiting at the same time are given tokens in turn.
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._capacity,
+                self._tokens + (now - self._updated) * self._rate,
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Stop giving out tokens for a time, such as when the server is overloaded.
+
+        Args:
+            seconds: The number of seconds to pause for.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._tokens + (now - self._updated) * self._rate,
+                -seconds * self._rate,
+            )
+            self._updated = now
+
+
+@dataclasses.dataclass
+class Backoff:
+    """Exponential backoff with jitter for retrying requests."""
+
+    max_retries: int = DEFAULT_MAX_RETRIES
+    """the number of times to retry a request"""
+
+    base_seconds: float = 1.0
+    """the wait before the first retry"""
+
+    max_seconds: float = 64.0
+    """the longest wait before a retry"""
+
+    def delay(self, attempt: int, rng: random.Random | None = None) -> float:
+        """Get the number of seconds to wait before a retry.
+
+        The wait doubles for each attempt, up to the maximum,
+        and a random part of up to half the wait is removed,
+        so clients that failed at the same time do not retry at the same time.
+
+        Args:
+            attempt: The number of the retry, starting at 0.
+            rng: The random number generator.
+
+        Returns:
+            The number of seconds to wait.
+        """
+        # avoid an overflow for a large number of attempts
+        exponent = min(attempt, 32)
+        ceiling = min(self.max_seconds, self.base_seconds * 2.0**exponent)
+        uniform = rng.uniform if rng else random.uniform
+        return ceiling * uniform(0.5, 1.0)
+
+
+@dataclasses.dataclass
+class RequestStats:
+    """Counts of the requests sent, retried, and the time spent waiting."""
+
+    requests: int = 0
+    """the number of requests sent, including retries"""
+
+    retries: int = 0
+    """the number of requests sent again after a retryable error"""
+
+    failures: int = 0
+    """the number of requests that still failed after retrying"""
+
+    throttle_seconds: float = 0.0
+    """the time spent waiting for the rate limit"""
+
+    backoff_seconds: float = 0.0
+    """the time spent waiting before retries"""
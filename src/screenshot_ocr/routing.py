@@ -0,0 +1,142 @@
+"""Choose the spreadsheet to update for each screenshot."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import re
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+ROUTES_KEY = "routes"
+"""The key of the list of routes in the routes file."""
+
+DEFAULT_ROUTE_NAME = "default"
+"""The name used for the screenshots that do not match a route."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Route:
+    """Sends the screenshots with matching file names to a spreadsheet."""
+
+    name: str
+    """the name of the route, used in log messages"""
+
+    pattern: re.Pattern[str]
+    """the pattern to search for in the screenshot file name"""
+
+    spreadsheet_id: str
+    """the Google Docs spreadsheet id"""
+
+
+class SpreadsheetRouter:
+    """Chooses the spreadsheet for a screenshot using the first matching route.
+
+    The screenshots that do not match a route use the default spreadsheet.
+    The text file saved for a screenshot has the same name apart from the suffix,
+    so it is sent to the same spreadsheet as its image.
+    """
+
+    def __init__(self, routes: list[Route], default_spreadsheet_id: str) -> None:
+        """Create a new instance.
+
+        Args:
+            routes: The routes, in the order they are checked.
+            default_spreadsheet_id: The spreadsheet for screenshots
+                that do not match a route.
+        """
+        self.routes = routes
+        """the routes, in the order they are checked"""
+        self.default_spreadsheet_id = default_spreadsheet_id
+        """the spreadsheet for screenshots that do not match a route"""
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = {}
+
+    @property
+    def spreadsheet_ids(self) -> list[str]:
+        """The distinct spreadsheet ids, in the order they are checked."""
+        result = [i.spreadsheet_id for i in self.routes]
+        result.append(self.default_spreadsheet_id)
+        return list(dict.fromkeys(result))
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """The number of screenshots sent using each route name."""
+        with self._lock:
+            return dict(self._counts)
+
+    def spreadsheet_id(self, file_name: str, *, count: bool = False) -> str:
+        """Get the spreadsheet id for a screenshot.
+
+        Args:
+            file_name: The screenshot image or text file name.
+            count: Whether to include the screenshot in the counts.
+
+        Returns:
+            The spreadsheet id.
+        """
+        name = DEFAULT_ROUTE_NAME
+        result = self.default_spreadsheet_id
+        for route in self.routes:
+            if route.pattern.search(file_name):
+                name = route.name
+                result = route.spreadsheet_id
+                break
+        if count:
+            with self._lock:
+                self._counts[name] = self._counts.get(name, 0) + 1
+        return result
+
+
+def load_routes(routes_file: pathlib.Path) -> list[Route]:
+    """Read the routes from a JSON file.
+
+    The file contains an object with a list of routes,
+    each with a pattern and spreadsheet id, and optionally a name.
+    For example,
+    `{"routes": [{"pattern": "Isolation Trivia", "spreadsheet_id": "..."}]}`.
+
+    Args:
+        routes_file: The path to the routes file.
+
+    Returns:
+        The routes, in the order they are checked.
+    """
+    try:
+        content = json.loads(routes_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as error:
+        msg = f"Could not read routes file '{routes_file}': {error}"
+        raise ValueError(msg) from error
+
+    items = content.get(ROUTES_KEY) if isinstance(content, dict) else None
+    if not isinstance(items, list):
+        # the file content is not valid, rather than an argument
+        msg = f"The routes file '{routes_file}' must contain a '{ROUTES_KEY}' list."
+        raise ValueError(msg)  # noqa: TRY004
+
+    result = []
+    for index, item in enumerate(items, start=1):
+        pattern = item.get("pattern") if isinstance(item, dict) else None
+        spreadsheet_id = item.get("spreadsheet_id") if isinstance(item, dict) else None
+        if not pattern or not isinstance(pattern, str):
+            msg = f"Invalid pattern for route {index} in '{routes_file}'."
+            raise ValueError(msg)
+        if not spreadsheet_id or not isinstance(spreadsheet_id, str):
+            msg = f"Invalid spreadsheet_id for route {index} in '{routes_file}'."
+            raise ValueError(msg)
+        try:
+            compiled = re.compile(pattern)
+        except re.error as error:
+            msg = f"Invalid pattern for route {index} in '{routes_file}': {error}"
+            raise ValueError(msg) from error
+        result.append(
+            Route(
+                name=str(item.get("name") or f"route {index}"),
+                pattern=compiled,
+                spreadsheet_id=spreadsheet_id,
+            ),
+        )
+    return result
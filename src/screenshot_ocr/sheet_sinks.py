@@ -0,0 +1,365 @@
+"""Destinations for the spreadsheet cell updates."""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+SINK_GOOGLE = "google"
+"""Send the cell updates to a Google Docs spreadsheet."""
+
+SINK_SQLITE = "sqlite"
+"""Store the cells in a local SQLite file that acts like a spreadsheet."""
+
+SINK_MEMORY = "memory"
+"""Keep the cells in memory, which are lost at the end of the run."""
+
+SINKS = [SINK_GOOGLE, SINK_SQLITE, SINK_MEMORY]
+"""The available sheet sinks."""
+
+_RANGE_RE = re.compile(
+    r"'(?P<sheet>.*)'!(?P<first_col>[A-Z]+)(?P<first_row>\d*)"
+    r"(?::(?P<last_col>[A-Z]+)(?P<last_row>\d*))?",
+    re.DOTALL,
+)
+"""Matches a range in A1 notation with a quoted sheet name."""
+
+
+class SheetSink(typing.Protocol):
+    """The spreadsheet operations used to find sheets and update cells."""
+
+    def get_sheet_titles(self, ss_id: str) -> dict[str, int]:
+        """Get the sheet id for each sheet title."""
+
+    def create_sheets(
+        self,
+        ss_id: str,
+        titles: list[str],
+        template_title: str | None = None,
+    ) -> list[str]:
+        """Add sheets and get the titles of the sheets that were added."""
+
+    def get_spreadsheet_values(
+        self,
+        ss_id: str,
+        ranges: list[str],
+    ) -> list[list[list[str]]]:
+        """Get the rows of values for each range."""
+
+    def update_spreadsheet_cells(
+        self,
+        ss_id: str,
+        cells: list[tuple[str, str]],
+    ) -> dict[str, bool]:
+        """Update many cells and get whether each range was updated."""
+
+    def close(self) -> None:
+        """Release the connections or files used by the sink."""
+
+
+class MemorySheetSink:
+    """Keeps spreadsheet cells in memory, and acts like a Google Docs spreadsheet.
+
+    Like Google Sheets, a cell can only be updated if its sheet exists.
+    The methods can be called from any thread.
+    """
+
+    def __init__(self) -> None:
+        """Create a new instance."""
+        self._lock = threading.Lock()
+        # the sheet id for each title, keyed by spreadsheet id
+        self._sheets: dict[str, dict[str, int]] = {}
+        # the value of each cell by row and column number,
+        # keyed by spreadsheet id and sheet title
+        self._cells: dict[tuple[str, str], dict[tuple[int, int], str]] = {}
+
+        self.request_count = 0
+        """the number of requests received"""
+        self.updates: list[tuple[str, str, str]] = []
+        """the spreadsheet id, range, and value of each cell update"""
+
+    def get_sheet_titles(self, ss_id: str) -> dict[str, int]:
+        """Get the titles of the sheets in the spreadsheet.
+
+        Args:
+            ss_id: The spreadsheet id.
+
+        Returns:
+            The sheet id for each sheet title.
+        """
+        with self._lock:
+            self.request_count += 1
+            return dict(self._sheets.get(ss_id, {}))
+
+    def create_sheets(
+        self,
+        ss_id: str,
+        titles: list[str],
+        template_title: str | None = None,
+    ) -> list[str]:
+        """Add sheets to the spreadsheet.
+
+        Args:
+            ss_id: The spreadsheet id.
+            titles: The titles of the sheets to add.
+            template_title: The title of a sheet to copy,
+                or None to add blank sheets.
+
+        Returns:
+            The titles of the sheets that were added.
+        """
+        with self._lock:
+            self.request_count += 1
+            sheets = self._sheets.setdefault(ss_id, {})
+            template = (
+                self._cells.get((ss_id, template_title), {}) if template_title else {}
+            )
+            added = {}
+            for title in titles:
+                if title in sheets:
+                    continue
+                sheet_id = max(sheets.values(), default=-1) + 1
+                sheets[title] = sheet_id
+                added[title] = sheet_id
+                self._cells[(ss_id, title)] = dict(template)
+            self._save_sheets(ss_id, added, template)
+        return list(added)
+
+    def get_spreadsheet_values(
+        self,
+        ss_id: str,
+        ranges: list[str],
+    ) -> list[list[list[str]]]:
+        """Get the values of many ranges.
+
+        Args:
+            ss_id: The spreadsheet id.
+            ranges: The ranges in A1 notation.
+
+        Returns:
+            The rows of values for each range, in the same order as the ranges.
+            The rows start at the first row of the range,
+            and empty cells at the end of a row or range are not included.
+        """
+        result = []
+        with self._lock:
+            self.request_count += 1
+            for value_range in ranges:
+                sheet, first_col, first_row, last_col, last_row = parse_range(
+                    value_range,
+                )
+                cells = self._cells.get((ss_id, sheet), {})
+                result.append(
+                    _value_rows(cells, first_col, first_row, last_col, last_row),
+                )
+        return result
+
+    def update_spreadsheet_cells(
+        self,
+        ss_id: str,
+        cells: list[tuple[str, str]],
+    ) -> dict[str, bool]:
+        """Update many cells in the spreadsheet.
+
+        Args:
+            ss_id: The spreadsheet id.
+            cells: The range notation and value for each cell.
+
+        Returns:
+            Whether each range was updated, keyed by range notation.
+        """
+        results = {}
+        changes = []
+        with self._lock:
+            self.request_count += 1
+            for range_notation, value in cells:
+                sheet, col, row, _, _ = parse_range(range_notation)
+                self.updates.append((ss_id, range_notation, value))
+                if sheet not in self._sheets.get(ss_id, {}):
+                    results[range_notation] = False
+                    continue
+                self._cells[(ss_id, sheet)][(row, col)] = value
+                changes.append((sheet, row, col, value))
+                results[range_notation] = True
+            self._save_cells(ss_id, changes)
+        return results
+
+    def get_cell(self, ss_id: str, sheet_name: str, col: str, row: str) -> str | None:
+        """Get the value of a cell.
+
+        Args:
+            ss_id: The spreadsheet id.
+            sheet_name: The name of the sheet.
+            col: The column identifier.
+            row: The row identifier.
+
+        Returns:
+            The value, or None if the cell is empty.
+        """
+        with self._lock:
+            cells = self._cells.get((ss_id, sheet_name), {})
+            return cells.get((int(row), _col_number(col)))
+
+    def close(self) -> None:
+        """Close the sink, which is not needed for the memory sink."""
+
+    def _save_sheets(
+        self,
+        ss_id: str,
+        added: dict[str, int],
+        template: dict[tuple[int, int], str],
+    ) -> None:
+        """Store added sheets, which is not needed for the memory sink."""
+
+    def _save_cells(
+        self,
+        ss_id: str,
+        changes: list[tuple[str, int, int, str]],
+    ) -> None:
+        """Store updated cells, which is not needed for the memory sink."""
+
+
+class SqliteSheetSink(MemorySheetSink):
+    """Keeps spreadsheet cells in a SQLite file, and acts like a Google spreadsheet.
+
+    The cells are loaded when the sink is created,
+    and each change is saved before the method returns.
+    """
+
+    def __init__(self, db_file: pathlib.Path) -> None:
+        """Create a new instance.
+
+        Args:
+            db_file: The path to the SQLite database file.
+        """
+        super().__init__()
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._db_file = db_file
+        self._conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheets ("
+            "spreadsheet_id TEXT NOT NULL, "
+            "title TEXT NOT NULL, "
+            "sheet_id INTEGER NOT NULL, "
+            "PRIMARY KEY (spreadsheet_id, title))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cells ("
+            "spreadsheet_id TEXT NOT NULL, "
+            "title TEXT NOT NULL, "
+            "row INTEGER NOT NULL, "
+            "col INTEGER NOT NULL, "
+            "value TEXT NOT NULL, "
+            "PRIMARY KEY (spreadsheet_id, title, row, col))"
+        )
+        self._conn.commit()
+
+        for ss_id, title, sheet_id in self._conn.execute(
+            "SELECT spreadsheet_id, title, sheet_id FROM sheets",
+        ):
+            self._sheets.setdefault(ss_id, {})[title] = sheet_id
+            self._cells[(ss_id, title)] = {}
+        for ss_id, title, row, col, value in self._conn.execute(
+            "SELECT spreadsheet_id, title, row, col, value FROM cells",
+        ):
+            self._cells.setdefault((ss_id, title), {})[(row, col)] = value
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _save_sheets(
+        self,
+        ss_id: str,
+        added: dict[str, int],
+        template: dict[tuple[int, int], str],
+    ) -> None:
+        """Store added sheets and the cells copied from the template."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO sheets VALUES (?, ?, ?)",
+            [(ss_id, title, sheet_id) for title, sheet_id in added.items()],
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?)",
+            [
+                (ss_id, title, row, col, value)
+                for title in added
+                for (row, col), value in template.items()
+            ],
+        )
+        self._conn.commit()
+
+    def _save_cells(
+        self,
+        ss_id: str,
+        changes: list[tuple[str, int, int, str]],
+    ) -> None:
+        """Store updated cells."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?)",
+            [(ss_id, title, row, col, value) for title, row, col, value in changes],
+        )
+        self._conn.commit()
+
+
+def parse_range(range_notation: str) -> tuple[str, int, int, int, int]:
+    """Get the sheet and the bounds of a range in A1 notation.
+
+    Args:
+        range_notation: The range, such as `'Sheet'!B3:B3` or `'Sheet'!B:D`.
+
+    Returns:
+        The sheet name, first column number, first row number,
+        last column number, and last row number.
+        A range of whole columns has first row 1 and last row 0.
+    """
+    match = _RANGE_RE.fullmatch(range_notation)
+    if not match:
+        msg = f"Invalid range '{range_notation}'."
+        raise ValueError(msg)
+    first_col = _col_number(match.group("first_col"))
+    first_row = int(match.group("first_row") or 1)
+    last_col = _col_number(match.group("last_col") or match.group("first_col"))
+    last_row = int(match.group("last_row") or (match.group("first_row") or 0))
+    return match.group("sheet"), first_col, first_row, last_col, last_row
+
+
+def _col_number(col: str) -> int:
+    """Get the number of a column, starting at 1 for column A."""
+    result = 0
+    for letter in col:
+        result = result * 26 + ord(letter) - ord("A") + 1
+    return result
+
+
+def _value_rows(
+    cells: dict[tuple[int, int], str],
+    first_col: int,
+    first_row: int,
+    last_col: int,
+    last_row: int,
+) -> list[list[str]]:
+    """Get the rows of values in a range, without empty cells at the end."""
+    in_range = {
+        (row, col): value
+        for (row, col), value in cells.items()
+        if first_col <= col <= last_col
+        and row >= first_row
+        and (not last_row or row <= last_row)
+    }
+    rows = []
+    for row in range(first_row, max((row for row, _ in in_range), default=0) + 1):
+        width = max(
+            (col - first_col + 1 for cell_row, col in in_range if cell_row == row),
+            default=0,
+        )
+        rows.append(
+            [in_range.get((row, first_col + index), "") for index in range(width)],
+        )
+    return rows
@@ -3,15 +3,20 @@
 from __future__ import annotations
 
 import logging
+import os
+import queue
 import re
+import threading
 import typing
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
+from screenshot_ocr import question_parser
+
 if TYPE_CHECKING:
     import pathlib
 
-    from screenshot_ocr import google_sheets
+    from screenshot_ocr import directory_index, google_sheets, ocr_layout
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +26,14 @@ class TriviaHelper:
 
     def __init__(
         self,
-        sheets_helper: google_sheets.GoogleSheetsHelper,
+        sheets_helper: google_sheets.GoogleSheetsHelper
+        | google_sheets.SheetsBatchWriter,
         spreadsheet_id: str,
     ) -> None:
         """Create a new instance.
 
         Args:
-            sheets_helper: The Google Docs spreadsheet helper.
+            sheets_helper: The Google Docs spreadsheet helper or batch writer.
             spreadsheet_id: The Google Docs spreadsheet identifier.
         """
         self.ss_client = sheets_helper
@@ -42,56 +48,26 @@ class TriviaHelper:
         Returns:
             A tuple containing the question number, points, and text.
         """
-        # output
-        number = None
-        points = 1
-        text = ""
-
-        # initial
-        fixes = {
-            "i": "1",
-            "l": "1",
-            "o": "0",
-        }
-        num_map = {
-            "one": 1,
-            "two": 2,
-            "three": 3,
-            "four": 4,
-            "five": 5,
-        }
-        key_question = "question"
-        re_points = re.compile(r"(?P<num>(one|two|three|four|five))\s+points?")
-
-        for line in value.splitlines():
-            line_strip = line.strip()
-            if not line_strip:
-                continue
-
-            line_lower = line_strip.casefold()
-
-            if key_question in line_lower and not number:
-                start_index = line_lower.index(key_question) + len(key_question)
-                raw = list(line_lower[start_index:].strip())
-
-                for index, char in enumerate(raw):
-                    if char in fixes:
-                        raw[index] = fixes[char]
-
-                number_raw = "".join(raw)
-                if all(c.isdigit() for c in number_raw):
-                    number = int(number_raw)
-                    continue
-
-            match = re_points.search(line_lower)
-            if match and points == 1:
-                num_word = match.group("num")
-                points = num_map[num_word]
-
-            text += " " + line.strip()
-
-        text = text.strip()
-        return number, points, text
+        return question_parser.parse_question_text(value)
+
+    def get_layout_details(
+        self,
+        layout: ocr_layout.OcrLayout,
+        min_confidence: float,
+    ) -> tuple[int | None, int | None, str]:
+        """Parse the words found by OCR to get the question number, points, and text.
+
+        The position and confidence of the words are used
+        to find the question number line and leave out the other screen text.
+
+        Args:
+            layout: The words from the screenshot.
+            min_confidence: The lowest confidence of the words to keep.
+
+        Returns:
+            A tuple containing the question number, points, and text.
+        """
+        return question_parser.parse_question_layout(layout, min_confidence)
 
     def update_trivia_cell(
         self,
@@ -99,6 +75,7 @@ class TriviaHelper:
         points: int,
         text: str,
         sheet_date: datetime | None = None,
+        spreadsheet_id: str | None = None,
     ) -> bool:
         """Update the Google Docs spreadsheet cell for the question number and text.
 
@@ -107,10 +84,47 @@ class TriviaHelper:
             points: The points for the question.
             text: The question text.
             sheet_date: The date to use to find the sheet.
+            spreadsheet_id: The spreadsheet to update,
+                defaults to the spreadsheet of this helper.
 
         Returns:
             True if the cell was successfully updated, otherwise False.
         """
+        cells = self.get_trivia_cells(number, points, text, sheet_date=sheet_date)
+        if not cells:
+            return False
+
+        results = [
+            self.ss_client.update_spreadsheet_cell(
+                spreadsheet_id or self.ss_id,
+                sheet_name,
+                col,
+                row,
+                value,
+            )
+            for sheet_name, col, row, value in cells
+        ]
+        return all(results)
+
+    def get_trivia_cells(
+        self,
+        number: int | None,
+        points: int | None,
+        text: str,
+        sheet_date: datetime | None = None,
+    ) -> list[tuple[str, str, str, str]]:
+        """Get the Google Docs spreadsheet cells for the question number and text.
+
+        Args:
+            number: The question number.
+            points: The points for the question.
+            text: The question text.
+            sheet_date: The date to use to find the sheet.
+
+        Returns:
+            The sheet name, column, row, and value for each cell,
+            or an empty list if the question does not have cells.
+        """
         first_group_start = 1
         # first_group_end = 15
         second_group_start = 16
@@ -122,7 +136,7 @@ class TriviaHelper:
         second_group_row_offset = 5
 
         if not number or first_group_start > number >= second_group_end or not text:
-            return False
+            return []
 
         if not sheet_date:
             sheet_date = datetime.now(timezone.utc)
@@ -134,65 +148,252 @@ class TriviaHelper:
             if number < second_group_start
             else str(number + second_group_row_offset)
         )
-        result_text = self.ss_client.update_spreadsheet_cell(
-            self.ss_id,
-            sheet_name,
-            col_text,
-            row,
-            text,
-        )
-        result_points = None
+        cells = [(sheet_name, col_text, row, text)]
         if points is not None:
-            result_points = self.ss_client.update_spreadsheet_cell(
-                self.ss_id,
-                sheet_name,
-                col_points,
-                row,
-                str(points),
-            )
-
-        return result_text and (result_points if points is not None else True)
+            cells.append((sheet_name, col_points, row, str(points)))
+        return cells
 
     def find_screenshot_images(
         self,
         image_dir: pathlib.Path,
+        dir_index: directory_index.DirectoryIndex | None = None,
+        *,
+        recursive: bool = False,
     ) -> typing.Iterable[tuple[pathlib.Path, datetime | None]]:
         """Yield the FireFox screenshot files.
 
         Args:
             image_dir: The directory containing image files.
+            dir_index: The index of the screenshot files in each directory,
+                used to skip reading a directory that has not changed.
+            recursive: Whether to also look in the subdirectories.
 
         Returns:
             An iterable of tuple image file path and date extracted from file name.
         """
-        suffixes = [i.casefold() for i in [".png", ".jpeg", ".jpg"]]
-        date_re = re.compile(r"(?P<date>\d{4}-\d{2}-\d{2})")
-
         logger.info("Looking for screenshot images in '%s'.", image_dir)
         count = 0
-        for file_path in image_dir.iterdir():
-            if not file_path.is_file():
-                continue
-            if file_path.suffix.casefold() not in suffixes:
-                continue
-            if not file_path.stem.startswith("Screenshot "):
-                continue
-
-            is_fb = "Facebook" in file_path.stem
-            is_iso_triv = "Isolation Trivia" in file_path.stem
-            if not is_fb and not is_iso_triv:
-                continue
-
-            # extract the date from the screenshot file name
-            date_match = date_re.search(file_path.stem)
-            if date_match:
-                found_date = datetime.fromisoformat(date_match.group("date")).replace(
-                    tzinfo=timezone.utc,
-                )
+        indexed = 0
+
+        directories = [image_dir]
+        while directories:
+            directory = directories.pop()
+            dir_stat = directory.stat() if dir_index else None
+            cached = (
+                dir_index.get(directory, dir_stat) if dir_index and dir_stat else None
+            )
+            if cached is not None:
+                indexed += 1
+                names, dirs = cached
+                for name in names:
+                    is_screenshot, found_date = _match_screenshot_name(
+                        _IMAGE_NAME_RE,
+                        name,
+                    )
+                    if is_screenshot:
+                        count += 1
+                        yield directory / name, found_date
+            else:
+                names = []
+                dirs = []
+                for file_path, found_date in _scan_screenshot_files(
+                    directory,
+                    _IMAGE_NAME_RE,
+                    dirs,
+                ):
+                    names.append(file_path.name)
+                    count += 1
+                    yield file_path, found_date
+                if dir_index and dir_stat:
+                    dir_index.put(directory, dir_stat, names, dirs)
+
+            if recursive:
+                directories.extend(directory / name for name in reversed(dirs))
+
+        if indexed:
+            logger.info(
+                "Used the directory index for %s unchanged directories.", indexed
+            )
+        logger.info("Found %s screenshot images.", count)
+
+    def find_screenshot_images_in_dirs(
+        self,
+        image_dirs: list[pathlib.Path],
+        dir_index: directory_index.DirectoryIndex | None = None,
+        *,
+        recursive: bool = False,
+    ) -> typing.Iterable[tuple[pathlib.Path, datetime | None]]:
+        """Yield the FireFox screenshot files from several directories.
+
+        Each directory is read in a separate thread,
+        so a slow directory, such as a network share, does not delay the others.
+        The images are yielded in the order they are found.
+
+        Args:
+            image_dirs: The directories containing image files.
+            dir_index: The index of the screenshot files in each directory.
+            recursive: Whether to also look in the subdirectories.
+
+        Returns:
+            An iterable of tuple image file path and date extracted from file name.
+        """
+        if len(image_dirs) == 1:
+            yield from self.find_screenshot_images(
+                image_dirs[0],
+                dir_index,
+                recursive=recursive,
+            )
+            return
+
+        found: queue.SimpleQueue[typing.Any] = queue.SimpleQueue()
+        done = object()
+
+        def _find(image_dir: pathlib.Path) -> None:
+            try:
+                for item in self.find_screenshot_images(
+                    image_dir,
+                    dir_index,
+                    recursive=recursive,
+                ):
+                    found.put(item)
+            except Exception as error:  # noqa: BLE001
+                # raised in the thread that reads the results
+                found.put(error)
+            finally:
+                found.put(done)
+
+        for index, image_dir in enumerate(image_dirs):
+            thread = threading.Thread(
+                target=_find,
+                args=(image_dir,),
+                name=f"discover-{index}",
+                daemon=True,
+            )
+            thread.start()
+
+        remaining = len(image_dirs)
+        while remaining:
+            item = found.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
             else:
-                found_date = None
+                yield item
 
+    def get_screenshot_image_details(
+        self,
+        file_path: pathlib.Path,
+    ) -> tuple[bool, datetime | None]:
+        """Check whether a file is a FireFox screenshot file.
+
+        Args:
+            file_path: The path to the file.
+
+        Returns:
+            A tuple of whether the file is a screenshot
+            and the date extracted from file name.
+        """
+        return _match_screenshot_name(_IMAGE_NAME_RE, file_path.name)
+
+    def find_screenshot_text_files(
+        self,
+        text_dir: pathlib.Path,
+    ) -> typing.Iterable[tuple[pathlib.Path, datetime | None]]:
+        """Yield the text files saved for FireFox screenshot files.
+
+        Args:
+            text_dir: The directory containing the text files.
+
+        Returns:
+            An iterable of tuple text file path and date extracted from file name.
+        """
+        logger.info("Looking for screenshot text files in '%s'.", text_dir)
+        count = 0
+        text_files = sorted(_scan_screenshot_files(text_dir, _TEXT_NAME_RE))
+        for file_path, found_date in text_files:
             count += 1
             yield file_path, found_date
 
-        logger.info("Found %s screenshot images.", count)
+        logger.info("Found %s screenshot text files.", count)
+
+
+def _build_screenshot_name_re(suffixes: str) -> re.Pattern[str]:
+    """Build the pattern that matches FireFox screenshot file names.
+
+    The name starts with 'Screenshot ', contains 'Facebook' or 'Isolation Trivia',
+    and ends with one of the suffixes, ignoring case.
+    The first date in the name is captured.
+
+    Args:
+        suffixes: The file name suffixes as a regular expression, without the dot.
+
+    Returns:
+        The compiled pattern, to be used with `fullmatch`.
+    """
+    return re.compile(
+        r"Screenshot (?=.*(?:Facebook|Isolation Trivia))"
+        r"(?:.*?(?P<date>\d{4}-\d{2}-\d{2}))?"
+        rf".*\.(?i:{suffixes})",
+        re.DOTALL,
+    )
+
+
+_IMAGE_NAME_RE = _build_screenshot_name_re("png|jpeg|jpg")
+"""Matches the file names of screenshot images."""
+
+_TEXT_NAME_RE = _build_screenshot_name_re("txt")
+"""Matches the file names of the text files saved for screenshot images."""
+
+
+def _match_screenshot_name(
+    pattern: re.Pattern[str],
+    name: str,
+) -> tuple[bool, datetime | None]:
+    """Check whether a file name is for a FireFox screenshot.
+
+    Args:
+        pattern: The file name pattern.
+        name: The file name.
+
+    Returns:
+        A tuple of whether the file name is for a screenshot
+        and the date extracted from file name.
+    """
+    match = pattern.fullmatch(name)
+    if not match:
+        return False, None
+
+    # extract the date from the screenshot file name
+    date_text = match.group("date")
+    if not date_text:
+        return True, None
+    return True, datetime.fromisoformat(date_text).replace(tzinfo=timezone.utc)
+
+
+def _scan_screenshot_files(
+    directory: pathlib.Path,
+    pattern: re.Pattern[str],
+    dirs: list[str] | None = None,
+) -> typing.Iterator[tuple[pathlib.Path, datetime | None]]:
+    """Read a directory once and yield the screenshot files.
+
+    Uses the file type from reading the directory where available,
+    so only the files with a matching name might need a stat call.
+
+    Args:
+        directory: The directory to read.
+        pattern: The file name pattern.
+        dirs: The subdirectory names are added to this list,
+            not including links to directories.
+
+    Returns:
+        An iterator of tuple file path and date extracted from file name.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            is_screenshot, found_date = _match_screenshot_name(pattern, entry.name)
+            if is_screenshot and entry.is_file():
+                yield directory / entry.name, found_date
+            elif dirs is not None and entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
@@ -2,7 +2,13 @@
 
 from __future__ import annotations
 
+import errno
 import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import uuid
 
 from importlib_metadata import PackageNotFoundError, distribution
 from importlib_resources import as_file, files
@@ -59,3 +65,73 @@ def log_exception(error: Exception) -> None:
         error.__class__.__name__,
         str(error),
     )
+
+
+def move_file(src: pathlib.Path, dst: pathlib.Path) -> None:
+    """Move a file, using an atomic rename when possible.
+
+    A rename does not read or write the file content.
+    When the destination is on a different file system,
+    the file is copied to a temporary file next to the destination,
+    which is then renamed, so the destination is never partly written.
+
+    Args:
+        src: The path to the file to move.
+        dst: The new path for the file, which is replaced if it exists.
+    """
+    try:
+        src.replace(dst)
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+    else:
+        return
+
+    fd, temp_name = tempfile.mkstemp(
+        dir=dst.parent,
+        prefix=f".{dst.name}.",
+        suffix=".tmp",
+    )
+    temp_path = pathlib.Path(temp_name)
+    try:
+        with os.fdopen(fd, "wb") as temp_file, src.open("rb") as src_file:
+            shutil.copyfileobj(src_file, temp_file)
+        shutil.copystat(src, temp_path)
+        temp_path.replace(dst)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    src.unlink()
+
+
+def write_text_atomic(
+    path: pathlib.Path,
+    content: str,
+    encoding: str | None = None,
+    *,
+    sync: bool = True,
+) -> None:
+    """Write a text file in one step, so a partly written file is never seen.
+
+    The content is written to a temporary file next to the path,
+    which then replaces the file.
+
+    Args:
+        path: The path to the file.
+        content: The text to write.
+        encoding: The text encoding, defaults to the locale encoding.
+        sync: Whether to wait until the content is written to disk
+            before replacing the file,
+            so after a crash the file has either the old or the new content.
+    """
+    temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with temp_path.open("w", encoding=encoding) as temp_file:
+            temp_file.write(content)
+            if sync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        temp_path.replace(path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
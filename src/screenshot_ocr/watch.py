@@ -0,0 +1,335 @@
+"""Watch a directory for new and changed files."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import pathlib
+import select
+import struct
+import sys
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+# inotify event masks from sys/inotify.h
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_IN_EVENT_HEADER = struct.Struct("iIII")
+
+
+class DirectoryWatcher:
+    """Reports files in a directory that are new or have changed.
+
+    Uses inotify on Linux, and polls the directory on other platforms
+    or when inotify is not available.
+    A file is only reported once it has been closed after writing,
+    or its size and modified time have not changed for `settle_seconds`,
+    so that partially written files are not reported.
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        settle_seconds: float = 0.5,
+        poll_interval: float = 0.25,
+        *,
+        recursive: bool = False,
+    ) -> None:
+        """Create a new instance.
+
+        Args:
+            directory: The directory to watch.
+            settle_seconds: The time a file must be unchanged to be reported.
+            poll_interval: The time between checks of the directory.
+            recursive: Whether to also watch the subdirectories,
+                including subdirectories created while watching.
+        """
+        self._directory = directory
+        self._settle_seconds = settle_seconds
+        self._poll_interval = poll_interval
+        self._recursive = recursive
+        # the directory watched by each inotify watch descriptor
+        self._watch_dirs: dict[int, pathlib.Path] = {}
+        self._inotify_add_watch: typing.Callable[[int, bytes, int], int] | None = None
+
+        # the size and modified time of the files that have been reported
+        self._known = self._scan()
+        # the size, modified time, and time of last change of the pending files
+        self._pending: dict[pathlib.Path, tuple[int, int, float]] = {}
+        # files that have been closed after writing
+        self._closed: set[pathlib.Path] = set()
+
+        self._inotify_fd = self._start_inotify()
+        self.uses_inotify = self._inotify_fd is not None
+        """whether the watcher is using inotify instead of polling"""
+
+    @property
+    def directory(self) -> pathlib.Path:
+        """The directory being watched."""
+        return self._directory
+
+    def wait(self, timeout: float) -> list[pathlib.Path]:
+        """Wait for files to be created or changed.
+
+        Args:
+            timeout: The maximum time to wait in seconds.
+
+        Returns:
+            The files that are new or changed and are not being written to.
+        """
+        end = time.monotonic() + timeout
+        while True:
+            remaining = end - time.monotonic()
+            wait_time = max(0.0, min(self._poll_interval, remaining))
+
+            if self._inotify_fd is not None:
+                self._read_inotify(wait_time)
+            else:
+                time.sleep(wait_time)
+                self._poll()
+
+            ready = self._settled()
+            if ready or remaining <= 0:
+                return ready
+
+    def close(self) -> None:
+        """Stop watching the directory."""
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _scan(self) -> dict[pathlib.Path, tuple[int, int]]:
+        """Get the size and modified time of the files in the directory."""
+        result = {}
+        directories = [self._directory]
+        while directories:
+            files, subdirectories = self._scan_directory(directories.pop())
+            result.update(files)
+            if self._recursive:
+                directories.extend(subdirectories)
+        return result
+
+    def _scan_directory(
+        self,
+        directory: pathlib.Path,
+    ) -> tuple[dict[pathlib.Path, tuple[int, int]], list[pathlib.Path]]:
+        """Get the files and subdirectories in one directory.
+
+        Args:
+            directory: The directory to read.
+
+        Returns:
+            The size and modified time of the files, and the subdirectories.
+        """
+        files = {}
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(pathlib.Path(entry.path))
+                        continue
+                    if not entry.is_file():
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[pathlib.Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            # the directory was removed after it was found
+            pass
+        return files, subdirectories
+
+    def _poll(self) -> None:
+        """Find new and changed files by comparing the directory contents."""
+        for path, details in self._scan().items():
+            if self._known.get(path) != details and path not in self._pending:
+                self._add_pending(path)
+
+    def _add_pending(self, path: pathlib.Path) -> None:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return
+        self._pending[path] = (stat.st_size, stat.st_mtime_ns, time.monotonic())
+
+    def _settled(self) -> list[pathlib.Path]:
+        """Get the pending files that are no longer being written to."""
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime_ns, changed) in list(self._pending.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                del self._pending[path]
+                self._closed.discard(path)
+                continue
+
+            details = (stat.st_size, stat.st_mtime_ns)
+            if details != (size, mtime_ns):
+                self._pending[path] = (*details, now)
+                continue
+
+            if path in self._closed or now - changed >= self._settle_seconds:
+                del self._pending[path]
+                self._closed.discard(path)
+                self._known[path] = details
+                ready.append(path)
+
+        return sorted(ready)
+
+    def _start_inotify(self) -> int | None:
+        """Start watching the directory using inotify, if available."""
+        if not sys.platform.startswith("linux"):
+            return None
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError) as error:
+            logger.warning(
+                "Could not load inotify, checking for changes instead: %s",
+                error,
+            )
+            return None
+
+        fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logger.warning(
+                "Could not start inotify, checking for changes instead: %s",
+                os.strerror(ctypes.get_errno()),
+            )
+            return None
+
+        self._inotify_add_watch = inotify_add_watch
+        if self._add_watches(fd, self._directory) is None:
+            os.close(fd)
+            return None
+
+        return int(fd)
+
+    def _add_watches(
+        self,
+        fd: int,
+        directory: pathlib.Path,
+    ) -> dict[pathlib.Path, tuple[int, int]] | None:
+        """Watch a directory using inotify, and its subdirectories when recursive.
+
+        Args:
+            fd: The inotify file descriptor.
+            directory: The directory to watch.
+
+        Returns:
+            The size and modified time of the files in the watched directories,
+            or None if a directory could not be watched.
+        """
+        if self._inotify_add_watch is None:
+            return None
+
+        found = {}
+        directories = [directory]
+        while directories:
+            current = directories.pop()
+            watch = self._inotify_add_watch(fd, os.fsencode(current), _IN_WATCH_MASK)
+            if watch < 0:
+                logger.warning(
+                    "Could not watch '%s' using inotify, "
+                    "checking for changes instead: %s",
+                    current,
+                    os.strerror(ctypes.get_errno()),
+                )
+                return None
+            self._watch_dirs[watch] = current
+
+            # files can be added before the watch starts, so read the directory
+            files, subdirectories = self._scan_directory(current)
+            found.update(files)
+            if self._recursive:
+                directories.extend(subdirectories)
+        return found
+
+    def _add_directory(self, directory: pathlib.Path) -> None:
+        """Start watching a subdirectory, and add the new files it already has.
+
+        Args:
+            directory: The new subdirectory.
+        """
+        if self._inotify_fd is None:
+            return
+
+        found = self._add_watches(self._inotify_fd, directory)
+        if found is None:
+            # compare the directory contents instead, so no files are missed
+            self.close()
+            self.uses_inotify = False
+            self._poll()
+            return
+        for path, details in found.items():
+            if self._known.get(path) != details:
+                self._add_pending(path)
+
+    def _read_inotify(self, wait_time: float) -> None:
+        """Read the inotify events and add the changed files to the pending files."""
+        if self._inotify_fd is None:
+            return
+
+        readable, _, _ = select.select([self._inotify_fd], [], [], wait_time)
+        if not readable:
+            return
+
+        try:
+            data = os.read(self._inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset + _IN_EVENT_HEADER.size <= len(data):
+            watch, mask, _, name_len = _IN_EVENT_HEADER.unpack_from(data, offset)
+            offset += _IN_EVENT_HEADER.size
+            name = data[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+            self._handle_inotify_event(watch, mask, name)
+
+    def _handle_inotify_event(self, watch: int, mask: int, name: bytes) -> None:
+        """Add the file changed by one inotify event to the pending files.
+
+        Args:
+            watch: The watch descriptor of the directory.
+            mask: The event mask.
+            name: The name of the file or subdirectory in the directory.
+        """
+        if mask & _IN_Q_OVERFLOW:
+            # events were lost, so compare the directory contents instead
+            self._poll()
+            if self._recursive:
+                # and watch any subdirectories that were created
+                self._add_directory(self._directory)
+            return
+        if mask & _IN_IGNORED:
+            # the watched directory was removed
+            self._watch_dirs.pop(watch, None)
+            return
+        directory = self._watch_dirs.get(watch)
+        if not name or directory is None:
+            return
+
+        path = directory / os.fsdecode(name)
+        if mask & _IN_ISDIR:
+            if self._recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                self._add_directory(path)
+            return
+        self._add_pending(path)
+        if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+            self._closed.add(path)
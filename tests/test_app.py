@@ -0,0 +1,789 @@
+import dataclasses
+import io
+import json
+import pathlib
+import random
+import threading
+import time
+
+import pytest
+from screenshot_ocr import app
+
+
+class FakeOcrHelper:
+    engine_id = "fake|1.0"
+    run_count = 0
+
+    def __init__(
+        self,
+        exe_path,
+        data_dir,
+        output_format=app.ocr.OCR_OUTPUT_TEXT,
+        options=None,
+    ):
+        self.exe_path = exe_path
+        self.data_dir = data_dir
+        self.output_format = output_format
+        self.options = options
+
+    def run(self, image_file, _image_data=None):
+        FakeOcrHelper.run_count += 1
+        # finish in a different order to the order the images were submitted
+        time.sleep(random.uniform(0, 0.02))
+        number = int(image_file.stem.rsplit("-", 1)[-1].split(" ")[0])
+        return f"QUESTION {number}\nbody text {number}"
+
+    def close(self):
+        pass
+
+
+class FakeSheetsHelper:
+    fail = False
+    sheet_titles = ("2023-06-16 Fri",)
+
+    def __init__(self, _credentials_file, _token_file, **_kwargs):
+        self.updates = []
+        self.closed = False
+
+    def get_sheet_titles(self, _ss_id):
+        return {title: index for index, title in enumerate(self.sheet_titles)}
+
+    def update_spreadsheet_cells(self, ss_id, cells):
+        self.updates.extend(
+            (ss_id, range_notation, value) for range_notation, value in cells
+        )
+        return {range_notation: not self.fail for range_notation, _ in cells}
+
+    def close(self):
+        self.closed = True
+
+
+def _build_app_args(tmp_path, **kwargs):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for index in range(1, 13):
+        name = f"Screenshot 2023-06-16 at 18-49-{index:02} Facebook.png"
+        (input_dir / name).touch()
+
+    values = {
+        "spreadsheet_id": "ss-id",
+        "input_dir": input_dir,
+        "output_dir": tmp_path / "output",
+        "tesseract_exe": tmp_path / "tesseract",
+        "tesseract_data": tmp_path / "tessdata",
+        "move_images": True,
+        "google_credentials": tmp_path / "credentials.json",
+        "google_token": tmp_path / "token.json",
+    }
+    values.update(kwargs)
+    return app.AppArgs(**values)
+
+
+def test_app_run_workers_keeps_order(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+
+    app_args = _build_app_args(tmp_path, workers=4, persist_workers=3, queue_size=2)
+    expected_order = [
+        int(path.stem.rsplit("-", 1)[-1].split(" ")[0])
+        for path, _ in app.trivia.TriviaHelper(None, None).find_screenshot_images(
+            app_args.input_dir,
+        )
+    ]
+
+    assert app.App().run(app_args) is True
+
+    (sheets_helper,) = sheets_helpers
+    texts = [value for _, cell, value in sheets_helper.updates if "!B" in cell]
+    assert texts == [f"body text {number}" for number in expected_order]
+    assert sorted(p.name for p in app_args.output_dir.iterdir()) == sorted(
+        [f"Screenshot 2023-06-16 at 18-49-{i:02} Facebook.png" for i in range(1, 13)]
+        + [f"Screenshot 2023-06-16 at 18-49-{i:02} Facebook.txt" for i in range(1, 13)]
+    )
+    assert list(app_args.input_dir.iterdir()) == []
+
+
+def test_app_run_workers_error_fails(tmp_path, monkeypatch):
+    class _FailingOcrHelper(FakeOcrHelper):
+        def run(self, _image_file):
+            msg = "tesseract failed"
+            raise RuntimeError(msg)
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", _FailingOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+
+    app_args = _build_app_args(tmp_path, workers=3)
+    assert app.App().run(app_args) is False
+
+
+def test_app_run_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+    monkeypatch.setattr(FakeOcrHelper, "run_count", 0)
+
+    app_args = _build_app_args(
+        tmp_path,
+        workers=2,
+        move_images=False,
+        cache_dir=tmp_path / "cache",
+    )
+    for index, image_file in enumerate(sorted(app_args.input_dir.iterdir())):
+        image_file.write_bytes(f"image {index}".encode())
+
+    image_count = 12
+
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+
+    app_args.clear_cache = True
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count * 2
+
+
+def test_app_run_manifest(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+    monkeypatch.setattr(FakeOcrHelper, "run_count", 0)
+    monkeypatch.setattr(FakeSheetsHelper, "fail", True)
+
+    app_args = _build_app_args(
+        tmp_path,
+        workers=2,
+        move_images=False,
+        manifest_file=tmp_path / "manifest.sqlite3",
+    )
+    image_count = 12
+    cell_count = image_count * 2
+
+    # the spreadsheet updates fail
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+    assert len(sheets_helpers[-1].updates) == cell_count
+
+    # the images are not processed again, the spreadsheet updates are retried
+    monkeypatch.setattr(FakeSheetsHelper, "fail", False)
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+    assert len(sheets_helpers[-1].updates) == cell_count
+
+    # nothing to do
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+    assert sheets_helpers[-1].updates == []
+
+    # a changed image is processed again
+    changed_file = sorted(app_args.input_dir.iterdir())[0]
+    changed_file.write_bytes(b"changed")
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count + 1
+    expected_cells = 2
+    assert len(sheets_helpers[-1].updates) == expected_cells
+
+    # the images are sent again to a different spreadsheet
+    other_args = dataclasses.replace(app_args, spreadsheet_id="ss-other")
+    assert app.App().run(other_args) is True
+    assert FakeOcrHelper.run_count == image_count * 2 + 1
+    assert {i[0] for i in sheets_helpers[-1].updates} == {"ss-other"}
+    assert len(sheets_helpers[-1].updates) == cell_count
+    assert app.App().run(other_args) is True
+    assert sheets_helpers[-1].updates == []
+
+
+def test_app_run_watch(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+
+    app_args = _build_app_args(tmp_path, workers=2, watch=True)
+    app_instance = app.App()
+    results = []
+    thread = threading.Thread(target=lambda: results.append(app_instance.run(app_args)))
+    thread.start()
+    try:
+        # wait for the existing images to be processed
+        deadline = time.monotonic() + 5
+        while list(app_args.input_dir.iterdir()) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        name = "Screenshot 2023-06-16 at 18-49-20 Facebook.png"
+        (app_args.input_dir / name).write_bytes(b"new image")
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            texts = [v for _, cell, v in sheets_helpers[0].updates if "!B" in cell]
+            if "body text 20" in texts:
+                break
+            time.sleep(0.05)
+    finally:
+        app_instance.stop()
+        thread.join(timeout=5)
+
+    assert results == [True]
+    assert "body text 20" in texts
+    assert (app_args.output_dir / name).exists()
+
+
+def test_app_run_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+
+    metrics_file = tmp_path / "metrics.json"
+    app_args = _build_app_args(
+        tmp_path,
+        workers=2,
+        batch_size=10,
+        metrics_file=metrics_file,
+    )
+
+    assert app.App().run(app_args) is True
+
+    values = json.loads(metrics_file.read_text())
+    image_count = 12
+    stages = values["stages"]
+    for stage in ["ocr", "parse", "persist", "sheet"]:
+        assert stages[stage]["count"] == image_count
+    # one more call to find that there are no more images
+    assert stages["discover"]["count"] == image_count + 1
+    # 24 cells sent in batches of 10
+    expected_api_calls = 3
+    assert stages["sheets_api"]["count"] == expected_api_calls
+    assert values["counters"] == {
+        # each image is read once, and the content is sent to OCR
+        "bytes_read": 0,
+        "images": image_count,
+        "ocr_runs": image_count,
+        "subprocesses": image_count,
+        "ocr_input_bytes": 0,
+        "sheet_cells": image_count * 2,
+    }
+    assert len(values["images"]) == image_count
+    assert sorted(
+        values["images"]["Screenshot 2023-06-16 at 18-49-01 Facebook.png"]
+    ) == [
+        "ocr",
+        "parse",
+        "persist",
+        "sheet",
+    ]
+
+
+def test_app_run_preprocess(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    image = pytest.importorskip("PIL.Image")
+
+    ocr_files = []
+
+    class _PreprocessOcrHelper(FakeOcrHelper):
+        def run(self, image_file, image_data=None):
+            ocr_files.append(image_file)
+            # the prepared image is sent in memory
+            with image.open(io.BytesIO(image_data)) as prepared:
+                assert prepared.mode == "L"
+            return "QUESTION 1\nbody text 1"
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", _PreprocessOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+
+    app_args = _build_app_args(
+        tmp_path,
+        workers=2,
+        preprocess_options=app.preprocess.PreprocessOptions(),
+    )
+    pixels = np.full((60, 80, 3), 255, dtype=np.uint8)
+    pixels[20:40, 10:70] = 0
+    for image_file in app_args.input_dir.iterdir():
+        image.fromarray(pixels).save(image_file, format="PNG")
+
+    assert app.App().run(app_args) is True
+
+    image_count = 12
+    assert len(ocr_files) == image_count
+    # the prepared images are not saved to a file
+    png_names = sorted(path.name for path in tmp_path.rglob("*.png"))
+    assert png_names == sorted(path.name for path in ocr_files)
+
+
+def test_app_run_tsv_output(tmp_path, monkeypatch):
+    tsv_header = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t"
+    tsv_header += "left\ttop\twidth\theight\tconf\ttext"
+
+    class _TsvOcrHelper(FakeOcrHelper):
+        def run(self, image_file, _image_data=None):
+            assert self.output_format == app.ocr.OCR_OUTPUT_TSV
+            number = int(image_file.stem.rsplit("-", 1)[-1].split(" ")[0])
+            rows = [
+                # a menu label with low confidence is left out
+                ("1", "1", "1", "1", "12", "Menu", "20"),
+                ("1", "2", "1", "1", "40", "Question", "96"),
+                ("1", "2", "1", "2", "40", str(number), "95"),
+                ("1", "3", "1", "1", "20", "body", "91"),
+                ("1", "3", "1", "2", "20", f"text{number}", "90"),
+            ]
+            lines = [tsv_header]
+            lines.extend(
+                f"5\t{page}\t{block}\t{par}\t1\t{word}\t10\t10\t50\t{height}"
+                f"\t{conf}\t{text}"
+                for page, block, par, word, height, text, conf in rows
+            )
+            return "\n".join(lines)
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", _TsvOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+
+    app_args = _build_app_args(
+        tmp_path,
+        workers=2,
+        ocr_output=app.ocr.OCR_OUTPUT_TSV,
+        min_confidence=50.0,
+    )
+    assert app.App().run(app_args) is True
+
+    text_files = sorted(app_args.output_dir.glob("*.txt"))
+    image_count = 12
+    assert len(text_files) == image_count
+    for text_file in text_files:
+        number = int(text_file.stem.rsplit("-", 1)[-1].split(" ")[0])
+        expected_text = f"Question {number}\nbody text{number}"
+        assert text_file.read_text() == expected_text
+
+
+def test_app_run_fast_pass(tmp_path, monkeypatch):
+    fast_options = app.ocr.TesseractOptions(psm=6, whitelist="QUESTION0123456789")
+
+    class _FastPassOcrHelper(FakeOcrHelper):
+        def run(self, image_file, _image_data=None, options=None):
+            number = int(image_file.stem.rsplit("-", 1)[-1].split(" ")[0])
+            if options is None:
+                return f"QUESTION {number}\nbody text {number}"
+            assert options == fast_options
+            # the fast pass only finds the question number in the even images
+            if number % 2 == 0:
+                return f"QUESTION {number}\nbody text {number}"
+            return "QUEST1ON\nbody text"
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", _FastPassOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+
+    metrics_file = tmp_path / "metrics.json"
+    app_args = _build_app_args(
+        tmp_path,
+        workers=2,
+        fast_ocr_options=fast_options,
+        metrics_file=metrics_file,
+    )
+    assert app.App().run(app_args) is True
+
+    image_count = 12
+    fallback_count = 6
+    counters = json.loads(metrics_file.read_text())["counters"]
+    assert counters["ocr_runs"] == image_count + fallback_count
+    assert counters["ocr_fast_images"] == image_count
+    assert counters["ocr_fast_hits"] == image_count - fallback_count
+    assert counters["ocr_full_images"] == fallback_count
+    assert counters["ocr_full_hits"] == fallback_count
+
+    # the text from the pass that found the question number is saved
+    for text_file in app_args.output_dir.glob("*.txt"):
+        number = int(text_file.stem.rsplit("-", 1)[-1].split(" ")[0])
+        assert text_file.read_text() == f"QUESTION {number}\nbody text {number}"
+
+
+def test_app_resync(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+    monkeypatch.setattr(FakeOcrHelper, "run_count", 0)
+
+    metrics_file = tmp_path / "metrics.json"
+    app_args = _build_app_args(
+        tmp_path,
+        workers=2,
+        batch_size=10,
+        metrics_file=metrics_file,
+    )
+    assert app.App().run(app_args) is True
+    image_count = 12
+    assert FakeOcrHelper.run_count == image_count
+    expected_updates = sorted(sheets_helpers[-1].updates)
+
+    # files that are not screenshot text files are ignored
+    (app_args.output_dir / "notes.txt").write_text("QUESTION 99\nnot a question")
+    no_question_file = "Screenshot 2023-06-16 at 18-50-00 Facebook.txt"
+    (app_args.output_dir / no_question_file).write_text("no question here")
+
+    # the same cells are updated using the text files, without running OCR
+    assert app.App().resync(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+    assert sorted(sheets_helpers[-1].updates) == expected_updates
+    assert [i.closed for i in sheets_helpers] == [True, True]
+
+    values = json.loads(metrics_file.read_text())
+    assert values["counters"] == {
+        "text_files": image_count + 1,
+        "sheet_cells": image_count * 2,
+    }
+    # 24 cells sent in batches of 10
+    expected_api_calls = 3
+    assert values["stages"]["sheets_api"]["count"] == expected_api_calls
+
+
+def test_app_resync_missing_output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+    app_args = _build_app_args(tmp_path)
+    assert app.App().resync(app_args) is False
+
+
+def test_app_run_input_dirs(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+    monkeypatch.setattr(FakeOcrHelper, "run_count", 0)
+
+    app_args = _build_app_args(tmp_path, workers=2, move_images=False)
+    for index, image_file in enumerate(sorted(app_args.input_dir.iterdir())):
+        image_file.write_bytes(f"image {index}".encode())
+
+    # a second input directory with a subdirectory
+    # that has copies of some of the images, and one new image
+    other_dir = tmp_path / "other"
+    sub_dir = other_dir / "2023-06-16"
+    sub_dir.mkdir(parents=True)
+    for index, image_file in enumerate(sorted(app_args.input_dir.iterdir())[:3]):
+        (sub_dir / image_file.name).write_bytes(f"image {index}".encode())
+    new_name = "Screenshot 2023-06-16 at 18-49-13 Facebook.png"
+    (sub_dir / new_name).write_bytes(b"image new")
+
+    app_args.input_dirs = [app_args.input_dir, other_dir]
+    app_args.recursive = True
+    assert app.App().run(app_args) is True
+
+    # the copies are not processed
+    image_count = 13
+    assert FakeOcrHelper.run_count == image_count
+    assert len(sheets_helpers[-1].updates) == image_count * 2
+
+
+def test_app_run_duplicates_next_run(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+    monkeypatch.setattr(FakeOcrHelper, "run_count", 0)
+
+    app_args = _build_app_args(
+        tmp_path,
+        use_cache=False,
+        manifest_file=tmp_path / "manifest.sqlite3",
+    )
+    # a second input directory with a copy of each image
+    other_dir = tmp_path / "other"
+    other_dir.mkdir()
+    for index, image_file in enumerate(sorted(app_args.input_dir.iterdir())):
+        image_file.write_bytes(f"image {index}".encode())
+        (other_dir / image_file.name).write_bytes(f"image {index}".encode())
+    app_args.input_dirs = [app_args.input_dir, other_dir]
+
+    image_count = 12
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+    assert len(sheets_helpers[-1].updates) == image_count * 2
+    # one image of each pair is moved, the copy is not
+    remaining = [*app_args.input_dir.iterdir(), *other_dir.iterdir()]
+    assert len(remaining) == image_count
+
+    # the copies are not processed again in the next run
+    assert app.App().run(app_args) is True
+    assert FakeOcrHelper.run_count == image_count
+    assert sheets_helpers[-1].updates == []
+
+
+def test_app_run_same_name(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", FakeSheetsHelper)
+
+    app_args = _build_app_args(tmp_path, use_cache=False)
+    # a second input directory with a different image with the same name
+    other_dir = tmp_path / "other"
+    other_dir.mkdir()
+    for index, image_file in enumerate(sorted(app_args.input_dir.iterdir())):
+        image_file.write_bytes(f"image {index}".encode())
+    name = "Screenshot 2023-06-16 at 18-49-01 Facebook.png"
+    (other_dir / name).write_bytes(b"other image")
+    app_args.input_dirs = [app_args.input_dir, other_dir]
+
+    assert app.App().run(app_args) is True
+
+    # both images and text files are kept
+    image_count = 13
+    output_files = list(app_args.output_dir.iterdir())
+    assert len([i for i in output_files if i.suffix == ".png"]) == image_count
+    assert len([i for i in output_files if i.suffix == ".txt"]) == image_count
+    assert list(app_args.input_dir.iterdir()) == []
+    assert list(other_dir.iterdir()) == []
+
+
+def test_app_run_missing_sheet(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+    monkeypatch.setattr(FakeSheetsHelper, "sheet_titles", ("Template",))
+
+    metrics_file = tmp_path / "metrics.json"
+    app_args = _build_app_args(tmp_path, metrics_file=metrics_file)
+    assert app.App().run(app_args) is True
+
+    # the updates for the missing sheet are not sent
+    assert sheets_helpers[-1].updates == []
+    values = json.loads(metrics_file.read_text())
+    image_count = 12
+    assert values["counters"]["sheet_cells_missing_sheet"] == image_count * 2
+
+
+def test_app_run_sqlite_sink(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    closed = []
+    close = app.sheet_sinks.SqliteSheetSink.close
+
+    def _close(sink):
+        closed.append(sink)
+        close(sink)
+
+    monkeypatch.setattr(app.sheet_sinks.SqliteSheetSink, "close", _close)
+
+    sink_file = tmp_path / "spreadsheet.sqlite3"
+    app_args = _build_app_args(
+        tmp_path,
+        sink=app.sheet_sinks.SINK_SQLITE,
+        sink_file=sink_file,
+        create_sheets=True,
+    )
+    assert app.App().run(app_args) is True
+    # the connection to the local spreadsheet file is closed
+    assert len(closed) == 1
+
+    # the cells are in the local spreadsheet file
+    sink = app.sheet_sinks.SqliteSheetSink(sink_file)
+    assert sink.get_sheet_titles("ss-id") == {"2023-06-16 Fri": 0}
+    assert sink.get_cell("ss-id", "2023-06-16 Fri", "B", "3") == "body text 1"
+    assert sink.get_cell("ss-id", "2023-06-16 Fri", "D", "14") == "1"
+    sink.close()
+
+
+def test_build_app_args_local_sink(tmp_path):
+    app_args = app.build_app_args_with_defaults_from_args(
+        spreadsheet_id="ss-id",
+        input_dir=tmp_path,
+        output_dir=tmp_path,
+        tesseract_exe=tmp_path / "tesseract",
+        tesseract_data=tmp_path / "tessdata",
+        sink=app.sheet_sinks.SINK_MEMORY,
+    )
+
+    assert app_args.sink == app.sheet_sinks.SINK_MEMORY
+    # the local sinks add the dated sheets, and do not need Google credentials
+    assert app_args.create_sheets is True
+    assert app_args.google_credentials == pathlib.Path()
+
+
+def test_app_run_memory_sink_then_google(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    data_dir = tmp_path / "data"
+    monkeypatch.setattr(
+        app.app_paths.DefaultPaths,
+        "data_dir",
+        property(lambda _self: data_dir),
+    )
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+    input_dir = _build_app_args(tmp_path).input_dir
+
+    def _run(sink):
+        app_args = app.build_app_args_with_defaults_from_args(
+            spreadsheet_id="ss-id",
+            input_dir=input_dir,
+            output_dir=tmp_path / "output",
+            tesseract_exe=tmp_path / "tesseract",
+            tesseract_data=tmp_path / "tessdata",
+            google_credentials=tmp_path / "credentials.json",
+            google_token=tmp_path / "token.json",
+            use_cache=False,
+            sink=sink,
+        )
+        assert app.App().run(app_args) is True
+        return app_args
+
+    # the dry run does not move the images or record them as processed
+    memory_args = _run(app.sheet_sinks.SINK_MEMORY)
+    assert memory_args.move_images is False
+    assert memory_args.use_manifest is False
+    image_count = 12
+    assert len(list(input_dir.iterdir())) == image_count
+
+    google_args = _run(app.sheet_sinks.SINK_GOOGLE)
+    assert google_args.manifest_file == data_dir / "manifest.sqlite3"
+    assert len(sheets_helpers[-1].updates) == image_count * 2
+    assert not list(input_dir.iterdir())
+
+
+def test_build_app_args_sqlite_sink_records(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    monkeypatch.setattr(
+        app.app_paths.DefaultPaths,
+        "data_dir",
+        property(lambda _self: data_dir),
+    )
+    app_args = app.build_app_args_with_defaults_from_args(
+        spreadsheet_id="ss-id",
+        input_dir=tmp_path,
+        output_dir=tmp_path,
+        tesseract_exe=tmp_path / "tesseract",
+        tesseract_data=tmp_path / "tessdata",
+        sink=app.sheet_sinks.SINK_SQLITE,
+    )
+
+    # the sqlite sink keeps its own records, separate from the Google sink
+    sink_dir = data_dir / "sinks" / app.sheet_sinks.SINK_SQLITE
+    assert app_args.move_images is False
+    assert app_args.use_manifest is True
+    assert app_args.manifest_file == sink_dir / "manifest.sqlite3"
+    assert app_args.journal_file == sink_dir / "journal.jsonl"
+    assert app_args.dir_index_file == sink_dir / "directory_index.json"
+
+
+def test_app_run_routes(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+
+    routes_file = tmp_path / "routes.json"
+    routes_file.write_text(
+        json.dumps(
+            {"routes": [{"pattern": r"18-49-0\d ", "spreadsheet_id": "ss-early"}]},
+        ),
+    )
+    app_args = _build_app_args(
+        tmp_path,
+        routes_file=routes_file,
+        routes=app.routing.load_routes(routes_file),
+    )
+    assert app.App().run(app_args) is True
+
+    # one client sends the updates for both spreadsheets
+    assert len(sheets_helpers) == 1
+    updates = sheets_helpers[0].updates
+    expected_early = 9 * 2
+    expected_default = 3 * 2
+    assert len([i for i in updates if i[0] == "ss-early"]) == expected_early
+    assert len([i for i in updates if i[0] == "ss-id"]) == expected_default
+
+
+def test_app_run_resume(tmp_path, monkeypatch):
+    sheets_helpers = []
+
+    def _sheets_helper(*args, **_kwargs):
+        helper = FakeSheetsHelper(*args)
+        sheets_helpers.append(helper)
+        return helper
+
+    monkeypatch.setattr(app.ocr, "OcrHelper", FakeOcrHelper)
+    monkeypatch.setattr(app.google_sheets, "GoogleSheetsHelper", _sheets_helper)
+    monkeypatch.setattr(FakeOcrHelper, "run_count", 0)
+
+    write_text_atomic = app.utils.write_text_atomic
+    crash_name = "Screenshot 2023-06-16 at 18-49-05 Facebook.txt"
+
+    def _crash(path, content, **kwargs):
+        if path.name == crash_name:
+            msg = "disk full"
+            raise OSError(msg)
+        write_text_atomic(path, content, **kwargs)
+
+    metrics_file = tmp_path / "metrics.json"
+    app_args = _build_app_args(
+        tmp_path,
+        journal_file=tmp_path / "journal.jsonl",
+        metrics_file=metrics_file,
+    )
+    monkeypatch.setattr(app.utils, "write_text_atomic", _crash)
+    assert app.App().run(app_args) is False
+
+    # the image was moved, but the text file was not saved
+    assert (app_args.output_dir / crash_name).with_suffix(".png").exists()
+    assert not (app_args.output_dir / crash_name).exists()
+    ocr_count = FakeOcrHelper.run_count
+    remaining = len(list(app_args.input_dir.iterdir()))
+    # the images that were moved had not had their cell updates sent
+    started = len(list(app_args.output_dir.glob("*.png")))
+
+    monkeypatch.setattr(app.utils, "write_text_atomic", write_text_atomic)
+    assert app.App().run(app_args) is True
+
+    # the interrupted image is finished without running OCR again
+    image_count = 12
+    assert (app_args.output_dir / crash_name).read_text() == "QUESTION 5\nbody text 5"
+    assert len(list(app_args.output_dir.glob("*.txt"))) == image_count
+    assert FakeOcrHelper.run_count - ocr_count == remaining
+    values = json.loads(metrics_file.read_text())
+    assert values["counters"]["images_resumed"] == started
+    updates = sheets_helpers[-1].updates
+    assert ("ss-id", "'2023-06-16 Fri'!B7:B7", "body text 5") in updates
+    # every image is finished, so the journal is empty
+    assert app_args.journal_file.read_text() == ""
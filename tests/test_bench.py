@@ -0,0 +1,217 @@
+import threading
+
+from datetime import datetime, timezone
+
+from click.testing import CliRunner
+from screenshot_ocr import bench, trivia
+from screenshot_ocr.cli import screenshot_ocr_bench
+
+
+def test_fake_sheets_server_update_trivia_cell():
+    with bench.FakeSheetsServer() as server:
+        sheets_helper = bench.LocalSheetsHelper(server.url)
+        trivia_helper = trivia.TriviaHelper(sheets_helper, "ss1")
+        sheet_date = datetime(2023, 6, 16, tzinfo=timezone.utc)
+
+        assert trivia_helper.update_trivia_cell(17, 2, "question text", sheet_date)
+        assert sheets_helper.update_spreadsheet_cells(
+            "ss1",
+            [("'2023-06-16 Fri'!B3:B3", "text 1")],
+        ) == {"'2023-06-16 Fri'!B3:B3": True}
+
+    expected_request_count = 3
+    assert server.request_count == expected_request_count
+    assert server.values == {
+        ("ss1", "'2023-06-16 Fri'!B22:B22"): "question text",
+        ("ss1", "'2023-06-16 Fri'!D22:D22"): "2",
+        ("ss1", "'2023-06-16 Fri'!B3:B3"): "text 1",
+    }
+
+
+def test_build_corpus(tmp_path):
+    expected_images = 6
+    images = bench.build_corpus(tmp_path, expected_images, 9)
+
+    assert len(images) == expected_images
+    expected_files = 15
+    assert len(list(tmp_path.iterdir())) == expected_files
+
+    trivia_helper = trivia.TriviaHelper(None, "ss1")
+    found = sorted(path for path, _ in trivia_helper.find_screenshot_images(tmp_path))
+    assert found == images
+    assert images[0].read_bytes().startswith(b"\x89PNG")
+
+
+def test_build_question_text():
+    trivia_helper = trivia.TriviaHelper(None, "ss1")
+
+    number, points, text = trivia_helper.get_text_details(bench.build_question_text(9))
+
+    expected_number = 10
+    assert number == expected_number
+    assert points == 1
+    assert text.startswith("Isolation Trivia For one points")
+
+
+def test_percentile():
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+
+    expected_median = 0.3
+    assert bench.percentile(values, 0.5) == expected_median
+    expected_p95 = 0.5
+    assert bench.percentile(values, 0.95) == expected_p95
+    assert bench.percentile([], 0.5) == 0
+
+
+def test_run_benchmarks(tmp_path):
+    bench_args = bench.BenchArgs(
+        work_dir=tmp_path,
+        image_count=10,
+        other_count=20,
+        discovery_repeat=2,
+        text_count=50,
+        dump_count=2,
+        dump_questions=3,
+        question_count=4,
+    )
+
+    report = bench.run_benchmarks(bench_args)
+
+    results = {item["name"]: item for item in report["results"]}
+    # Tesseract is not configured, so OCR is not measured
+    assert sorted(results) == sorted(
+        [
+            bench.BENCH_DISCOVERY,
+            bench.BENCH_DISCOVERY_INDEXED,
+            bench.BENCH_PARSE,
+            bench.BENCH_PARSE_DUMP,
+            bench.BENCH_SHEETS,
+            bench.BENCH_SHEETS_UNCHANGED,
+        ]
+    )
+    expected_discovered = 20
+    assert results[bench.BENCH_DISCOVERY]["count"] == expected_discovered
+    assert results[bench.BENCH_DISCOVERY_INDEXED]["count"] == expected_discovered
+    expected_parsed = 50
+    assert results[bench.BENCH_PARSE]["count"] == expected_parsed
+    # each question text has 8 lines
+    expected_lines = 2 * 3 * 8
+    assert results[bench.BENCH_PARSE_DUMP]["count"] == expected_lines
+    expected_updated = 4
+    assert results[bench.BENCH_SHEETS]["count"] == expected_updated
+    assert results[bench.BENCH_SHEETS_UNCHANGED]["count"] == expected_updated
+    for item in results.values():
+        assert item["per_second"] > 0
+        assert item["p95_ms"] >= item["p50_ms"]
+
+    output = tmp_path / "results.json"
+    bench.save_report(report, output)
+    assert bench.load_report(output) == report
+
+
+def test_format_report_compare():
+    baseline = {"results": [{"name": "a", "per_second": 100.0}]}
+    report = {
+        "results": [
+            {
+                "name": "a",
+                "count": 10,
+                "per_second": 150.0,
+                "p50_ms": 1.0,
+                "p95_ms": 2.0,
+            }
+        ],
+        "peak_rss_bytes": 2 * 1024 * 1024,
+        "peak_child_rss_bytes": None,
+    }
+
+    table = bench.format_report(report, baseline)
+
+    assert "+50.0%" in table
+    assert "Peak memory: 2.0 MiB" in table
+    assert "Peak child process memory" not in table
+
+
+def test_cli_bench(tmp_path):
+    output = tmp_path / "results.json"
+    runner = CliRunner()
+    result = runner.invoke(
+        screenshot_ocr_bench,
+        [
+            "--images",
+            "4",
+            "--other-files",
+            "4",
+            "--ocr-images",
+            "0",
+            "--texts",
+            "10",
+            "--questions",
+            "2",
+            "--work-dir",
+            str(tmp_path / "work"),
+            "--output",
+            str(output),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert bench.BENCH_PARSE in result.output
+    assert f"Saved results to '{output}'." in result.output
+    assert output.exists()
+
+
+def test_fake_sheets_server_sheet_titles():
+    with bench.FakeSheetsServer() as server:
+        server.sheet_titles = ["Template"]
+        sheets_helper = bench.LocalSheetsHelper(server.url)
+
+        assert sheets_helper.get_sheet_titles("ss1") == {"Template": 0}
+        # the titles are cached
+        assert sheets_helper.get_sheet_titles("ss1") == {"Template": 0}
+        assert server.request_count == 1
+
+        created = sheets_helper.create_sheets("ss1", ["2023-06-16 Fri"], "Template")
+        assert created == ["2023-06-16 Fri"]
+        assert sorted(sheets_helper.get_sheet_titles("ss1")) == [
+            "2023-06-16 Fri",
+            "Template",
+        ]
+
+    expected_request_count = 2
+    assert server.request_count == expected_request_count
+    assert server.sheet_titles == ["Template", "2023-06-16 Fri"]
+
+
+def test_fake_sheets_server_values():
+    with bench.FakeSheetsServer() as server:
+        sheets_helper = bench.LocalSheetsHelper(server.url)
+        sheets_helper.update_spreadsheet_cells(
+            "ss1",
+            [("'sheet'!B3:B3", "text 1"), ("'sheet'!D4:D4", "2")],
+        )
+
+        values = sheets_helper.get_spreadsheet_values(
+            "ss1",
+            ["'sheet'!B:D", "'other'!B:D"],
+        )
+
+    assert values == [[[], [], ["text 1"], ["", "", "2"]], []]
+
+
+def test_local_sheets_helper_threads():
+    with bench.FakeSheetsServer() as server:
+        sheets_helper = bench.LocalSheetsHelper(server.url)
+
+        def _update(row):
+            sheets_helper.update_spreadsheet_cell("ss1", "sheet", "B", str(row), "text")
+
+        threads = [threading.Thread(target=_update, args=(row,)) for row in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    expected_updates = 8
+    assert server.request_count == expected_updates
+    assert len(server.values) == expected_updates
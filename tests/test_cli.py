@@ -1,4 +1,5 @@
 from click.testing import CliRunner
+from screenshot_ocr import app
 from screenshot_ocr.cli import screenshot_ocr
 
 
@@ -22,3 +23,46 @@ def test_cli_version():
     result = runner.invoke(screenshot_ocr, ["--version"])
     assert "Screenshot OCR, version" in result.output
     assert result.exit_code == 0
+
+
+def test_cli_resync(tmp_path, monkeypatch):
+    resync_args = []
+
+    def _resync(_app, app_args):
+        resync_args.append(app_args)
+        return True
+
+    def _run(_app, _app_args):
+        raise AssertionError
+
+    monkeypatch.setattr(app.App, "resync", _resync)
+    monkeypatch.setattr(app.App, "run", _run)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        screenshot_ocr,
+        [
+            "ss-id",
+            "--output-dir",
+            str(tmp_path),
+            "--google-credentials",
+            str(tmp_path / "credentials.json"),
+            "--google-token",
+            str(tmp_path / "token.json"),
+            "resync",
+        ],
+    )
+    assert result.exit_code == 0
+    assert len(resync_args) == 1
+    assert resync_args[0].spreadsheet_id == "ss-id"
+    assert resync_args[0].output_dir == tmp_path
+
+
+def test_cli_resync_help():
+    runner = CliRunner()
+    result = runner.invoke(
+        screenshot_ocr, ["ss-id", "--workers", "2", "resync", "--help"]
+    )
+    assert "Usage: screenshot-ocr SPREADSHEET_ID resync" in result.output
+    assert "Update the spreadsheet from the text files" in result.output
+    assert result.exit_code == 0
@@ -0,0 +1,53 @@
+import os
+
+from screenshot_ocr import directory_index
+
+
+def _old_stat(path):
+    old_ns = path.stat().st_mtime_ns - 10_000_000_000
+    os.utime(path, ns=(old_ns, old_ns))
+    return path.stat()
+
+
+def test_directory_index_put_get(tmp_path):
+    index_file = tmp_path / "index.json"
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    dir_stat = _old_stat(image_dir)
+
+    dir_index = directory_index.DirectoryIndex(index_file)
+    assert dir_index.get(image_dir, dir_stat) is None
+    dir_index.put(image_dir, dir_stat, ["a.png", "b.png"], ["sub"])
+    dir_index.save()
+
+    dir_index = directory_index.DirectoryIndex(index_file)
+    assert dir_index.get(image_dir, dir_stat) == (["a.png", "b.png"], ["sub"])
+
+    # a new file changes the directory modified time
+    (image_dir / "c.png").touch()
+    assert dir_index.get(image_dir, image_dir.stat()) is None
+    assert dir_index.hits == 1
+    expected_misses = 1
+    assert dir_index.misses == expected_misses
+
+
+def test_directory_index_recent_change(tmp_path):
+    index_file = tmp_path / "index.json"
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    dir_stat = image_dir.stat()
+
+    # a directory that changed very recently might change again unnoticed
+    dir_index = directory_index.DirectoryIndex(index_file)
+    dir_index.put(image_dir, dir_stat, ["a.png"], [])
+    assert dir_index.get(image_dir, dir_stat) is None
+
+
+def test_directory_index_invalid_file(tmp_path):
+    index_file = tmp_path / "index.json"
+    index_file.write_text("not json")
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+
+    dir_index = directory_index.DirectoryIndex(index_file)
+    assert dir_index.get(image_dir, image_dir.stat()) is None
@@ -0,0 +1,21 @@
+from screenshot_ocr import duplicates, manifest
+
+
+def test_duplicate_finder():
+    image_one = manifest.content_hash(b"image one")
+    image_two = manifest.content_hash(b"image two")
+
+    finder = duplicates.DuplicateFinder()
+    assert finder.check(9, image_one, "first.png") is None
+    assert finder.check(9, image_two, "other.png") is None
+    assert finder.check(9, image_one, "copy.png") == "first.png"
+    # the same file is not a duplicate of itself
+    assert finder.check(9, image_one, "first.png") is None
+
+
+def test_duplicate_finder_add():
+    image_one = manifest.content_hash(b"image one")
+
+    finder = duplicates.DuplicateFinder()
+    finder.add(len(b"image one"), image_one, "processed.png")
+    assert finder.check(len(b"image one"), image_one, "image.png") == "processed.png"
@@ -0,0 +1,315 @@
+import httplib2
+import pytest
+
+from googleapiclient import errors
+
+from screenshot_ocr import google_sheets, metrics
+from screenshot_ocr.google_sheets import SheetsBatchWriter
+
+
+class FakeSheetsHelper:
+    def __init__(self, failed_ranges=None, sheet_titles=None, sheet_values=None):
+        self.requests = []
+        self.failed_ranges = failed_ranges or []
+        self.sheet_titles = sheet_titles or {}
+        self.created = []
+        self.sheet_values = sheet_values or {}
+        self.value_requests = []
+        self.error = None
+
+    def get_spreadsheet_values(self, _ss_id, ranges):
+        self.value_requests.append(ranges)
+        return [self.sheet_values.get(i, []) for i in ranges]
+
+    def get_sheet_titles(self, _ss_id):
+        return dict(self.sheet_titles)
+
+    def create_sheets(self, _ss_id, titles, template_title=None):
+        self.created.append((titles, template_title))
+        self.sheet_titles.update(dict.fromkeys(titles, 1))
+        return titles
+
+    def update_spreadsheet_cells(self, ss_id, cells):
+        if self.error:
+            raise self.error
+        self.requests.append((ss_id, cells))
+        return {
+            range_notation: range_notation not in self.failed_ranges
+            for range_notation, _ in cells
+        }
+
+
+def test_batch_writer_flush_size():
+    helper = FakeSheetsHelper()
+    writer = SheetsBatchWriter(helper, flush_size=3, flush_interval=600)
+
+    assert writer.update_spreadsheet_cell("ss1", "sheet", "B", "3", "text 1")
+    assert writer.update_spreadsheet_cell("ss1", "sheet", "D", "3", "1")
+    assert helper.requests == []
+
+    assert writer.update_spreadsheet_cell("ss1", "sheet", "B", "4", "text 2")
+    assert helper.requests == [
+        (
+            "ss1",
+            [
+                ("'sheet'!B3:B3", "text 1"),
+                ("'sheet'!D3:D3", "1"),
+                ("'sheet'!B4:B4", "text 2"),
+            ],
+        ),
+    ]
+    assert writer.updated_count == len(helper.requests[0][1])
+
+
+def test_batch_writer_flush_interval():
+    helper = FakeSheetsHelper()
+    writer = SheetsBatchWriter(helper, flush_size=100, flush_interval=0)
+
+    assert writer.update_spreadsheet_cell("ss1", "sheet", "B", "3", "text 1")
+    assert helper.requests == [("ss1", [("'sheet'!B3:B3", "text 1")])]
+
+
+def test_batch_writer_groups_by_spreadsheet():
+    helper = FakeSheetsHelper(failed_ranges=["'sheet'!D3:D3"])
+    writer = SheetsBatchWriter(helper, flush_size=100, flush_interval=600)
+
+    writer.update_spreadsheet_cell("ss1", "sheet", "B", "3", "text 1")
+    writer.update_spreadsheet_cell("ss2", "sheet", "B", "3", "text 2")
+    writer.update_spreadsheet_cell("ss1", "sheet", "D", "3", "2")
+    writer.update_spreadsheet_cell("ss1", "sheet", "B", "3", "text 3")
+
+    results = writer.flush()
+
+    assert helper.requests == [
+        ("ss1", [("'sheet'!B3:B3", "text 3"), ("'sheet'!D3:D3", "2")]),
+        ("ss2", [("'sheet'!B3:B3", "text 2")]),
+    ]
+    assert results == {"'sheet'!B3:B3": True, "'sheet'!D3:D3": False}
+    assert writer.failed_ranges == ["'sheet'!D3:D3"]
+    assert writer.flush() == {}
+
+
+def test_batch_writer_missing_sheet():
+    helper = FakeSheetsHelper(sheet_titles={"sheet": 1})
+    writer = SheetsBatchWriter(
+        helper,
+        flush_size=100,
+        flush_interval=600,
+        check_sheets=True,
+    )
+
+    writer.update_spreadsheet_cell("ss1", "sheet", "B", "3", "text 1")
+    writer.update_spreadsheet_cell("ss1", "missing", "B", "3", "text 2")
+    results = writer.flush()
+
+    # the update for the missing sheet is not sent
+    assert helper.requests == [("ss1", [("'sheet'!B3:B3", "text 1")])]
+    assert results == {"'sheet'!B3:B3": True, "'missing'!B3:B3": False}
+    assert writer.missing_sheets == {"missing"}
+    assert helper.created == []
+
+
+def test_batch_writer_create_sheets():
+    helper = FakeSheetsHelper(sheet_titles={"Template": 1})
+    writer = SheetsBatchWriter(
+        helper,
+        flush_size=100,
+        flush_interval=600,
+        check_sheets=True,
+        create_sheets=True,
+        sheet_template="Template",
+    )
+
+    writer.update_spreadsheet_cell("ss1", "sheet 2", "B", "3", "text 1")
+    writer.update_spreadsheet_cell("ss1", "sheet 1", "B", "3", "text 2")
+    results = writer.flush()
+
+    # the missing sheets are added in one request
+    assert helper.created == [(["sheet 1", "sheet 2"], "Template")]
+    assert results == {"'sheet 2'!B3:B3": True, "'sheet 1'!B3:B3": True}
+    assert writer.missing_sheets == set()
+
+
+def test_batch_writer_skip_unchanged():
+    # the rows start at row 1 and column B
+    helper = FakeSheetsHelper(
+        sheet_values={"'sheet'!B:D": [[], [], ["text 1", "", "1"], ["text 2"]]},
+    )
+    writer = SheetsBatchWriter(
+        helper,
+        flush_size=100,
+        flush_interval=600,
+        skip_unchanged=True,
+    )
+
+    writer.update_spreadsheet_cell("ss1", "sheet", "B", "3", "text 1")
+    writer.update_spreadsheet_cell("ss1", "sheet", "D", "3", "2")
+    writer.update_spreadsheet_cell("ss1", "sheet", "B", "4", "text 2")
+    writer.update_spreadsheet_cell("ss1", "sheet", "D", "4", "1")
+    results = writer.flush()
+
+    # only the changed cells are sent
+    assert helper.value_requests == [["'sheet'!B:D"]]
+    assert helper.requests == [
+        ("ss1", [("'sheet'!D3:D3", "2"), ("'sheet'!D4:D4", "1")]),
+    ]
+    assert all(results.values())
+    expected_unchanged = 2
+    assert writer.unchanged_count == expected_unchanged
+    assert writer.updated_count == len(helper.requests[0][1])
+
+    # the values are read once, and the sent values are remembered
+    writer.update_spreadsheet_cell("ss1", "sheet", "D", "3", "2")
+    writer.flush()
+    assert helper.value_requests == [["'sheet'!B:D"]]
+    assert len(helper.requests) == 1
+    assert writer.unchanged_count == expected_unchanged + 1
+
+
+def _http_error(status, retry_after=None):
+    headers = {"status": status}
+    if retry_after:
+        headers["retry-after"] = retry_after
+    return errors.HttpError(httplib2.Response(headers), b"")
+
+
+class FakeRequest:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.count = 0
+
+    def execute(self):
+        self.count += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeClient:
+    def __init__(self, request):
+        self.request = request
+
+    def spreadsheets(self):
+        return self
+
+    def get(self, **_kwargs):
+        return self.request
+
+
+def _build_helper(tmp_path, monkeypatch, outcomes, **kwargs):
+    credentials_file = tmp_path / "credentials.json"
+    credentials_file.touch()
+    run_metrics = metrics.RunMetrics()
+    helper = google_sheets.GoogleSheetsHelper(
+        credentials_file,
+        tmp_path / "token.json",
+        run_metrics=run_metrics,
+        **kwargs,
+    )
+    request = FakeRequest(outcomes)
+    monkeypatch.setattr(helper, "client", lambda: FakeClient(request))
+    sleeps = []
+    monkeypatch.setattr(google_sheets.time, "sleep", sleeps.append)
+    return helper, request, run_metrics, sleeps
+
+
+def test_helper_retries_errors(tmp_path, monkeypatch):
+    response = {"sheets": [{"properties": {"sheetId": 1, "title": "sheet"}}]}
+    helper, request, run_metrics, sleeps = _build_helper(
+        tmp_path,
+        monkeypatch,
+        [_http_error(429, retry_after="3"), _http_error(503), response],
+        requests_per_minute=0,
+    )
+
+    assert helper.get_sheet_titles("ss1") == {"sheet": 1}
+
+    expected_requests = 3
+    expected_retries = 2
+    assert request.count == expected_requests
+    # the server asked to wait 3 seconds, which is longer than the first backoff
+    expected_first_wait = 3.0
+    assert sleeps[0] == expected_first_wait
+    assert len(sleeps) == expected_requests - 1
+    assert helper.request_stats.requests == expected_requests
+    assert helper.request_stats.retries == expected_retries
+    assert helper.request_stats.failures == 0
+    assert helper.request_stats.backoff_seconds == pytest.approx(sum(sleeps))
+    assert run_metrics.counters[metrics.COUNTER_SHEETS_RETRIES] == expected_retries
+    assert run_metrics.stages[metrics.STAGE_SHEETS_BACKOFF].count == expected_retries
+
+
+def test_helper_retries_give_up(tmp_path, monkeypatch):
+    helper, request, run_metrics, _ = _build_helper(
+        tmp_path,
+        monkeypatch,
+        [_http_error(500), _http_error(500), _http_error(500)],
+        requests_per_minute=0,
+        max_retries=2,
+    )
+
+    with pytest.raises(errors.HttpError):
+        helper.get_sheet_titles("ss1")
+
+    expected_requests = 3
+    assert request.count == expected_requests
+    assert helper.request_stats.failures == 1
+    assert run_metrics.counters[metrics.COUNTER_SHEETS_FAILURES] == 1
+
+
+def test_helper_does_not_retry_client_errors(tmp_path, monkeypatch):
+    helper, request, _, sleeps = _build_helper(
+        tmp_path,
+        monkeypatch,
+        [_http_error(400)],
+        requests_per_minute=0,
+    )
+
+    with pytest.raises(errors.HttpError):
+        helper.get_sheet_titles("ss1")
+
+    assert request.count == 1
+    assert sleeps == []
+    assert helper.request_stats.failures == 0
+
+
+def test_batch_writer_send_error():
+    helper = FakeSheetsHelper()
+    helper.error = _http_error(503)
+    writer = SheetsBatchWriter(helper, flush_size=100, flush_interval=600)
+
+    writer.update_spreadsheet_cell("ss1", "sheet", "B", "3", "text 1")
+    results = writer.flush()
+
+    # the error does not stop the run, the update is recorded as failed
+    assert results == {"'sheet'!B3:B3": False}
+    assert writer.failed_ranges == ["'sheet'!B3:B3"]
+
+
+def test_batch_writer_spreadsheet_error():
+    class _BadSpreadsheetHelper(FakeSheetsHelper):
+        def get_sheet_titles(self, ss_id):
+            if ss_id == "ss-bad":
+                raise ConnectionError(ss_id)
+            return super().get_sheet_titles(ss_id)
+
+    helper = _BadSpreadsheetHelper(sheet_titles={"sheet": 1})
+    writer = SheetsBatchWriter(
+        helper,
+        flush_size=100,
+        flush_interval=600,
+        check_sheets=True,
+    )
+
+    writer.update_spreadsheet_cell("ss-bad", "sheet", "B", "3", "text 1")
+    writer.update_spreadsheet_cell("ss1", "sheet", "B", "4", "text 2")
+    results = writer.flush()
+
+    # the other spreadsheet is still updated
+    assert helper.requests == [("ss1", [("'sheet'!B4:B4", "text 2")])]
+    assert results == {"'sheet'!B3:B3": False, "'sheet'!B4:B4": True}
+    assert writer.range_results == {
+        ("ss-bad", "'sheet'!B3:B3"): False,
+        ("ss1", "'sheet'!B4:B4"): True,
+    }
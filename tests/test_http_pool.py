@@ -0,0 +1,70 @@
+import threading
+
+from screenshot_ocr import http_pool
+
+
+class FakeTransport:
+    def __init__(self, barrier=None):
+        self.barrier = barrier
+        self.requests = []
+        self.closed = False
+
+    def request(self, uri, method="GET", **_kwargs):
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        self.requests.append((uri, method))
+        return {"status": "200"}, b"{}"
+
+    def close(self):
+        self.closed = True
+
+
+def test_pooled_http_reuses_transport():
+    transports = []
+
+    def _build_http():
+        transport = FakeTransport()
+        transports.append(transport)
+        return transport
+
+    pool = http_pool.PooledHttp(build_http=_build_http)
+
+    pool.request("http://example.com/1")
+    pool.request("http://example.com/2", method="POST")
+
+    assert pool.created_count == 1
+    assert transports[0].requests == [
+        ("http://example.com/1", "GET"),
+        ("http://example.com/2", "POST"),
+    ]
+
+    pool.close()
+    assert transports[0].closed
+
+
+def test_pooled_http_threads():
+    thread_count = 3
+    barrier = threading.Barrier(thread_count)
+    transports = []
+
+    def _build_http():
+        transport = FakeTransport(barrier)
+        transports.append(transport)
+        return transport
+
+    pool = http_pool.PooledHttp(max_idle=2, build_http=_build_http)
+
+    threads = [
+        threading.Thread(target=pool.request, args=(f"http://example.com/{index}",))
+        for index in range(thread_count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # each thread waited for the others, so each used a separate transport
+    assert pool.created_count == thread_count
+    assert all(len(transport.requests) == 1 for transport in transports)
+    # only the idle transports that fit in the pool are kept open
+    assert sum(transport.closed for transport in transports) == 1
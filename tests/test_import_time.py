@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+_CLI_MODULE = "screenshot_ocr.cli"
+
+# modules that are only needed when a command runs
+_LAZY_MODULES = [
+    "screenshot_ocr.app",
+    "screenshot_ocr.bench",
+    "googleapiclient.discovery",
+    "google_auth_oauthlib",
+    "google.auth.transport.requests",
+    "httplib2",
+    "asyncio",
+    "PIL",
+    "numpy",
+]
+
+
+def _import_times(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():  # noqa: PLR2004
+            continue
+        times[parts[2].strip()] = int(parts[1].strip())
+    return times
+
+
+def test_cli_import_time():
+    times = _import_times(_CLI_MODULE)
+
+    # the time taken depends on the machine,
+    # so check that the slow modules are not imported instead
+    assert _CLI_MODULE in times
+    assert [module for module in _LAZY_MODULES if module in times] == []
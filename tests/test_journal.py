@@ -0,0 +1,64 @@
+import datetime
+
+from screenshot_ocr import journal, manifest
+
+
+def _journal_entry(tmp_path, index):
+    return journal.JournalEntry(
+        entry=manifest.ManifestEntry(
+            path=str(tmp_path / f"image-{index}.png"),
+            size=10,
+            mtime_ns=100,
+            content_hash="hash",
+            ocr_text=f"QUESTION {index}\nbody text",
+            question_number=index,
+            question_points=1,
+            question_text="body text",
+            sheet_date=datetime.datetime(2023, 6, 16, tzinfo=datetime.timezone.utc),
+            sheet_status=manifest.SHEET_STATUS_PENDING,
+        ),
+        text_path=str(tmp_path / f"image-{index}.txt"),
+        moved_path=None,
+    )
+
+
+def test_journal_resume(tmp_path):
+    journal_file = tmp_path / "data" / "journal.jsonl"
+    run_journal = journal.Journal(journal_file)
+    first = _journal_entry(tmp_path, 1)
+    second = _journal_entry(tmp_path, 2)
+    third = _journal_entry(tmp_path, 3)
+
+    run_journal.begin(first)
+    run_journal.begin(second)
+    run_journal.begin(third)
+    run_journal.advance(second.entry.path, journal.JOURNAL_STAGE_SHEET)
+    run_journal.advance_many([third.entry.path], journal.JOURNAL_STAGE_DONE)
+    run_journal.close()
+
+    # a record that was only partly written when the run stopped
+    with journal_file.open("a", encoding="UTF-8") as file:
+        file.write('{"path": "')
+
+    run_journal = journal.Journal(journal_file)
+    assert run_journal.unfinished() == [first, second]
+    assert [i.stage for i in run_journal.unfinished()] == [
+        journal.JOURNAL_STAGE_PERSIST,
+        journal.JOURNAL_STAGE_SHEET,
+    ]
+
+    # the records added after the incomplete record can be read
+    fourth = _journal_entry(tmp_path, 4)
+    run_journal.begin(fourth)
+    run_journal.close()
+    run_journal = journal.Journal(journal_file)
+    assert run_journal.unfinished() == [first, second, fourth]
+
+    # the file is emptied when every image is finished
+    run_journal.advance_many(
+        [first.entry.path, second.entry.path, fourth.entry.path],
+        journal.JOURNAL_STAGE_DONE,
+    )
+    run_journal.close()
+    assert journal_file.read_text() == ""
+    assert journal.Journal(journal_file).unfinished() == []
@@ -0,0 +1,100 @@
+import datetime
+import os
+import sqlite3
+
+from screenshot_ocr import manifest
+
+
+def _entry(image_file, sheet_status=manifest.SHEET_STATUS_PENDING):
+    stat = image_file.stat()
+    return manifest.ManifestEntry(
+        path=str(image_file),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=manifest.content_hash(image_file.read_bytes()),
+        ocr_text="QUESTION 1\nbody text",
+        question_number=1,
+        question_points=1,
+        question_text="body text",
+        sheet_date=datetime.datetime(2023, 6, 16, tzinfo=datetime.timezone.utc),
+        sheet_status=sheet_status,
+    )
+
+
+def test_manifest_put_get(tmp_path):
+    image_file = tmp_path / "image.png"
+    image_file.write_bytes(b"image data")
+    entry = _entry(image_file)
+
+    db = manifest.Manifest(tmp_path / "data" / "manifest.sqlite3")
+    assert db.get(image_file) is None
+
+    db.put(entry)
+    assert db.get(image_file) == entry
+    assert db.unfinished() == [entry]
+
+    db.set_sheet_status(image_file, manifest.SHEET_STATUS_WRITTEN)
+    assert db.get(image_file).sheet_status == manifest.SHEET_STATUS_WRITTEN
+    assert db.unfinished() == []
+    db.close()
+
+
+def test_manifest_is_unchanged(tmp_path):
+    image_file = tmp_path / "image.png"
+    image_file.write_bytes(b"image data")
+    entry = _entry(image_file)
+    db = manifest.Manifest(tmp_path / "manifest.sqlite3")
+    db.put(entry)
+
+    assert db.is_unchanged(entry, image_file, image_file.stat())
+
+    # same content, different modified time
+    os.utime(image_file, ns=(entry.mtime_ns + 10**9, entry.mtime_ns + 10**9))
+    assert db.is_unchanged(entry, image_file, image_file.stat())
+    assert db.get(image_file).mtime_ns == image_file.stat().st_mtime_ns
+
+    # different content, same size
+    image_file.write_bytes(b"image DATA")
+    assert not db.is_unchanged(entry, image_file, image_file.stat())
+
+    # different size
+    image_file.write_bytes(b"other image data")
+    assert not db.is_unchanged(entry, image_file, image_file.stat())
+    db.close()
+
+
+def test_manifest_spreadsheet_id(tmp_path):
+    image_file = tmp_path / "image.png"
+    image_file.write_bytes(b"image data")
+    db_file = tmp_path / "manifest.sqlite3"
+
+    # a manifest from before the spreadsheet was recorded
+    conn = sqlite3.connect(str(db_file))
+    conn.execute(
+        "CREATE TABLE screenshots ("
+        "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+        "content_hash TEXT NOT NULL, ocr_text TEXT NOT NULL, "
+        "question_number INTEGER, question_points INTEGER, "
+        "question_text TEXT NOT NULL, sheet_date TEXT, "
+        "sheet_status TEXT NOT NULL, updated_at REAL NOT NULL)",
+    )
+    conn.execute(
+        "INSERT INTO screenshots VALUES (?, 10, 1, 'hash', '', 1, 1, '', NULL, ?, 0)",
+        (str(image_file), manifest.SHEET_STATUS_WRITTEN),
+    )
+    conn.commit()
+    conn.close()
+
+    db = manifest.Manifest(db_file)
+    assert db.get(image_file).spreadsheet_id == ""
+
+    entry = _entry(image_file)
+    entry.spreadsheet_id = "ss-id"
+    db.put(entry)
+    assert db.get(image_file).spreadsheet_id == "ss-id"
+
+    db.set_sheet_status(image_file, manifest.SHEET_STATUS_WRITTEN, "ss-other")
+    assert db.get(image_file).spreadsheet_id == "ss-other"
+    db.set_sheet_status(image_file, manifest.SHEET_STATUS_FAILED)
+    assert db.get(image_file).spreadsheet_id == "ss-other"
+    db.close()
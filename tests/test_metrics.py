@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from screenshot_ocr import metrics
+
+
+def test_run_metrics_time_and_counters():
+    run_metrics = metrics.RunMetrics()
+
+    with run_metrics.time(metrics.STAGE_OCR, "image 1.png"):
+        pass
+    with run_metrics.time(metrics.STAGE_OCR, "image 2.png"):
+        pass
+    run_metrics.record(metrics.STAGE_SHEETS_API, 0.5, 0.1)
+    run_metrics.add(metrics.COUNTER_IMAGES)
+    run_metrics.add(metrics.COUNTER_BYTES_READ, 100)
+
+    values = run_metrics.to_dict()
+
+    expected_count = 2
+    assert values["stages"][metrics.STAGE_OCR]["count"] == expected_count
+    assert values["stages"][metrics.STAGE_SHEETS_API] == {
+        "count": 1,
+        "wall_seconds": 0.5,
+        "cpu_seconds": 0.1,
+        "max_wall_seconds": 0.5,
+    }
+    assert values["counters"] == {"images": 1, "bytes_read": 100}
+    assert sorted(values["images"]) == ["image 1.png", "image 2.png"]
+    assert values["wall_seconds"] > 0
+
+
+def test_run_metrics_time_records_error():
+    run_metrics = metrics.RunMetrics()
+
+    with pytest.raises(RuntimeError), run_metrics.time(metrics.STAGE_PARSE):
+        raise RuntimeError
+
+    assert run_metrics.stages[metrics.STAGE_PARSE].count == 1
+
+
+def test_run_metrics_summary_table():
+    run_metrics = metrics.RunMetrics()
+    run_metrics.record(metrics.STAGE_OCR, 0.25)
+    run_metrics.record(metrics.STAGE_OCR, 0.75)
+    run_metrics.add(metrics.COUNTER_OCR_RUNS, 2)
+
+    lines = run_metrics.summary_table().splitlines()
+
+    assert lines[0].split()[:2] == ["stage", "count"]
+    assert lines[1].split() == ["ocr", "2", "1.000", "0.000", "500.0", "750.0"]
+    assert lines[2].startswith("Total ")
+    assert lines[3] == "ocr_runs: 2"
+
+
+def test_run_metrics_summary_table_long_stage():
+    run_metrics = metrics.RunMetrics()
+    run_metrics.record(metrics.STAGE_OCR, 0.25)
+    run_metrics.record(metrics.STAGE_SHEETS_THROTTLE, 0.5)
+
+    lines = run_metrics.summary_table().splitlines()
+
+    # the columns line up for stage names longer than the heading
+    count_end = len(lines[0]) - len(lines[0].split("count", 1)[1])
+    assert [line[count_end - 1] for line in lines[:3]] == ["t", "1", "1"]
+    assert len({len(line) for line in lines[:3]}) == 1
+    assert lines[2].split()[:2] == ["sheets_throttle", "1"]
+
+
+def test_run_metrics_write(tmp_path):
+    run_metrics = metrics.RunMetrics()
+    run_metrics.record(metrics.STAGE_OCR, 0.25, 0.125, "image.png")
+    run_metrics.add(metrics.COUNTER_SUBPROCESSES, 3)
+
+    json_file = tmp_path / "metrics.json"
+    run_metrics.write(json_file, metrics.METRICS_FORMAT_JSON)
+    values = json.loads(json_file.read_text())
+    assert values["images"] == {"image.png": {"ocr": 0.25}}
+
+    prom_file = tmp_path / "metrics.prom"
+    run_metrics.write(prom_file, metrics.METRICS_FORMAT_PROMETHEUS)
+    lines = prom_file.read_text().splitlines()
+    assert "# TYPE screenshot_ocr_stage_wall_seconds gauge" in lines
+    assert 'screenshot_ocr_stage_wall_seconds{stage="ocr"} 0.25' in lines
+    assert 'screenshot_ocr_stage_cpu_seconds{stage="ocr"} 0.125' in lines
+    assert 'screenshot_ocr_count{counter="subprocesses"} 3' in lines
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "metrics.json",
+        "metrics.prom",
+    ]
+
+    with pytest.raises(ValueError, match="Unknown metrics format 'other'."):
+        run_metrics.write(tmp_path / "metrics.txt", "other")
@@ -0,0 +1,66 @@
+import hashlib
+import os
+import time
+
+from screenshot_ocr.ocr_cache import OcrCache
+
+
+def _content_hash(image_data):
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def test_ocr_cache_get_put(tmp_path):
+    cache = OcrCache(tmp_path)
+    key = cache.content_key(_content_hash(b"image data"), "engine 1")
+
+    assert key != cache.content_key(_content_hash(b"image data"), "engine 2")
+    assert key != cache.content_key(_content_hash(b"other data"), "engine 1")
+
+    assert cache.get(key) is None
+    cache.put(key, "QUESTION 1\nbody text")
+    assert cache.get(key) == "QUESTION 1\nbody text"
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_ocr_cache_expired(tmp_path):
+    cache = OcrCache(tmp_path, max_age_seconds=60)
+    key = cache.content_key(_content_hash(b"image data"), "engine")
+    cache.put(key, "text")
+
+    path = next(tmp_path.glob("*/*.txt"))
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    assert cache.get(key) is None
+    assert not path.exists()
+
+
+def test_ocr_cache_prune(tmp_path):
+    cache = OcrCache(tmp_path, max_size_bytes=25, max_age_seconds=60)
+    now = time.time()
+    keys = [
+        cache.content_key(_content_hash(str(i).encode()), "engine") for i in range(4)
+    ]
+    for index, key in enumerate(keys):
+        cache.put(key, "0123456789")
+        path = next(tmp_path.glob(f"*/{key}.txt"))
+        # the first is expired, the rest are used in order
+        modified = now - 120 if index == 0 else now - 10 + index
+        os.utime(path, (modified, modified))
+
+    expected_removed = 2
+    assert cache.prune() == expected_removed
+    assert [cache.get(key) for key in keys] == [None, None, "0123456789", "0123456789"]
+
+
+def test_ocr_cache_clear(tmp_path):
+    cache = OcrCache(tmp_path)
+    expected_removed = 3
+    for index in range(expected_removed):
+        key = cache.content_key(_content_hash(str(index).encode()), "engine")
+        cache.put(key, "text")
+
+    assert cache.clear() == expected_removed
+    assert list(tmp_path.glob("*/*.txt")) == []
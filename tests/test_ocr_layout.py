@@ -0,0 +1,40 @@
+from screenshot_ocr import ocr_layout
+
+_TSV_ROWS = [
+    "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t"
+    "left\ttop\twidth\theight\tconf\ttext",
+    "1\t1\t0\t0\t0\t0\t0\t0\t800\t600\t-1\t",
+    "4\t1\t1\t1\t1\t0\t10\t10\t200\t40\t-1\t",
+    "5\t1\t1\t1\t1\t1\t10\t10\t120\t40\t96.5\tQuestion",
+    "5\t1\t1\t1\t1\t2\t140\t10\t30\t40\t95.1\t4",
+    "5\t1\t2\t1\t1\t1\t10\t80\t60\t20\t91.0\tWhat",
+    "5\t1\t2\t1\t1\t2\t80\t80\t20\t20\t90.0\tis",
+    "5\t1\t2\t1\t1\t3\t110\t80\t40\t20\t12.0\t@@",
+    "5\t1\t2\t1\t2\t1\t10\t110\t60\t20\t88.0\tthis?",
+    "5\t1\t2\t1\t2\t2\t80\t110\t20\t20\t-1\t ",
+    "5\t1\t2\t1\t2\t3\t80\t110\t20\t20\tbad\tword",
+]
+_TSV = "\n".join(_TSV_ROWS)
+
+
+def test_parse_tsv():
+    layout = ocr_layout.parse_tsv(_TSV)
+
+    expected_words = 6
+    expected_height = 40
+    assert len(layout) == expected_words
+    assert layout.words == ["Question", "4", "What", "is", "@@", "this?"]
+    assert list(layout.line_ids) == [0, 0, 1, 1, 1, 2]
+    assert layout.lines() == [[0, 1], [2, 3, 4], [5]]
+    assert layout.line_height([0, 1]) == expected_height
+    assert layout.text() == "Question 4\nWhat is @@\nthis?"
+
+
+def test_layout_min_confidence():
+    layout = ocr_layout.parse_tsv(_TSV)
+
+    assert layout.text(ocr_layout.DEFAULT_MIN_CONFIDENCE) == (
+        "Question 4\nWhat is\nthis?"
+    )
+    assert layout.lines(99.0) == []
+    assert ocr_layout.parse_tsv("").text() == ""
@@ -0,0 +1,77 @@
+import asyncio
+import pathlib
+
+import pytest
+from screenshot_ocr import pipeline
+
+
+def _item(index):
+    return pipeline.PipelineItem(index, pathlib.Path(f"{index}.png"), None)
+
+
+def test_pipeline_reorder():
+    reorder = pipeline.Reorder()
+
+    assert reorder.push(_item(1)) == []
+    assert reorder.push(_item(2)) == []
+    assert [i.index for i in reorder.push(_item(0))] == [0, 1, 2]
+    assert [i.index for i in reorder.push(_item(3))] == [3]
+
+
+def test_pipeline_stages_backpressure():
+    queue_size = 2
+    item_count = 10
+    seen = []
+    max_waiting = []
+
+    async def _run():
+        first_queue = asyncio.Queue(queue_size)
+        second_queue = asyncio.Queue(queue_size)
+
+        async def _produce():
+            for index in range(item_count):
+                await first_queue.put(_item(index))
+                max_waiting.append(first_queue.qsize())
+            await first_queue.put(pipeline.END)
+
+        async def _first(item):
+            await asyncio.sleep(0.001 * (item_count - item.index))
+            return [item]
+
+        async def _second(item):
+            seen.append(item.index)
+            return []
+
+        await pipeline.run_stages(
+            [
+                _produce(),
+                pipeline.run_stage(3, first_queue, second_queue, _first),
+                pipeline.run_stage(1, second_queue, None, _second),
+            ],
+        )
+
+    asyncio.run(_run())
+
+    assert sorted(seen) == list(range(item_count))
+    assert max(max_waiting) <= queue_size
+
+
+def test_pipeline_stages_error():
+    async def _run():
+        first_queue = asyncio.Queue(1)
+
+        async def _produce():
+            for index in range(100):
+                await first_queue.put(_item(index))
+            await first_queue.put(pipeline.END)
+
+        async def _fail(_item):
+            msg = "stage failed"
+            raise RuntimeError(msg)
+
+        await pipeline.run_stages(
+            [_produce(), pipeline.run_stage(2, first_queue, None, _fail)],
+        )
+
+    with pytest.raises(RuntimeError, match="stage failed"):
+        asyncio.run(_run())
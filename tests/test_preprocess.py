@@ -0,0 +1,67 @@
+import io
+
+import pytest
+from screenshot_ocr import preprocess
+
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+
+def _screenshot(path, width=400, height=300):
+    # light grey page with a white margin and a dark block of 'text'
+    pixels = np.full((height, width, 3), 255, dtype=np.uint8)
+    pixels[50:250, 40:360] = 200
+    pixels[100:120, 80:300] = 20
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+def test_preprocess_crop_and_max_width(tmp_path):
+    image_file = _screenshot(tmp_path / "screenshot.png")
+    options = preprocess.PreprocessOptions(
+        crop=(40, 50, 360, 250),
+        auto_crop=False,
+        max_width=160,
+        binarize=False,
+    )
+    preprocessor = preprocess.ImagePreprocessor(options)
+
+    prepared = preprocessor.process_bytes(image_file.read_bytes())
+
+    with Image.open(io.BytesIO(prepared)) as result:
+        expected_size = (160, 100)
+        assert result.size == expected_size
+        # shades of grey are kept
+        assert len(np.unique(np.asarray(result))) > 2  # noqa: PLR2004
+
+
+def test_preprocess_options_id():
+    options = preprocess.PreprocessOptions(crop=(1, 2, 3, 4), max_width=None)
+
+    assert options.options_id == (
+        "preprocess|crop=1,2,3,4|auto_crop=True|max_width=None|binarize=True"
+    )
+
+
+def test_parse_crop():
+    expected = (10, 20, 300, 400)
+    assert preprocess.parse_crop("10, 20,300,400") == expected
+
+    with pytest.raises(ValueError, match="expected 'left,top,right,bottom'"):
+        preprocess.parse_crop("10,20,300")
+    with pytest.raises(ValueError, match="the region is empty"):
+        preprocess.parse_crop("10,20,5,400")
+
+
+def test_preprocess_bytes(tmp_path):
+    image_file = _screenshot(tmp_path / "screenshot.png")
+    preprocessor = preprocess.ImagePreprocessor(preprocess.PreprocessOptions())
+
+    prepared = preprocessor.process_bytes(image_file.read_bytes())
+
+    with Image.open(io.BytesIO(prepared)) as result:
+        expected_size = (320, 200)
+        assert result.size == expected_size
+        assert result.mode == "L"
+        assert sorted(np.unique(np.asarray(result)).tolist()) == [0, 255]
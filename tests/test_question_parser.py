@@ -0,0 +1,147 @@
+import random
+import re
+
+import pytest
+from screenshot_ocr import ocr_layout, question_parser
+
+
+def _previous_get_text_details(value):
+    # the implementation of TriviaHelper.get_text_details before the parser module
+    number = None
+    points = 1
+    text = ""
+    fixes = {"i": "1", "l": "1", "o": "0"}
+    num_map = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5}
+    key_question = "question"
+    re_points = re.compile(r"(?P<num>(one|two|three|four|five))\s+points?")
+
+    for line in value.splitlines():
+        line_strip = line.strip()
+        if not line_strip:
+            continue
+
+        line_lower = line_strip.casefold()
+
+        if key_question in line_lower and not number:
+            start_index = line_lower.index(key_question) + len(key_question)
+            raw = list(line_lower[start_index:].strip())
+
+            for index, char in enumerate(raw):
+                if char in fixes:
+                    raw[index] = fixes[char]
+
+            number_raw = "".join(raw)
+            if all(c.isdigit() for c in number_raw):
+                number = int(number_raw)
+                continue
+
+        match = re_points.search(line_lower)
+        if match and points == 1:
+            num_word = match.group("num")
+            points = num_map[num_word]
+
+        text += " " + line.strip()
+
+    text = text.strip()
+    return number, points, text
+
+
+def test_parse_question_text_matches_previous_parser():
+    words = [
+        "QUESTION",
+        "question",
+        "Question",
+        "QUESTIONS",
+        "12",
+        "1o",
+        "l7",
+        "I",
+        "0",
+        "one",
+        "TWO",
+        "three",
+        "Four",
+        "five",
+        "points",
+        "POINT",
+        "someone",
+        "Straße",
+        "body",
+        "text",
+        "—",
+        "?",
+    ]
+    separators = [" ", "  ", "\t", "\n", "\n\n", "\r\n", " \n "]
+    rng = random.Random(1234)
+
+    for _ in range(5000):
+        parts = []
+        for _ in range(rng.randint(0, 12)):
+            parts.append(rng.choice(words))
+            parts.append(rng.choice(separators))
+        value = "".join(parts)
+        try:
+            expected = _previous_get_text_details(value)
+        except ValueError:
+            # a 'question' line with nothing after it could not be parsed before
+            continue
+        assert question_parser.parse_question_text(value) == expected, value
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (
+            "QUESTION 17\n\nWhich bird?\nFor two points",
+            (17, 2, "Which bird? For two points"),
+        ),
+        ("QUESTION\nbody text", (None, 1, "QUESTION body text")),
+        ("Question 0\nQuestion 3\nbody", (3, 1, "body")),
+        ("three points\nfive points", (None, 3, "three points five points")),
+        ("", (None, 1, "")),
+    ],
+)
+def test_parse_question_text(value, expected):
+    assert question_parser.parse_question_text(value) == expected
+
+
+def test_parse_text_files(tmp_path, caplog):
+    text_file = tmp_path / "Screenshot 1.txt"
+    text_file.write_text("QUESTION 4\nbody text\nFor four points")
+    missing_file = tmp_path / "missing.txt"
+
+    results = list(question_parser.parse_text_files([text_file, missing_file]))
+
+    expected_points = 4
+    assert results == [
+        (text_file, (4, expected_points, "body text For four points")),
+    ]
+    assert "Could not read text file" in caplog.text
+
+
+def test_parse_question_layout():
+    layout = ocr_layout.OcrLayout()
+    # the words, line, left, top, height, and confidence
+    words = [
+        ("Question", 0, 10, 10, 12, 93.0),
+        ("2", 0, 90, 10, 12, 93.0),
+        ("Back", 1, 10, 40, 14, 15.0),
+        ("QUESTION", 2, 10, 80, 40, 96.0),
+        ("I7", 2, 200, 80, 40, 94.0),
+        ("(two", 3, 10, 140, 20, 91.0),
+        ("points)", 3, 40, 140, 20, 91.0),
+        ("Who", 4, 10, 170, 20, 90.0),
+        ("wrote", 4, 60, 170, 20, 89.0),
+        ("it?", 4, 120, 170, 20, 88.0),
+    ]
+    for word in words:
+        layout.append(*word)
+
+    # the tallest question line is used, and the faint button is left out
+    expected_number = 17
+    expected_points = 2
+    assert question_parser.parse_question_layout(layout, 60.0) == (
+        expected_number,
+        expected_points,
+        "Question 2 (two points) Who wrote it?",
+    )
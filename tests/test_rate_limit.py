@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from screenshot_ocr import rate_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_burst_then_rate():
+    clock = FakeClock()
+    bucket = rate_limit.TokenBucket(60, capacity=2, clock=clock, sleep=clock.sleep)
+
+    # the burst does not wait
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert clock.sleeps == []
+
+    # then one request each second
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert bucket.acquire() == pytest.approx(1.0)
+
+    # the bucket fills again while idle
+    clock.now += 10
+    assert bucket.acquire() == 0
+
+
+def test_token_bucket_pause():
+    clock = FakeClock()
+    bucket = rate_limit.TokenBucket(60, clock=clock, sleep=clock.sleep)
+
+    bucket.pause(5)
+
+    expected_wait = 6.0
+    assert bucket.acquire() == pytest.approx(expected_wait)
+
+
+def test_token_bucket_invalid():
+    with pytest.raises(ValueError, match="Invalid per_minute"):
+        rate_limit.TokenBucket(0)
+    with pytest.raises(ValueError, match="Invalid capacity"):
+        rate_limit.TokenBucket(60, capacity=0.5)
+
+
+def test_backoff_delay():
+    backoff = rate_limit.Backoff(base_seconds=1.0, max_seconds=8.0)
+    rng = random.Random(1)
+
+    for attempt, ceiling in [(0, 1.0), (1, 2.0), (2, 4.0), (3, 8.0), (10, 8.0)]:
+        delay = backoff.delay(attempt, rng)
+        assert ceiling / 2 <= delay <= ceiling
+
+    # a large attempt number does not overflow
+    assert backoff.delay(10_000) <= backoff.max_seconds
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from screenshot_ocr import routing
+
+
+def test_router_first_match(tmp_path):
+    routes_file = tmp_path / "routes.json"
+    routes_file.write_text(
+        json.dumps(
+            {
+                "routes": [
+                    {
+                        "name": "isolation",
+                        "pattern": "Isolation Trivia",
+                        "spreadsheet_id": "ss-isolation",
+                    },
+                    {"pattern": "Trivia", "spreadsheet_id": "ss-trivia"},
+                ],
+            },
+        ),
+    )
+    router = routing.SpreadsheetRouter(routing.load_routes(routes_file), "ss-default")
+
+    assert router.spreadsheet_ids == ["ss-isolation", "ss-trivia", "ss-default"]
+    assert (
+        router.spreadsheet_id(
+            "Screenshot 2023-06-16 at 18-49-01 Isolation Trivia.png",
+            count=True,
+        )
+        == "ss-isolation"
+    )
+    assert (
+        router.spreadsheet_id("Screenshot 2023-06-16 at 18-49-01 Trivia.txt")
+        == "ss-trivia"
+    )
+    assert (
+        router.spreadsheet_id(
+            "Screenshot 2023-06-16 at 18-49-01 Facebook.png",
+            count=True,
+        )
+        == "ss-default"
+    )
+    assert router.counts == {"isolation": 1, routing.DEFAULT_ROUTE_NAME: 1}
+
+
+@pytest.mark.parametrize(
+    ("content", "message"),
+    [
+        ("not json", "Could not read routes file"),
+        ("[]", "must contain a 'routes' list"),
+        ('{"routes": [{"spreadsheet_id": "ss"}]}', "Invalid pattern for route 1"),
+        ('{"routes": [{"pattern": "("}]}', "Invalid spreadsheet_id for route 1"),
+        (
+            '{"routes": [{"pattern": "(", "spreadsheet_id": "ss"}]}',
+            "Invalid pattern for route 1",
+        ),
+    ],
+)
+def test_load_routes_invalid(tmp_path, content, message):
+    routes_file = tmp_path / "routes.json"
+    routes_file.write_text(content)
+
+    with pytest.raises(ValueError, match=message):
+        routing.load_routes(routes_file)
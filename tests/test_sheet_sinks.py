@@ -0,0 +1,71 @@
+import pytest
+
+from screenshot_ocr import sheet_sinks
+
+
+def test_parse_range():
+    assert sheet_sinks.parse_range("'2023-06-16 Fri'!B3:B3") == (
+        "2023-06-16 Fri",
+        2,
+        3,
+        2,
+        3,
+    )
+    assert sheet_sinks.parse_range("'sheet'!B:D") == ("sheet", 2, 1, 4, 0)
+    assert sheet_sinks.parse_range("'sheet'!AA10") == ("sheet", 27, 10, 27, 10)
+
+    with pytest.raises(ValueError, match="Invalid range"):
+        sheet_sinks.parse_range("sheet!B3")
+
+
+def test_memory_sink():
+    sink = sheet_sinks.MemorySheetSink()
+
+    # like Google Sheets, the sheet must exist
+    assert sink.update_spreadsheet_cells("ss1", [("'sheet'!B3:B3", "text 1")]) == {
+        "'sheet'!B3:B3": False,
+    }
+
+    assert sink.create_sheets("ss1", ["sheet"]) == ["sheet"]
+    assert sink.get_sheet_titles("ss1") == {"sheet": 0}
+    assert sink.get_sheet_titles("ss2") == {}
+
+    results = sink.update_spreadsheet_cells(
+        "ss1",
+        [("'sheet'!B3:B3", "text 1"), ("'sheet'!D4:D4", "2")],
+    )
+    assert results == {"'sheet'!B3:B3": True, "'sheet'!D4:D4": True}
+    assert sink.get_cell("ss1", "sheet", "B", "3") == "text 1"
+    expected_updates = 3
+    assert len(sink.updates) == expected_updates
+
+    assert sink.get_spreadsheet_values("ss1", ["'sheet'!B:D", "'other'!B:D"]) == [
+        [[], [], ["text 1"], ["", "", "2"]],
+        [],
+    ]
+
+
+def test_memory_sink_template():
+    sink = sheet_sinks.MemorySheetSink()
+    sink.create_sheets("ss1", ["Template"])
+    sink.update_spreadsheet_cells("ss1", [("'Template'!A1:A1", "Question")])
+
+    assert sink.create_sheets("ss1", ["sheet", "Template"], "Template") == ["sheet"]
+
+    assert sink.get_sheet_titles("ss1") == {"Template": 0, "sheet": 1}
+    assert sink.get_cell("ss1", "sheet", "A", "1") == "Question"
+
+
+def test_sqlite_sink(tmp_path):
+    db_file = tmp_path / "sheets" / "spreadsheet.sqlite3"
+    sink = sheet_sinks.SqliteSheetSink(db_file)
+    sink.create_sheets("ss1", ["sheet"])
+    sink.update_spreadsheet_cells("ss1", [("'sheet'!B3:B3", "text 1")])
+    sink.update_spreadsheet_cells("ss1", [("'sheet'!B3:B3", "text 2")])
+    sink.close()
+
+    # the sheets and cells are loaded from the file
+    sink = sheet_sinks.SqliteSheetSink(db_file)
+    assert sink.get_sheet_titles("ss1") == {"sheet": 0}
+    assert sink.get_cell("ss1", "sheet", "B", "3") == "text 2"
+    sink.close()
@@ -4,7 +4,9 @@ import tempfile
 import uuid
 
 from click.testing import CliRunner
+import pytest
 from importlib_resources import files
+from screenshot_ocr import ocr
 from screenshot_ocr.cli import screenshot_ocr
 
 
@@ -60,6 +62,10 @@ def test_tesseract_extract(
                 "--google-token",
                 str(google_token),
                 "--no-move-images",
+                "--workers",
+                "2",
+                "--no-cache",
+                "--no-manifest",
                 spreadsheet_id,
             ],
         )
@@ -79,6 +85,7 @@ def test_tesseract_extract(
             20,
             f"Looking for screenshot images in '{input_dir}'.",
         ),
+        ("screenshot_ocr.trivia", 20, "Found 1 screenshot images."),
         (
             "screenshot_ocr.app",
             20,
@@ -92,3 +99,108 @@ def test_tesseract_extract(
             "Error: ValueError - Client secrets must be for a web or installed app.",
         ),
     ]
+
+
+def test_tesseract_library_fallback(monkeypatch, caplog, tmp_path):
+    monkeypatch.setattr(ocr, "_find_library", lambda _name: None)
+    monkeypatch.setattr(ocr, "_TESSERACT_LIBRARY_NAMES", {})
+
+    helper = ocr.build_ocr_helper(
+        ocr.OCR_BACKEND_LIBRARY,
+        tmp_path / "tesseract",
+        tmp_path / "tessdata",
+    )
+
+    assert isinstance(helper, ocr.OcrHelper)
+    assert caplog.record_tuples == [
+        (
+            "screenshot_ocr.ocr",
+            30,
+            "Could not load the Tesseract library, using the Tesseract "
+            "executable instead: Could not find the 'tesseract' library.",
+        ),
+    ]
+
+
+def test_tesseract_unknown_backend(tmp_path):
+    with pytest.raises(ValueError, match="Unknown OCR backend 'other'."):
+        ocr.build_ocr_helper("other", tmp_path / "tesseract", tmp_path / "tessdata")
+
+
+def test_tesseract_stdin(monkeypatch, tmp_path):
+    calls = []
+
+    def _run(cmds, **kwargs):
+        calls.append((cmds, kwargs.get("input")))
+        return ocr.subprocess.CompletedProcess(cmds, 0, stdout=b"QUESTION 1")
+
+    monkeypatch.setattr(ocr.subprocess, "run", _run)
+    helper = ocr.OcrHelper(tmp_path / "tesseract", tmp_path / "tessdata")
+    image_file = tmp_path / "image.png"
+
+    # the image content that was already read is sent using stdin
+    assert helper.run(image_file, b"image data") == "QUESTION 1"
+    assert helper.run(image_file) == "QUESTION 1"
+
+    assert [(cmds[3], data) for cmds, data in calls] == [
+        ("stdin", b"image data"),
+        (str(image_file), None),
+    ]
+
+
+def test_tesseract_tsv_output(monkeypatch, tmp_path):
+    calls = []
+
+    def _run(cmds, **_kwargs):
+        calls.append(cmds)
+        return ocr.subprocess.CompletedProcess(cmds, 0, stdout=b"level")
+
+    monkeypatch.setattr(ocr.subprocess, "run", _run)
+    helper = ocr.OcrHelper(
+        tmp_path / "tesseract",
+        tmp_path / "tessdata",
+        ocr.OCR_OUTPUT_TSV,
+    )
+
+    assert helper.run(tmp_path / "image.png", b"image data") == "level"
+    assert calls[0][3:] == ["stdin", "stdout", "tsv"]
+
+
+def test_tesseract_options(monkeypatch, tmp_path):
+    calls = []
+
+    def _run(cmds, **_kwargs):
+        calls.append(cmds)
+        return ocr.subprocess.CompletedProcess(cmds, 0, stdout=b"tesseract 5.3.0")
+
+    monkeypatch.setattr(ocr.subprocess, "run", _run)
+    options = ocr.TesseractOptions(psm=6, oem=1, languages="eng+fra", whitelist="Q1")
+    helper = ocr.OcrHelper(tmp_path / "tesseract", tmp_path / "tessdata")
+    options_helper = ocr.OcrHelper(
+        tmp_path / "tesseract",
+        tmp_path / "tessdata",
+        options=options,
+    )
+    image_file = tmp_path / "image.png"
+
+    helper.run(image_file, b"image data")
+    helper.run(image_file, b"image data", ocr.TesseractOptions(psm=7))
+    options_helper.run(image_file, b"image data")
+
+    assert [cmds[5:] for cmds in calls] == [
+        [],
+        ["--psm", "7"],
+        [
+            "--psm",
+            "6",
+            "--oem",
+            "1",
+            "-l",
+            "eng+fra",
+            "-c",
+            "tessedit_char_whitelist=Q1",
+        ],
+    ]
+    # the default settings are not part of the engine id
+    assert helper.engine_id.endswith("tessdata")
+    assert options_helper.engine_id.endswith(options.options_id)
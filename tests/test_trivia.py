@@ -1,6 +1,11 @@
 import datetime
+import os
+import pathlib
+import re
 
 import pytest
+from screenshot_ocr import trivia
+from screenshot_ocr.directory_index import DirectoryIndex
 from screenshot_ocr.trivia import TriviaHelper
 
 example_1_longer_question = "QUESTION 15"
@@ -90,3 +95,125 @@ def test_find_screenshot_images(tmp_path, file_name, expected_date):
         if expected_date is not None:
             assert found_path.name == file_name
             assert date == expected_date
+
+
+def _old_screenshot_image_details(file_path):
+    """The file name checks used before the names were matched by one pattern."""
+    suffixes = [".png", ".jpeg", ".jpg"]
+    if file_path.suffix.casefold() not in suffixes:
+        return False, None
+    if not file_path.stem.startswith("Screenshot "):
+        return False, None
+    if "Facebook" not in file_path.stem and "Isolation Trivia" not in file_path.stem:
+        return False, None
+    date_match = re.search(r"(?P<date>\d{4}-\d{2}-\d{2})", file_path.stem)
+    if not date_match:
+        return True, None
+    found_date = datetime.datetime.fromisoformat(date_match.group("date"))
+    return True, found_date.replace(tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "file_name",
+    [
+        "Screenshot 2023-10-13 at 18-45-57 Isolation Trivia Live Stream.png",
+        "Screenshot 2023-10-06 at 18-37-23 Facebook.PNG",
+        "Screenshot 2023-10-06 at 18-37-23 Facebook.jpeg",
+        "Screenshot 2023-10-06 at 18-37-23 Facebook.Jpg",
+        "Screenshot 2023-10-06 at 18-37-23 Facebook.gif",
+        "Screenshot 2023-10-06 at 18-37-23 Facebook.png.txt",
+        "Screenshot 2023-10-06 2024-01-02 Facebook.png",
+        "Screenshot Facebook 2023-10-06.old.png",
+        "Screenshot no date here Facebook.png",
+        "Screenshot 2023-10-06 at 18-37-23 wrong website name.png",
+        "Screenshot 2023-10-06 at 18-37-23 facebook.png",
+        "Screenshot2023-10-06 Facebook.png",
+        "screenshot 2023-10-06 Facebook.png",
+        "Screenshot .png",
+        "Screenshot Facebook.png",
+        "Screenshot Isolation Trivia",
+        "notes.txt",
+    ],
+)
+def test_get_screenshot_image_details_matches_old(file_name):
+    file_path = pathlib.Path(file_name)
+    helper = TriviaHelper(None, None)
+    actual = helper.get_screenshot_image_details(file_path)
+    assert actual == _old_screenshot_image_details(file_path)
+
+
+def test_find_screenshot_images_dir_index(tmp_path, monkeypatch):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    names = [f"Screenshot 2023-10-06 at 18-37-{i:02} Facebook.png" for i in range(5)]
+    for name in names:
+        (image_dir / name).touch()
+    (image_dir / "other.png").touch()
+    (image_dir / "Screenshot 2023-10-06 folder Facebook.png").mkdir()
+
+    # the directory must not have changed very recently to be indexed
+    old_ns = image_dir.stat().st_mtime_ns - 10_000_000_000
+    os.utime(image_dir, ns=(old_ns, old_ns))
+
+    dir_index = DirectoryIndex(tmp_path / "index.json")
+    helper = TriviaHelper(None, None)
+    found = [
+        path.name for path, _ in helper.find_screenshot_images(image_dir, dir_index)
+    ]
+    assert sorted(found) == names
+    dir_index.save()
+
+    # an unchanged directory is not read again
+    def _scandir(_path):
+        raise AssertionError
+
+    monkeypatch.setattr(trivia.os, "scandir", _scandir)
+    dir_index = DirectoryIndex(tmp_path / "index.json")
+    found = [
+        path.name for path, _ in helper.find_screenshot_images(image_dir, dir_index)
+    ]
+    assert sorted(found) == names
+    assert dir_index.hits == 1
+
+
+def test_find_screenshot_images_recursive(tmp_path):
+    names = {
+        tmp_path / "Screenshot 2023-10-06 at 18-37-01 Facebook.png",
+        tmp_path / "a" / "Screenshot 2023-10-06 at 18-37-02 Facebook.png",
+        tmp_path / "a" / "b" / "Screenshot 2023-10-06 at 18-37-03 Facebook.png",
+    }
+    for path in names:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    helper = TriviaHelper(None, None)
+    found = {path for path, _ in helper.find_screenshot_images(tmp_path)}
+    assert found == {tmp_path / "Screenshot 2023-10-06 at 18-37-01 Facebook.png"}
+
+    found = {
+        path for path, _ in helper.find_screenshot_images(tmp_path, recursive=True)
+    }
+    assert found == names
+
+
+def test_find_screenshot_images_in_dirs(tmp_path):
+    image_dirs = [tmp_path / "one", tmp_path / "two", tmp_path / "three"]
+    expected = set()
+    for index, image_dir in enumerate(image_dirs):
+        image_dir.mkdir()
+        for number in range(4):
+            path = (
+                image_dir
+                / f"Screenshot 2023-10-06 at 18-{index:02}-{number:02} Facebook.png"
+            )
+            path.touch()
+            expected.add(path)
+
+    helper = TriviaHelper(None, None)
+    found = [path for path, _ in helper.find_screenshot_images_in_dirs(image_dirs)]
+    assert len(found) == len(expected)
+    assert set(found) == expected
+
+    # an error reading one directory is raised
+    with pytest.raises(FileNotFoundError):
+        list(helper.find_screenshot_images_in_dirs([*image_dirs, tmp_path / "missing"]))
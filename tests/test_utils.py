@@ -0,0 +1,68 @@
+import errno
+
+import pytest
+from screenshot_ocr import utils
+
+
+def test_move_file_rename(tmp_path):
+    src = tmp_path / "image.png"
+    src.write_bytes(b"image data")
+    dst = tmp_path / "output" / "image.png"
+    dst.parent.mkdir()
+    dst.write_bytes(b"old data")
+
+    utils.move_file(src, dst)
+
+    assert not src.exists()
+    assert dst.read_bytes() == b"image data"
+
+
+def test_move_file_other_file_system(tmp_path, monkeypatch):
+    src = tmp_path / "image.png"
+    src.write_bytes(b"image data")
+    dst = tmp_path / "output" / "image.png"
+    dst.parent.mkdir()
+    renames = []
+    replace = utils.os.replace
+
+    def _replace(from_path, to_path):
+        renames.append(from_path)
+        if from_path == src:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        replace(from_path, to_path)
+
+    monkeypatch.setattr(utils.os, "replace", _replace)
+
+    utils.move_file(src, dst)
+
+    # the copy was renamed into place, and no temporary file is left
+    expected_renames = 2
+    assert len(renames) == expected_renames
+    assert not src.exists()
+    assert [i.name for i in dst.parent.iterdir()] == ["image.png"]
+    assert dst.read_bytes() == b"image data"
+
+
+def test_move_file_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        utils.move_file(tmp_path / "missing.png", tmp_path / "image.png")
+
+
+def test_write_text_atomic(tmp_path, monkeypatch):
+    path = tmp_path / "image.txt"
+    path.write_text("old text")
+
+    utils.write_text_atomic(path, "new text")
+    assert path.read_text() == "new text"
+
+    def _fail(_fd):
+        msg = "disk full"
+        raise OSError(msg)
+
+    monkeypatch.setattr(utils.os, "fsync", _fail)
+    with pytest.raises(OSError, match="disk full"):
+        utils.write_text_atomic(path, "partial text")
+
+    # the file is unchanged and the temporary file is removed
+    assert path.read_text() == "new text"
+    assert [i.name for i in tmp_path.iterdir()] == ["image.txt"]
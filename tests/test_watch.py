@@ -0,0 +1,84 @@
+import sys
+
+import pytest
+from screenshot_ocr import watch
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, tmp_path, monkeypatch):
+    if request.param == "polling":
+        monkeypatch.setattr(watch.DirectoryWatcher, "_start_inotify", lambda _: None)
+    elif not sys.platform.startswith("linux"):
+        pytest.skip("Linux-specific test.")
+
+    (tmp_path / "existing.png").write_bytes(b"existing")
+    result = watch.DirectoryWatcher(tmp_path, settle_seconds=0.2, poll_interval=0.05)
+    assert result.uses_inotify == (request.param == "inotify")
+    yield result
+    result.close()
+
+
+def test_watch_new_file(watcher, tmp_path):
+    assert watcher.wait(timeout=0.1) == []
+
+    new_file = tmp_path / "new.png"
+    new_file.write_bytes(b"new")
+
+    assert watcher.wait(timeout=2) == [new_file]
+    assert watcher.wait(timeout=0.3) == []
+
+
+def test_watch_partial_file(watcher, tmp_path):
+    new_file = tmp_path / "new.png"
+    with new_file.open("wb") as f:
+        f.write(b"partial")
+        f.flush()
+        assert watcher.wait(timeout=0.1) == []
+        f.write(b" complete")
+
+    assert watcher.wait(timeout=2) == [new_file]
+
+
+@pytest.mark.parametrize("mode", ["inotify", "polling"])
+def test_watch_recursive(mode, tmp_path, monkeypatch):
+    if mode == "polling":
+        monkeypatch.setattr(watch.DirectoryWatcher, "_start_inotify", lambda _: None)
+    elif not sys.platform.startswith("linux"):
+        pytest.skip("Linux-specific test.")
+
+    existing_dir = tmp_path / "existing"
+    existing_dir.mkdir()
+    (existing_dir / "existing.png").write_bytes(b"existing")
+    watcher = watch.DirectoryWatcher(
+        tmp_path,
+        settle_seconds=0.2,
+        poll_interval=0.05,
+        recursive=True,
+    )
+    try:
+        assert watcher.wait(timeout=0.1) == []
+
+        existing_file = existing_dir / "new.png"
+        existing_file.write_bytes(b"new")
+        assert watcher.wait(timeout=2) == [existing_file]
+
+        # a subdirectory created while watching is also watched
+        new_file = tmp_path / "new" / "nested" / "new.png"
+        new_file.parent.mkdir(parents=True)
+        new_file.write_bytes(b"new")
+        assert watcher.wait(timeout=2) == [new_file]
+        assert watcher.wait(timeout=0.3) == []
+
+        later_file = new_file.parent / "later.png"
+        later_file.write_bytes(b"later")
+        assert watcher.wait(timeout=2) == [later_file]
+    finally:
+        watcher.close()
+
+
+def test_watch_not_recursive(watcher, tmp_path):
+    new_file = tmp_path / "new" / "new.png"
+    new_file.parent.mkdir()
+    new_file.write_bytes(b"new")
+
+    assert watcher.wait(timeout=0.5) == []